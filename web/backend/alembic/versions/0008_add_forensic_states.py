@@ -0,0 +1,53 @@
+"""add forensic states
+
+Revision ID: 0008_forensic_states
+Revises: 0007_audit_logs
+Create Date: 2026-06-15 00:00:00.000005
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "0008_forensic_states"
+down_revision: Union[str, None] = "0007_audit_logs"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if inspector.has_table("forensic_states"):
+        return
+
+    op.create_table(
+        "forensic_states",
+        sa.Column("id", sa.Integer(), primary_key=True, nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("folds", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("state", sa.JSON(), nullable=False),
+        sa.Column("built_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["account_id"], ["linked_accounts.id"], ondelete="CASCADE"),
+        sa.UniqueConstraint("account_id", name="uq_forensic_states_account_id"),
+    )
+    op.create_index("ix_forensic_states_id", "forensic_states", ["id"], unique=False)
+    op.create_index("ix_forensic_states_user_id", "forensic_states", ["user_id"], unique=False)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if inspector.has_table("forensic_states"):
+        op.drop_index("ix_forensic_states_user_id", table_name="forensic_states")
+        op.drop_index("ix_forensic_states_id", table_name="forensic_states")
+        op.drop_table("forensic_states")
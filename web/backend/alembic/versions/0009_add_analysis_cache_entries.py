@@ -0,0 +1,44 @@
+"""add analysis cache entries
+
+Revision ID: 0009_analysis_cache_entries
+Revises: 0008_forensic_states
+Create Date: 2026-06-15 00:00:00.000006
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision: str = "0009_analysis_cache_entries"
+down_revision: Union[str, None] = "0008_forensic_states"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if inspector.has_table("analysis_cache_entries"):
+        return
+
+    op.create_table(
+        "analysis_cache_entries",
+        sa.Column("key", sa.String(length=64), primary_key=True, nullable=False),
+        sa.Column("engine_version", sa.String(length=32), nullable=False),
+        sa.Column("as_of", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("result", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_analysis_cache_entries_as_of", "analysis_cache_entries", ["as_of"], unique=False)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if inspector.has_table("analysis_cache_entries"):
+        op.drop_index("ix_analysis_cache_entries_as_of", table_name="analysis_cache_entries")
+        op.drop_table("analysis_cache_entries")
@@ -0,0 +1,49 @@
+"""add anomaly scores
+
+Revision ID: 0010_anomaly_scores
+Revises: 0009_analysis_cache_entries
+Create Date: 2026-06-15 00:00:00.000007
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "0010_anomaly_scores"
+down_revision: Union[str, None] = "0009_analysis_cache_entries"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if inspector.has_table("anomaly_scores"):
+        return
+
+    op.create_table(
+        "anomaly_scores",
+        sa.Column("transaction_id", sa.Integer(), primary_key=True, nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("model_key", sa.String(length=100), nullable=False),
+        sa.Column("model_version", sa.String(length=64), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("is_anomaly", sa.Boolean(), nullable=False),
+        sa.Column("scored_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["transaction_id"], ["transactions.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+    )
+    op.create_index("ix_anomaly_scores_user_id", "anomaly_scores", ["user_id"], unique=False)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if inspector.has_table("anomaly_scores"):
+        op.drop_index("ix_anomaly_scores_user_id", table_name="anomaly_scores")
+        op.drop_table("anomaly_scores")
@@ -0,0 +1,48 @@
+"""add user clusters
+
+Revision ID: 0011_user_clusters
+Revises: 0010_anomaly_scores
+Create Date: 2026-06-15 00:00:00.000008
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "0011_user_clusters"
+down_revision: Union[str, None] = "0010_anomaly_scores"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if inspector.has_table("user_clusters"):
+        return
+
+    op.create_table(
+        "user_clusters",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("cluster_id", sa.Integer(), nullable=False),
+        sa.Column("cluster_profile", sa.String(length=50), nullable=False),
+        sa.Column("distances", sa.JSON(), nullable=False),
+        sa.Column("features", sa.JSON(), nullable=False),
+        sa.Column("model_version", sa.String(length=64), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+    )
+    op.create_index("ix_user_clusters_model_version", "user_clusters", ["model_version"], unique=False)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if inspector.has_table("user_clusters"):
+        op.drop_index("ix_user_clusters_model_version", table_name="user_clusters")
+        op.drop_table("user_clusters")
@@ -0,0 +1,48 @@
+"""add user features
+
+Revision ID: 0012_user_features
+Revises: 0011_user_clusters
+Create Date: 2026-06-15 00:00:00.000009
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "0012_user_features"
+down_revision: Union[str, None] = "0011_user_clusters"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if inspector.has_table("user_features"):
+        return
+
+    op.create_table(
+        "user_features",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("transaction_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("amount_total", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("first_transaction_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_transaction_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("hour_weekday", sa.JSON(), nullable=False),
+        sa.Column("merchant_counts", sa.JSON(), nullable=False),
+        sa.Column("monthly_totals", sa.JSON(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if inspector.has_table("user_features"):
+        op.drop_table("user_features")
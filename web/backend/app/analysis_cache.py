@@ -0,0 +1,259 @@
+"""
+Content-addressed cache for ForensicEngine.analyze results.
+
+Keys hash the fields the engine reads from each transaction (in order), the
+detector selection, the evidence level, ENGINE_VERSION, the rules catalog
+version and the analysis clock, so a hit is exactly the result a fresh run would produce. Two tiers:
+
+- an in-process LRU (per worker, bounded by ANALYSIS_CACHE_SIZE)
+- an optional Postgres table shared by all workers (ANALYSIS_CACHE_SHARED)
+
+The shared tier is best effort: database errors are logged and treated as misses.
+Keys include the analysis day, so entries from before the current day can no
+longer be hit; each worker deletes them with its first store of the day.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Union
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .forensic_engine import ENGINE_VERSION, TRANSACTION_COLUMNS, ForensicEngine
+from .models_db import AnalysisCacheEntry
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def analysis_day(now: Optional[pd.Timestamp] = None) -> pd.Timestamp:
+    """Start of the current UTC day: the analysis clock for cacheable requests."""
+    now = now if now is not None else pd.Timestamp.now(tz="UTC")
+    return now.tz_convert("UTC").normalize()
+
+
+Transactions = Union[List[Dict[str, Any]], Mapping[str, Any]]
+
+
+def cache_key(
+    transactions: Transactions,
+    as_of: pd.Timestamp,
+    profile: str = "full",
+    detectors: Optional[Iterable[str]] = None,
+    rules_version: Optional[str] = None,
+    evidence: str = "full",
+) -> str:
+    digest = hashlib.sha256()
+    header = [
+        ENGINE_VERSION,
+        rules_version,
+        pd.Timestamp(as_of).isoformat(),
+        profile,
+        sorted(detectors) if detectors is not None else None,
+        evidence,
+    ]
+    digest.update(json.dumps(header).encode())
+    if isinstance(transactions, Mapping):
+        # Columnar input (ForensicEngine.ingest_columns) hashes column by column.
+        for field in TRANSACTION_COLUMNS:
+            values = transactions.get(field, ())
+            values = values.tolist() if hasattr(values, "tolist") else list(values)
+            digest.update(json.dumps([field, values], default=str).encode())
+            digest.update(b"\n")
+        return digest.hexdigest()
+    for tx in transactions:
+        digest.update(json.dumps([tx.get(field) for field in TRANSACTION_COLUMNS], default=str).encode())
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+_BATCH_COLUMN = "_batch"
+
+
+def _stack_batches(batches: Mapping[Any, Mapping[str, Any]]) -> Dict[str, np.ndarray]:
+    """Concatenate columnar batches into one, tagging each row with its batch position."""
+    sizes = [len(next(iter(columns.values()), ())) for columns in batches.values()]
+    stacked: Dict[str, np.ndarray] = {}
+    for field in TRANSACTION_COLUMNS:
+        parts = [
+            np.asarray(columns[field], dtype=object) if field in columns else np.full(size, None, dtype=object)
+            for columns, size in zip(batches.values(), sizes)
+        ]
+        stacked[field] = np.concatenate(parts) if parts else np.empty(0, dtype=object)
+    stacked[_BATCH_COLUMN] = np.repeat(np.arange(len(sizes)), sizes)
+    return stacked
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+class AnalysisCache:
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        session_factory: Optional[Callable[[], Session]] = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.session_factory = session_factory
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Analysis day this worker last purged the shared tier for.
+        self._purged_day: Optional[pd.Timestamp] = None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+        if result is None and self.session_factory is not None:
+            result = self._load_shared(key)
+            if result is not None:
+                self._remember(key, result)
+        # Callers append to money_leaks; never hand out the cached object itself.
+        return copy.deepcopy(result) if result is not None else None
+
+    def put(self, key: str, result: Dict[str, Any], as_of: pd.Timestamp) -> None:
+        self._remember(key, copy.deepcopy(result))
+        if self.session_factory is not None:
+            self._store_shared(key, result, as_of)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def analyze(
+        self,
+        engine: ForensicEngine,
+        transactions: Transactions,
+        as_of: Optional[pd.Timestamp] = None,
+        profile: str = "full",
+        detectors: Optional[Iterable[str]] = None,
+        evidence: str = "full",
+    ) -> Dict[str, Any]:
+        """
+        ForensicEngine.analyze (or analyze_columns, for a mapping of columns)
+        through the cache; `as_of` defaults to analysis_day(). `engine` may
+        also be an AnalysisPool, which runs misses in a worker process.
+        """
+        as_of = as_of if as_of is not None else analysis_day()
+        detectors = list(detectors) if detectors is not None else None
+        rules_version = engine.rules_version
+        key = cache_key(transactions, as_of, profile, detectors, rules_version, evidence)
+        result = self.get(key)
+        if result is None:
+            analyze = engine.analyze_columns if isinstance(transactions, Mapping) else engine.analyze
+            result = analyze(transactions, profile=profile, detectors=detectors, as_of=as_of, evidence=evidence)
+            # A catalog reload during the run may have changed the result; don't file it under the old version.
+            if engine.rules_version == rules_version:
+                self.put(key, result, as_of)
+        return result
+
+    def analyze_many(
+        self,
+        engine: ForensicEngine,
+        batches: Mapping[Any, Mapping[str, Any]],
+        as_of: Optional[pd.Timestamp] = None,
+        profile: str = "full",
+        detectors: Optional[Iterable[str]] = None,
+        evidence: str = "full",
+    ) -> Dict[Any, Dict[str, Any]]:
+        """
+        analyze() for many columnar batches (e.g. one per account): hits come
+        from the cache, and all misses go through one
+        ForensicEngine.analyze_many_columns call. Results are keyed like `batches`.
+        """
+        as_of = as_of if as_of is not None else analysis_day()
+        detectors = list(detectors) if detectors is not None else None
+        rules_version = engine.rules_version
+        keys = {
+            batch: cache_key(columns, as_of, profile, detectors, rules_version, evidence)
+            for batch, columns in batches.items()
+        }
+        results = {batch: self.get(key) for batch, key in keys.items()}
+        missing = [batch for batch, result in results.items() if result is None]
+        if missing:
+            found = engine.analyze_many_columns(
+                _stack_batches({batch: batches[batch] for batch in missing}),
+                key=_BATCH_COLUMN,
+                profile=profile,
+                detectors=detectors,
+                as_of=as_of,
+                evidence=evidence,
+            )
+            for position, batch in enumerate(missing):
+                # Batches are tagged by position: keys need not be hashable by pandas.
+                result = found.get(position)
+                if result is None:  # an empty batch
+                    result = engine.analyze_columns(
+                        batches[batch], profile=profile, detectors=detectors, as_of=as_of, evidence=evidence
+                    )
+                results[batch] = result
+            if engine.rules_version == rules_version:
+                for batch in missing:
+                    self.put(keys[batch], results[batch], as_of)
+        return results
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, key: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _load_shared(self, key: str) -> Optional[Dict[str, Any]]:
+        db = self.session_factory()
+        try:
+            entry = db.get(AnalysisCacheEntry, key)
+            return entry.result if entry is not None else None
+        except SQLAlchemyError:
+            logger.warning("analysis cache lookup failed", exc_info=True)
+            return None
+        finally:
+            db.close()
+
+    def _store_shared(self, key: str, result: Dict[str, Any], as_of: pd.Timestamp) -> None:
+        db = self.session_factory()
+        today = analysis_day()
+        try:
+            if self._purged_day != today:
+                db.query(AnalysisCacheEntry).filter(AnalysisCacheEntry.as_of < today.to_pydatetime()).delete(
+                    synchronize_session=False
+                )
+            db.merge(
+                AnalysisCacheEntry(
+                    key=key,
+                    engine_version=ENGINE_VERSION,
+                    as_of=pd.Timestamp(as_of).to_pydatetime(),
+                    result=json.loads(json.dumps(result, default=_json_default)),
+                )
+            )
+            db.commit()
+            self._purged_day = today
+        except SQLAlchemyError:
+            db.rollback()
+            logger.warning("analysis cache store failed", exc_info=True)
+        finally:
+            db.close()
+
+
+analysis_cache = AnalysisCache(
+    max_entries=settings.analysis_cache_size,
+    session_factory=SessionLocal if settings.analysis_cache_shared else None,
+)
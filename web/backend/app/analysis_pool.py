@@ -0,0 +1,134 @@
+"""
+Process pool for ForensicEngine runs triggered by API requests.
+
+The engine is pandas-heavy and holds the GIL for most of a run, so running it
+on Starlette's thread pool slows every other endpoint in the same worker. The
+pool moves runs into separate processes, which import pandas and build an
+engine once at startup ("warm" workers). The request thread only waits on the
+result.
+
+Admission is bounded: at most ANALYSIS_WORKERS runs execute and
+ANALYSIS_QUEUE_SIZE more wait; past that, `AnalysisPoolFull` is raised and the
+API answers 503 with Retry-After. ANALYSIS_WORKERS=0 disables the pool and runs
+the engine in the calling thread, as before.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+
+from .forensic_engine import ForensicEngine
+from .rules_catalog import rules_catalog
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+RETRY_AFTER_SECONDS = 5
+
+_worker_engine: Optional[ForensicEngine] = None
+
+
+class AnalysisPoolFull(RuntimeError):
+    def __init__(self, retry_after: int = RETRY_AFTER_SECONDS) -> None:
+        super().__init__("The analysis queue is full")
+        self.retry_after = retry_after
+
+
+def _warm_worker() -> None:
+    # Runs once per worker process: pay for imports and the engine up front.
+    global _worker_engine
+    _worker_engine = ForensicEngine(rules=rules_catalog)
+
+
+def _run_in_worker(method: str, transactions: Any, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    return getattr(_worker_engine, method)(transactions, **kwargs)
+
+
+def _noop() -> None:
+    return None
+
+
+class AnalysisPool:
+    """
+    Runs ForensicEngine.analyze / analyze_columns in worker processes.
+
+    Exposes the same two methods as the engine, so it can be handed to
+    AnalysisCache.analyze in its place. Both block the calling thread (without
+    holding the GIL) until the result is back.
+    """
+
+    def __init__(self, workers: int, queue_size: int, engine: Optional[ForensicEngine] = None) -> None:
+        self.workers = workers
+        self.queue_size = queue_size
+        self.engine = engine or ForensicEngine(rules=rules_catalog)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._admitted = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_size
+
+    @property
+    def rules_version(self) -> str:
+        # Workers watch the same RULES_PATH file as this process.
+        return self.engine.rules_version
+
+    def start(self) -> None:
+        if self.workers <= 0 or self._executor is not None:
+            return
+        # spawn, not fork: the API process has threads (DB pool, job worker).
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_worker,
+        )
+        # Executors start processes lazily; one no-op per worker starts them all now.
+        for _ in range(self.workers):
+            self._executor.submit(_noop)
+
+    def stop(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def analyze(self, transactions: Any, **kwargs: Any) -> Dict[str, Any]:
+        return self._run("analyze", transactions, kwargs)
+
+    def analyze_columns(self, columns: Any, **kwargs: Any) -> Dict[str, Any]:
+        return self._run("analyze_columns", columns, kwargs)
+
+    def _run(self, method: str, transactions: Any, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        executor = self._executor
+        if executor is None:
+            return getattr(self.engine, method)(transactions, **kwargs)
+
+        with self._lock:
+            if self._admitted >= self.capacity:
+                raise AnalysisPoolFull()
+            self._admitted += 1
+        try:
+            return executor.submit(_run_in_worker, method, transactions, kwargs).result()
+        except BrokenProcessPool:
+            logger.error("analysis worker died; restarting the pool")
+            self._restart(executor)
+            raise
+        finally:
+            with self._lock:
+                self._admitted -= 1
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is not broken:
+                return  # another request already restarted it
+            self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.start()
+
+
+analysis_pool = AnalysisPool(workers=settings.analysis_workers, queue_size=settings.analysis_queue_size)
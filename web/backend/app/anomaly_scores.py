@@ -0,0 +1,126 @@
+"""
+Stored per-transaction anomaly scores.
+
+A stored anomaly model (see ml_models) scores each transaction on its own
+features, so a score stays valid until the model is replaced. Scores are
+kept in anomaly_scores, keyed by Transaction.id and tagged with the model
+that produced them. An anomaly job scores only the transactions without a
+score from the current model, then answers from stored and fresh scores.
+Frequent polling therefore costs about the same as the new rows alone.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from .ml_engine import anomaly_features
+from .ml_models import AnomalyModel
+from .models_db import AnomalyScore, Transaction
+
+# Rows per INSERT when saving fresh scores.
+_INSERT_BATCH = 1000
+
+
+def detect_anomalies_incremental(db: Session, model: AnomalyModel, user_id: Any, limit: int) -> Dict[str, Any]:
+    """
+    MLEngine.detect_anomalies(..., model=model) over the user's latest `limit`
+    transactions. Transactions scored by an earlier model version are
+    rescored. Fresh scores are added to the session; the caller commits.
+    """
+    rows = (
+        db.query(
+            Transaction.id,
+            Transaction.timestamp,
+            Transaction.amount,
+            AnomalyScore.model_key,
+            AnomalyScore.model_version,
+            AnomalyScore.score,
+            AnomalyScore.is_anomaly,
+        )
+        .outerjoin(AnomalyScore, AnomalyScore.transaction_id == Transaction.id)
+        .filter(Transaction.user_id == user_id)
+        .order_by(Transaction.timestamp.desc())
+        .limit(limit)
+        .all()
+    )
+    if len(rows) < 10:
+        return {"anomalies": [], "anomaly_scores": {}, "message": "Not enough transactions for anomaly detection"}
+
+    scores = np.array([row.score if row.score is not None else np.nan for row in rows], dtype=float)
+    flagged = np.array([bool(row.is_anomaly) for row in rows])
+    fresh = [
+        i for i, row in enumerate(rows) if (row.model_key, row.model_version) != (model.key, model.version)
+    ]
+    if fresh:
+        df = pd.DataFrame(
+            {
+                "timestamp": [rows[i].timestamp for i in fresh],
+                "amount": [rows[i].amount for i in fresh],
+            }
+        )
+        X, feature_names = anomaly_features(df)
+        if tuple(feature_names) != model.features:
+            raise ValueError(f"Anomaly model {model.key} expects features {model.features}, got {feature_names}")
+        fresh_scores, fresh_flagged = model.score(X)
+        scores[fresh] = fresh_scores
+        flagged[fresh] = fresh_flagged
+        _store_scores(
+            db,
+            model,
+            user_id,
+            [rows[i].id for i in fresh],
+            fresh_scores.tolist(),
+            fresh_flagged.tolist(),
+        )
+
+    ids = [str(row.id) for row in rows]
+    anomaly_ids = [ids[i] for i in np.flatnonzero(flagged)]
+    return {
+        "anomalies": anomaly_ids,
+        "anomaly_scores": dict(zip(ids, scores.tolist())),
+        "anomaly_count": len(anomaly_ids),
+        "total_transactions": len(rows),
+        "model_version": model.version,
+        "scored_transactions": len(fresh),
+    }
+
+
+def _store_scores(
+    db: Session,
+    model: AnomalyModel,
+    user_id: Any,
+    transaction_ids: List[int],
+    scores: List[float],
+    flagged: List[bool],
+) -> None:
+    scored_at = datetime.utcnow()
+    values = [
+        {
+            "transaction_id": transaction_id,
+            "user_id": user_id,
+            "model_key": model.key,
+            "model_version": model.version,
+            "score": score,
+            "is_anomaly": is_anomaly,
+            "scored_at": scored_at,
+        }
+        for transaction_id, score, is_anomaly in zip(transaction_ids, scores, flagged)
+    ]
+    for start in range(0, len(values), _INSERT_BATCH):
+        statement = insert(AnomalyScore).values(values[start : start + _INSERT_BATCH])
+        # Another job may have scored the same rows meanwhile; the latest write wins.
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[AnomalyScore.transaction_id],
+                set_={
+                    column: statement.excluded[column]
+                    for column in ("user_id", "model_key", "model_version", "score", "is_anomaly", "scored_at")
+                },
+            )
+        )
@@ -2,27 +2,55 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import multiprocessing
 import uuid
-from datetime import datetime
-from typing import Any
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any, Callable, TypeVar
 
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from pydantic import BaseModel
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from .anomaly_scores import detect_anomalies_incremental
 from .database import SessionLocal
-from .forensic_engine import ForensicEngine
+from .feature_store import get_user_features, monthly_spend, record_transactions
+from .forensic_engine import ForensicEngine, columns_from_rows
+from .forensic_state import analyze_account
 from .ml_engine import MLEngine
+from .ml_models import COHORT_KEY, AnomalyModel
+from .model_registry import model_registry
 from .models_db import AnalysisResult, BackgroundJob, LinkedAccount, Transaction
 from .open_banking_client import OpenBankingSandboxClient, SandboxConfig
+from .rules_catalog import rules_catalog
 from .settings import settings
+from .user_clusters import cluster_users
 
 logger = logging.getLogger(__name__)
 
 JOB_OPEN_BANKING_FETCH = "open_banking.fetch_transactions"
 JOB_ML_DETECT_ANOMALIES = "ml.detect_anomalies"
 JOB_ML_PREDICT_LEAKS = "ml.predict_leaks"
+JOB_ML_TRAIN_MODELS = "ml.train_anomaly_models"
+JOB_ML_CLUSTER_USERS = "ml.cluster_users"
+
+# Rows anomaly models are trained on: a user's latest, or the platform's latest for the cohort model.
+USER_TRAINING_ROWS = 5000
+COHORT_TRAINING_ROWS = 50000
+
+T = TypeVar("T")
 
 _worker_task: asyncio.Task | None = None
+# Job bookkeeping (claiming, recording results): short DB round trips.
+_db_executor: ThreadPoolExecutor | None = None
+# Job handlers: DB queries interleaved with pandas and sklearn work, kept off
+# the API process's GIL. None with BACKGROUND_JOB_WORKERS=0.
+_job_pool: ProcessPoolExecutor | None = None
+# Periodic jobs (anomaly model training); None with ML_TRAIN_INTERVAL_HOURS=0.
+_scheduler: AsyncIOScheduler | None = None
 
 
 class JobAcceptedResponse(BaseModel):
@@ -48,99 +76,229 @@ def enqueue_background_job(
 
 
 def start_background_worker() -> None:
-    global _worker_task
+    global _worker_task, _db_executor, _job_pool, _scheduler
+    slots = _job_slots()
+    if _db_executor is None:
+        _db_executor = ThreadPoolExecutor(max_workers=slots, thread_name_prefix="background-job")
+    if _job_pool is None and settings.background_job_workers > 0:
+        _job_pool = _start_job_pool(settings.background_job_workers)
     if _worker_task is None or _worker_task.done():
-        _worker_task = asyncio.create_task(_worker_loop())
+        _worker_task = asyncio.create_task(_worker_loop(slots))
+    if _scheduler is None and settings.ml_train_interval_hours > 0:
+        _scheduler = AsyncIOScheduler(timezone="UTC")
+        _scheduler.add_job(_schedule_model_training, "interval", hours=settings.ml_train_interval_hours)
+        _scheduler.start()
 
 
 async def stop_background_worker() -> None:
-    global _worker_task
-    if _worker_task is None:
-        return
-    _worker_task.cancel()
+    global _worker_task, _db_executor, _job_pool, _scheduler
+    if _scheduler is not None:
+        _scheduler.shutdown(wait=False)
+        _scheduler = None
+    if _worker_task is not None:
+        _worker_task.cancel()
+        try:
+            await _worker_task
+        except asyncio.CancelledError:
+            pass
+        _worker_task = None
+    # The loop has put its interrupted jobs back to "pending" for the next start; a job
+    # still inside a worker process runs on there but its outcome is no longer recorded.
+    for executor in (_job_pool, _db_executor):
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    _job_pool = _db_executor = None
+
+
+async def _schedule_model_training() -> None:
+    # Every API process schedules this; queue_model_training skips duplicates.
     try:
-        await _worker_task
-    except asyncio.CancelledError:
-        pass
-    _worker_task = None
+        await _run_sync(queue_model_training)
+    except Exception:
+        logger.exception("scheduling anomaly model training failed")
 
 
-async def _worker_loop() -> None:
-    while True:
-        try:
-            did_work = await _run_next_job()
-            await asyncio.sleep(0 if did_work else 2)
-        except asyncio.CancelledError:
-            raise
-        except Exception:
-            logger.exception("background worker loop failed")
-            await asyncio.sleep(5)
+def _job_slots() -> int:
+    """Jobs run at once: one per worker process, or one on the job thread."""
+    return max(settings.background_job_workers, 1)
 
 
-async def _run_next_job() -> bool:
-    db = SessionLocal()
-    try:
-        job = (
-            db.query(BackgroundJob)
-            .filter(BackgroundJob.status == "pending")
-            .order_by(BackgroundJob.created_at.asc())
-            .first()
-        )
-        if not job:
-            return False
+def _start_job_pool(workers: int) -> ProcessPoolExecutor:
+    # spawn, not fork: the API process has threads (DB pool, event loop).
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    # Executors start processes lazily; one no-op per worker pays for the imports now.
+    for _ in range(workers):
+        pool.submit(_noop)
+    return pool
 
-        job.status = "running"
-        job.started_at = datetime.utcnow()
-        job_pk = job.id
-        db.commit()
 
-        try:
-            result = await _perform_job(db, job)
-            job.status = "succeeded"
-            job.result = result
-            job.error = None
-        except Exception as exc:
-            db.rollback()
-            job = db.query(BackgroundJob).filter(BackgroundJob.id == job_pk).first()
-            if job is None:
+def _noop() -> None:
+    return None
+
+
+async def _worker_loop(slots: int) -> None:
+    # Running job tasks -> the primary key of the job each one holds.
+    running: dict[asyncio.Task, int] = {}
+    free = asyncio.Semaphore(slots)
+    try:
+        # Jobs left "running" by a process that died never finish on their own.
+        await _run_sync(_reclaim_expired_jobs)
+    except Exception:
+        logger.exception("reclaiming expired background jobs failed")
+    try:
+        while True:
+            await free.acquire()
+            try:
+                job = await _run_sync(_claim_next_job)
+            except asyncio.CancelledError:
                 raise
-            job.status = "failed"
-            job.error = str(exc)
-            logger.exception(
-                "background job failed",
-                extra={"job_id": job.job_id, "job_type": job.job_type},
-            )
-        finally:
-            if job is not None:
-                job.finished_at = datetime.utcnow()
-                db.commit()
-        return True
+            except Exception:
+                free.release()
+                logger.exception("background worker loop failed")
+                await asyncio.sleep(5)
+                continue
+            if job is None:
+                free.release()
+                await asyncio.sleep(2)
+                continue
+            task = asyncio.create_task(_run_job(job))
+            running[task] = job.id
+            task.add_done_callback(lambda done: running.pop(done, None))
+            task.add_done_callback(lambda _task: free.release())
+    finally:
+        # Shutdown: interrupted jobs go back to the queue instead of staying "running".
+        interrupted = list(running.values())
+        for task in list(running):
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        if interrupted:
+            await _run_sync(_requeue_jobs, interrupted)
+
+
+async def _run_sync(handler: Callable[..., T], *args: Any) -> T:
+    """
+    Run `handler(db, *args)` on a job thread with its own session,
+    committed if the handler returns. The event loop stays free meanwhile.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, partial(_with_session, handler, *args))
+
+
+async def _run_in_worker(handler: Callable[..., T], job: BackgroundJob, *args: Any) -> T:
+    """
+    Run `handler(db, job, *args)` in a worker process with its own session,
+    committed if the handler returns. Handlers must be module-level functions
+    and their arguments picklable. Without worker processes this is _run_sync.
+    """
+    pool = _job_pool
+    if pool is None:
+        return await _run_sync(handler, job, *args)
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(pool, partial(_with_session, handler, job, *args))
+    except BrokenProcessPool:
+        logger.error("background job worker died; restarting the pool")
+        _restart_job_pool(pool)
+        raise
+
+
+def _restart_job_pool(broken: ProcessPoolExecutor) -> None:
+    global _job_pool
+    if _job_pool is not broken:
+        return  # another job already restarted it
+    broken.shutdown(wait=False, cancel_futures=True)
+    _job_pool = _start_job_pool(settings.background_job_workers)
+
+
+def _with_session(handler: Callable[..., T], *args: Any) -> T:
+    db = SessionLocal()
+    try:
+        result = handler(db, *args)
+        db.commit()
+        return result
     finally:
         db.close()
 
 
-async def _perform_job(db: Session, job: BackgroundJob) -> dict[str, Any]:
+async def _run_job(job: BackgroundJob) -> None:
+    try:
+        result = await _perform_job(job)
+        status, error = "succeeded", None
+    except Exception as exc:
+        result, status, error = None, "failed", str(exc)
+        logger.exception(
+            "background job failed",
+            extra={"job_id": job.job_id, "job_type": job.job_type},
+        )
+    await _run_sync(_finish_job, job.id, status, result, error)
+
+
+def _claim_next_job(db: Session) -> BackgroundJob | None:
+    # SKIP LOCKED: concurrent claims (other slots, other API processes) each get a different job.
+    job = (
+        db.query(BackgroundJob)
+        .filter(BackgroundJob.status == "pending")
+        .order_by(BackgroundJob.created_at.asc())
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if not job:
+        return None
+    job.status = "running"
+    job.started_at = datetime.utcnow()
+    db.commit()
+    # Handlers run in sessions (and processes) of their own: hand them a loaded, detached copy.
+    db.refresh(job)
+    db.expunge(job)
+    return job
+
+
+def _requeue_jobs(db: Session, job_pks: list[int]) -> None:
+    # Only jobs still running: one that finished meanwhile keeps its outcome.
+    db.query(BackgroundJob).filter(BackgroundJob.id.in_(job_pks), BackgroundJob.status == "running").update(
+        {BackgroundJob.status: "pending", BackgroundJob.started_at: None}, synchronize_session=False
+    )
+
+
+def _reclaim_expired_jobs(db: Session) -> None:
+    """Requeue jobs running for longer than the lease (BACKGROUND_JOB_LEASE_MINUTES)."""
+    expired = datetime.utcnow() - timedelta(minutes=settings.background_job_lease_minutes)
+    reclaimed = (
+        db.query(BackgroundJob)
+        .filter(BackgroundJob.status == "running", BackgroundJob.started_at < expired)
+        .update({BackgroundJob.status: "pending", BackgroundJob.started_at: None}, synchronize_session=False)
+    )
+    if reclaimed:
+        logger.warning("requeued expired background jobs", extra={"jobs": reclaimed})
+
+
+def _finish_job(db: Session, job_pk: int, status: str, result: dict[str, Any] | None, error: str | None) -> None:
+    job = db.get(BackgroundJob, job_pk)
+    if job is None:
+        return
+    job.status = status
+    job.result = result
+    job.error = error
+    job.finished_at = datetime.utcnow()
+
+
+async def _perform_job(job: BackgroundJob) -> dict[str, Any]:
+    # Everything but job bookkeeping and the Open Banking network calls runs in a worker process.
     if job.job_type == JOB_OPEN_BANKING_FETCH:
-        return await _run_open_banking_fetch(db, job)
+        return await _run_open_banking_fetch(job)
     if job.job_type == JOB_ML_DETECT_ANOMALIES:
-        return _run_ml_detect_anomalies(db, job)
+        return await _run_in_worker(_run_ml_detect_anomalies, job)
     if job.job_type == JOB_ML_PREDICT_LEAKS:
-        return _run_ml_predict_leaks(db, job)
+        return await _run_in_worker(_run_ml_predict_leaks, job)
+    if job.job_type == JOB_ML_TRAIN_MODELS:
+        return await _run_in_worker(_run_ml_train_models, job)
+    if job.job_type == JOB_ML_CLUSTER_USERS:
+        return await _run_in_worker(_run_ml_cluster_users, job)
     raise ValueError(f"Unsupported job type: {job.job_type}")
 
 
-async def _run_open_banking_fetch(db: Session, job: BackgroundJob) -> dict[str, Any]:
-    account_id = int((job.payload or {}).get("account_id"))
-    account = (
-        db.query(LinkedAccount)
-        .filter(LinkedAccount.id == account_id, LinkedAccount.user_id == job.user_id)
-        .first()
-    )
-    if not account:
-        raise ValueError("Account not found")
-    if not account.open_banking_consent_id:
-        raise ValueError("Account not linked via Open Banking")
-
+async def _run_open_banking_fetch(job: BackgroundJob) -> dict[str, Any]:
+    consent_id = await _run_sync(_open_banking_consent_id, job)
     ob_client = OpenBankingSandboxClient(
         SandboxConfig(
             base_url=settings.open_banking_base_url,
@@ -148,10 +306,9 @@ async def _run_open_banking_fetch(db: Session, job: BackgroundJob) -> dict[str,
             client_secret=settings.open_banking_client_secret,
         )
     )
-    forensic_engine = ForensicEngine()
 
     token_response = await ob_client.token_client_credentials(
-        consent_id=account.open_banking_consent_id,
+        consent_id=consent_id,
         scope="accounts.read transactions.read",
     )
     access_token = token_response.get("access_token")
@@ -170,7 +327,35 @@ async def _run_open_banking_fetch(db: Session, job: BackgroundJob) -> dict[str,
         )
         raw_txs.extend(tx_response.get("Data", {}).get("Transaction", []))
 
-    new_tx_count = 0
+    return await _run_in_worker(_store_open_banking_fetch, job, raw_txs)
+
+
+def _open_banking_account(db: Session, job: BackgroundJob) -> LinkedAccount:
+    account_id = int((job.payload or {}).get("account_id"))
+    account = (
+        db.query(LinkedAccount)
+        .filter(LinkedAccount.id == account_id, LinkedAccount.user_id == job.user_id)
+        .first()
+    )
+    if not account:
+        raise ValueError("Account not found")
+    if not account.open_banking_consent_id:
+        raise ValueError("Account not linked via Open Banking")
+    return account
+
+
+def _open_banking_consent_id(db: Session, job: BackgroundJob) -> str:
+    return _open_banking_account(db, job).open_banking_consent_id
+
+
+def _store_open_banking_fetch(
+    db: Session, job: BackgroundJob, raw_txs: list[dict[str, Any]]
+) -> dict[str, Any]:
+    account = _open_banking_account(db, job)
+    forensic_engine = ForensicEngine(rules=rules_catalog)
+
+    inserted: list[Transaction] = []
+    new_tx_dicts: list[dict[str, Any]] = []
     tx_dicts_for_analysis: list[dict[str, Any]] = []
     for rt in raw_txs:
         ext_id = rt.get("TransactionId")
@@ -180,11 +365,21 @@ async def _run_open_banking_fetch(db: Session, job: BackgroundJob) -> dict[str,
         amount_data = rt.get("Amount", {})
         amount = float(amount_data.get("Amount", 0))
         booking_time = rt.get("BookingDateTime")
+        tx_dict = {
+            "id": ext_id,
+            "timestamp": booking_time,
+            "amount": amount,
+            "description": rt.get("ProprietaryBankTransactionCode", {}).get(
+                "Description", ""
+            ),
+            "merchant": rt.get("MerchantDetails", {}).get("MerchantName", ""),
+            "direction": "debit" if amount < 0 else "credit",
+        }
         existing = (
             db.query(Transaction).filter(Transaction.transaction_id == ext_id).first()
         )
         if not existing:
-            db.add(
+            inserted.append(
                 Transaction(
                     user_id=job.user_id,
                     account_id=account.id,
@@ -202,26 +397,25 @@ async def _run_open_banking_fetch(db: Session, job: BackgroundJob) -> dict[str,
                     direction="debit" if amount < 0 else "credit",
                 )
             )
-            new_tx_count += 1
+            db.add(inserted[-1])
+            new_tx_dicts.append(tx_dict)
 
-        tx_dicts_for_analysis.append(
-            {
-                "id": ext_id,
-                "timestamp": booking_time,
-                "amount": amount,
-                "description": rt.get("ProprietaryBankTransactionCode", {}).get(
-                    "Description", ""
-                ),
-                "merchant": rt.get("MerchantDetails", {}).get("MerchantName", ""),
-                "direction": "debit" if amount < 0 else "credit",
-            }
-        )
+        tx_dicts_for_analysis.append(tx_dict)
 
+    record_transactions(db, job.user_id, [(t.timestamp, t.amount, t.merchant) for t in inserted])
     db.commit()
 
     health_score = None
     if tx_dicts_for_analysis:
-        analysis = forensic_engine.analyze(tx_dicts_for_analysis)
+        # Folds only the new rows into the account's stored forensic state.
+        analysis = analyze_account(
+            db,
+            forensic_engine,
+            account,
+            tx_dicts_for_analysis,
+            new_tx_dicts,
+            evidence="summary",
+        )
         health_score = analysis["financial_health_score"]
         analysis_leaks = list(analysis["money_leaks"])
         analysis_leaks.append(
@@ -250,79 +444,137 @@ async def _run_open_banking_fetch(db: Session, job: BackgroundJob) -> dict[str,
     db.commit()
 
     return {
-        "account_id": account_id,
-        "new_transactions": new_tx_count,
+        "account_id": account.id,
+        "new_transactions": len(new_tx_dicts),
         "total_monitored": len(tx_dicts_for_analysis),
         "health_score": health_score,
     }
 
 
+_ANOMALY_COLUMNS = (
+    "id",
+    "timestamp",
+    "amount",
+    "description",
+    "merchant",
+    "category",
+    "direction",
+)
+
+
+def _anomaly_columns(db: Session, user_id: Any, limit: int) -> dict[str, Any]:
+    """The latest `limit` transactions of a user (all users if None), as columns."""
+    # Select columns only: the tuples are transposed into columns without ORM objects or dicts.
+    query = db.query(
+        Transaction.id,
+        Transaction.timestamp,
+        Transaction.amount,
+        Transaction.description,
+        Transaction.merchant,
+        Transaction.category,
+        Transaction.direction,
+    )
+    if user_id is not None:
+        query = query.filter(Transaction.user_id == user_id)
+    rows = query.order_by(Transaction.timestamp.desc()).limit(limit).all()
+    return columns_from_rows(rows, _ANOMALY_COLUMNS)
+
+
+def _user_model_key(user_id: Any) -> str:
+    return f"user-{user_id}"
+
+
+def _anomaly_model(db: Session, user_id: Any) -> AnomalyModel | None:
+    """
+    The stored model to score a user's transactions with: the user's own once
+    trained, else the cohort model. Never trains inline: a missing or stale
+    model queues a training job and the current one (if any) is used
+    meanwhile. None leaves detect_anomalies to fit on the scored rows.
+    """
+    model = model_registry.current(_user_model_key(user_id))
+    if model is not None:
+        if model_registry.is_stale(model):
+            queue_model_training(db)
+        return model
+    history_rows = (
+        db.query(func.count(Transaction.id))
+        .filter(Transaction.user_id == user_id)
+        .scalar()
+    )
+    cohort = model_registry.current(COHORT_KEY)
+    if history_rows >= settings.ml_user_model_min_rows or model_registry.is_stale(cohort):
+        queue_model_training(db)
+    return cohort
+
+
+def queue_model_training(db: Session) -> BackgroundJob | None:
+    """Enqueue an ml.train_anomaly_models job unless one is already pending or running."""
+    queued = (
+        db.query(BackgroundJob.id)
+        .filter(BackgroundJob.job_type == JOB_ML_TRAIN_MODELS, BackgroundJob.status.in_(("pending", "running")))
+        .first()
+    )
+    if queued is not None:
+        return None
+    return enqueue_background_job(db, JOB_ML_TRAIN_MODELS, None, {})
+
+
 def _run_ml_detect_anomalies(db: Session, job: BackgroundJob) -> dict[str, Any]:
     limit = int((job.payload or {}).get("limit", 1000))
-    transactions = (
-        db.query(Transaction)
-        .filter(Transaction.user_id == job.user_id)
-        .order_by(Transaction.timestamp.desc())
-        .limit(limit)
-        .all()
-    )
-    if not transactions:
+    engine = MLEngine()
+    model = _anomaly_model(db, job.user_id)
+    if model is not None:
+        # Scores only rows without a score from this model; the rest are read back.
+        # The fresh scores are committed when the handler returns (see _with_session).
+        return detect_anomalies_incremental(db, model, job.user_id, limit)
+
+    columns = _anomaly_columns(db, job.user_id, limit)
+    if not len(columns["id"]):
         return {
             "anomalies": [],
             "anomaly_scores": {},
             "anomaly_count": 0,
             "total_transactions": 0,
         }
-
-    txn_dicts = [
-        {
-            "id": t.id,
-            "timestamp": t.timestamp.isoformat(),
-            "amount": t.amount,
-            "description": t.description,
-            "merchant": t.merchant,
-            "category": t.category,
-            "direction": t.direction,
-        }
-        for t in transactions
-    ]
-    return MLEngine().detect_anomalies(txn_dicts)
-
-
-def _run_ml_predict_leaks(db: Session, job: BackgroundJob) -> dict[str, Any]:
-    transactions = (
-        db.query(Transaction)
-        .filter(Transaction.user_id == job.user_id)
-        .order_by(Transaction.timestamp.desc())
-        .limit(500)
+    return engine.detect_anomalies(columns)
+
+
+def _run_ml_train_models(db: Session, job: BackgroundJob) -> dict[str, Any]:
+    """Retrain the cohort model and every user model that is missing or stale."""
+    engine = MLEngine()
+    trained: dict[str, str] = {}
+    platform = _anomaly_columns(db, None, COHORT_TRAINING_ROWS)
+    model = engine.train_anomaly_model(model_registry, COHORT_KEY, platform)
+    if model is not None:
+        trained[COHORT_KEY] = model.version
+
+    user_ids = (
+        db.query(Transaction.user_id)
+        .group_by(Transaction.user_id)
+        .having(func.count(Transaction.id) >= settings.ml_user_model_min_rows)
         .all()
     )
-    if not transactions:
-        return {"predicted_leaks": [], "confidence": 0.0}
+    for (user_id,) in user_ids:
+        key = _user_model_key(user_id)
+        if not model_registry.is_stale(model_registry.current(key)):
+            continue
+        history = _anomaly_columns(db, user_id, USER_TRAINING_ROWS)
+        model = engine.train_anomaly_model(model_registry, key, history)
+        if model is not None:
+            trained[key] = model.version
+    return {"trained": trained, "trained_count": len(trained)}
 
-    txn_dicts = [
-        {
-            "id": t.id,
-            "timestamp": t.timestamp.isoformat(),
-            "amount": t.amount,
-            "description": t.description,
-        }
-        for t in transactions
-    ]
-    analyses = (
-        db.query(AnalysisResult)
-        .filter(AnalysisResult.user_id == job.user_id)
-        .order_by(AnalysisResult.created_at.desc())
-        .limit(10)
-        .all()
-    )
 
-    historical_leaks: list[dict[str, Any]] = []
-    for analysis in analyses:
-        if analysis.money_leaks:
-            historical_leaks.extend(analysis.money_leaks)
+def _run_ml_cluster_users(db: Session, job: BackgroundJob) -> dict[str, Any]:
+    return cluster_users(db)
 
-    return MLEngine().predict_future_leaks(txn_dicts, historical_leaks)
+
+def _run_ml_predict_leaks(db: Session, job: BackgroundJob) -> dict[str, Any]:
+    # Monthly spend comes precomputed from the feature store rather than a transaction reload.
+    features = get_user_features(db, job.user_id)
+    if features is None or features.transaction_count < 10:
+        return {"predicted_leaks": [], "confidence": 0.0}
+    return MLEngine().predict_leaks_from_monthly(monthly_spend(features))
 
 
 def _extract_account_ids(accounts_response: dict[str, Any]) -> list[str]:
@@ -1,78 +1,44 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
-
+import numpy as np
 import pandas as pd
 
-from .models import Leak
+from .evidence import isoformats
+from .frame import AnalysisFrame
+from .grouped import Groups, at_least
+from .models import Leak, LeakBatch, Leaks
 
 
-def detect_debit_orders(df: pd.DataFrame) -> List[Leak]:
+def detect_debit_orders(frame: AnalysisFrame) -> Leaks:
     """
     Debit Order Analysis:
     Flag high-value or frequent debit orders that might be problematic.
     """
-    if df.empty:
-        return []
-
-    debit_order_keywords = [
-        "debit order",
-        "debitorder",
-        "debit",
-        "stop order",
-        "recurring",
-        "deduction",
-        "auto debit",
-    ]
-
-    text = (df["description"].fillna("") + " " + df["merchant"].fillna("") + " " + df["category"].fillna("")).str.lower()
-    is_debit_order = text.apply(lambda s: any(k in s for k in debit_order_keywords))
-
-    debit_orders = df[is_debit_order & (df["direction"] == "debit") & (df["abs_amount"] > 0)].copy()
-    if debit_orders.empty:
+    if frame.empty:
         return []
 
-    now = pd.Timestamp.now(tz="UTC") if not df["timestamp"].empty else pd.Timestamp.now(tz="UTC")
-    last_30 = debit_orders[debit_orders["timestamp"] >= (now - pd.Timedelta(days=30))]
-
-    if last_30.empty:
+    limits = frame.thresholds("debit_orders")
+    totals = frame.windows.family("debit_order", 30)
+    if not totals.count:
         return []
 
-    monthly_cost = float(last_30["abs_amount"].sum())
-    count = len(last_30)
+    monthly_cost = totals.total
+    count = totals.count
+    df = frame.df
+    last_30 = df[frame.matches("debit_order") & df["is_debit"] & (df["abs_amount"] > 0) & df["in_last_30d"]]
 
     # Group by merchant/amount to find recurring patterns
-    leaks = []
+    leaks: Leaks = []
 
     # Check for high-value single debit orders
-    high_value = last_30[last_30["abs_amount"] >= 500]
+    high_value = last_30[last_30["abs_amount"] >= limits["high_value_amount"]]
     if not high_value.empty:
-        for _, row in high_value.iterrows():
-            leaks.append(
-                Leak(
-                    id=f"debit-order-high-{row['id']}",
-                    detector="DebitOrders",
-                    title=f"High-value debit order: R{row['abs_amount']:.0f}",
-                    plain_language_reason=(
-                        f"A debit order of R{row['abs_amount']:.0f} was processed. "
-                        f"Make sure this is expected and authorized."
-                    ),
-                    severity="high",
-                    transaction_id=str(row["id"]),
-                    estimated_monthly_cost=float(row["abs_amount"]),
-                    evidence={
-                        "amount": float(row["abs_amount"]),
-                        "merchant": str(row.get("merchant", "")),
-                        "description": str(row.get("description", "")),
-                        "date": row["timestamp"].isoformat(),
-                    },
-                )
-            )
+        leaks.append(_high_value_leaks(high_value))
 
     # Check for frequent small debit orders (potential scam)
-    if count >= 5 and monthly_cost >= 200:
-        severity = "high" if monthly_cost >= 500 else "medium"
-        top_merchant = last_30.groupby("merchant")["abs_amount"].sum().sort_values(ascending=False)
+    if count >= limits["frequent_count"] and monthly_cost >= limits["frequent_monthly_cost"]:
+        severity = "high" if monthly_cost >= limits["high_monthly_cost"] else "medium"
+        top_merchant = last_30.groupby("merchant", observed=True)["abs_amount"].sum().sort_values(ascending=False)
         top_merchant_name = top_merchant.index[0] if not top_merchant.empty else "Various"
 
         leaks.append(
@@ -90,10 +56,45 @@ def detect_debit_orders(df: pd.DataFrame) -> List[Leak]:
                 evidence={
                     "count_last_30_days": count,
                     "sum_last_30_days": monthly_cost,
-                    "top_merchants": top_merchant.head(5).to_dict(),
+                    "top_merchants": top_merchant.head(limits["top_merchants_size"]).to_dict(),
                 },
             )
         )
 
     return leaks
 
+
+def _high_value_leaks(rows: pd.DataFrame) -> LeakBatch:
+    """One high-severity leak per row, built column-wise."""
+    ids = [str(value) for value in rows["id"].tolist()]
+    amounts = rows["abs_amount"].astype("float64").tolist()
+    return LeakBatch(
+        id=[f"debit-order-high-{value}" for value in ids],
+        detector=["DebitOrders"] * len(ids),
+        title=[f"High-value debit order: R{amount:.0f}" for amount in amounts],
+        plain_language_reason=[
+            f"A debit order of R{amount:.0f} was processed. Make sure this is expected and authorized."
+            for amount in amounts
+        ],
+        severity=["high"] * len(ids),
+        transaction_id=ids,
+        estimated_monthly_cost=amounts,
+        evidence={
+            "amount": amounts,
+            "merchant": [str(value) for value in rows["merchant"].tolist()],
+            "description": [str(value) for value in rows["description"].tolist()],
+            "date": isoformats(rows["timestamp"]),
+        },
+    )
+
+
+def screen_debit_orders(frame: AnalysisFrame, groups: Groups) -> np.ndarray:
+    """Groups detect_debit_orders may report on (same thresholds)."""
+    limits = frame.thresholds("debit_orders")
+    df = frame.df
+    last_30 = frame.matches("debit_order") & df["is_debit"] & (df["abs_amount"] > 0) & df["in_last_30d"]
+    high_value = groups.rows(last_30 & (df["abs_amount"] >= limits["high_value_amount"]))
+    frequent = (groups.rows(last_30) >= limits["frequent_count"]) & at_least(
+        groups.total(last_30, df["abs_amount"]), limits["frequent_monthly_cost"]
+    )
+    return (high_value > 0) | frequent
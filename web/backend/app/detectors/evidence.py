@@ -0,0 +1,114 @@
+"""
+Evidence levels and deferred evidence values.
+
+Detectors attach bulky evidence (the "sample" rows) as a Deferred, which is
+only built when a result asks for evidence="full":
+
+- "none": leaks carry no evidence
+- "summary": evidence without deferred values (counts, sums, top merchants)
+- "full": everything, samples included
+
+Samples are the latest rows of a candidate set, picked by partial selection
+(no sort over all candidates) and converted to plain Python values, with
+timestamps as ISO 8601 strings.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+EVIDENCE_LEVELS = ("none", "summary", "full")
+
+
+class Deferred:
+    """An evidence value computed only when the result includes it."""
+
+    __slots__ = ("build",)
+
+    def __init__(self, build: Callable[[], Any]) -> None:
+        # A module-level function or partial, so leaks stay picklable for process workers.
+        self.build = build
+
+    def __call__(self) -> Any:
+        return self.build()
+
+
+def check_evidence(evidence: str) -> None:
+    if evidence not in EVIDENCE_LEVELS:
+        raise ValueError(f"Unknown evidence level: {evidence}")
+
+
+def materialize(evidence: Optional[Dict[str, Any]], level: str) -> Dict[str, Any]:
+    """A leak's evidence at `level`, with deferred values built or dropped."""
+    if not evidence or level == "none":
+        return {}
+    if level == "summary":
+        return {name: value for name, value in evidence.items() if not isinstance(value, Deferred)}
+    return {name: value() if isinstance(value, Deferred) else value for name, value in evidence.items()}
+
+
+def latest_positions(timestamps: pd.Series, n: int) -> np.ndarray:
+    """
+    Positions of sort_values("timestamp").tail(n), oldest first, without
+    sorting every row: undated rows sort last (so count as latest), and
+    among equal timestamps later rows win, as with a stable sort.
+    """
+    if n <= 0:
+        return np.empty(0, dtype=np.int64)
+    missing = timestamps.isna().to_numpy()
+    undated = np.flatnonzero(missing)
+    if len(undated) >= n:
+        return undated[len(undated) - n :]
+    dated = np.flatnonzero(~missing)
+    values = timestamps.to_numpy(dtype="datetime64[ns]")[dated].view("int64")
+    k = n - len(undated)
+    if len(values) > k:
+        cut = np.partition(values, len(values) - k)[len(values) - k]
+        above = np.flatnonzero(values > cut)
+        at_cut = np.flatnonzero(values == cut)
+        chosen = np.concatenate((above, at_cut[len(at_cut) - (k - len(above)) :]))
+    else:
+        chosen = np.arange(len(values))
+    chosen = chosen[np.lexsort((chosen, values[chosen]))]
+    return np.concatenate((dated[chosen], undated))
+
+
+def isoformats(timestamps: pd.Series) -> List[Optional[str]]:
+    """Timestamp.isoformat() of each value (None if missing), formatted in bulk for UTC series."""
+    if not isinstance(timestamps.dtype, pd.DatetimeTZDtype) or str(timestamps.dt.tz) != "UTC":
+        return [None if pd.isna(ts) else ts.isoformat() for ts in timestamps]
+    values = timestamps.to_numpy(dtype="datetime64[ns]")
+    formatted = [text + "+00:00" for text in np.datetime_as_string(values, unit="s").tolist()]
+    # Sub-second and missing values are rare; format those one by one.
+    for position in np.flatnonzero(np.isnat(values) | (values.view("int64") % 1_000_000_000 != 0)):
+        ts = timestamps.iloc[position]
+        formatted[position] = None if pd.isna(ts) else ts.isoformat()
+    return formatted
+
+
+def records(rows: pd.DataFrame, columns: Sequence[str]) -> List[Dict[str, Any]]:
+    """`rows[columns]` as plain dicts: Python scalars, timestamps as ISO strings (None if missing)."""
+    values = {}
+    for column in columns:
+        if column == "timestamp":
+            values[column] = isoformats(rows[column])
+        else:
+            values[column] = rows[column].tolist()
+    return [dict(zip(columns, row)) for row in zip(*(values[column] for column in columns))]
+
+
+def latest_records(
+    rows: pd.DataFrame, n: int, columns: Sequence[str], older: Optional[List[Dict[str, Any]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    The latest `n` rows as records(); `older` rows (e.g. carried by
+    incremental analysis) fill up the sample when `rows` has fewer than `n`.
+    """
+    sample = rows.iloc[latest_positions(rows["timestamp"], n)][list(columns)]
+    if older and len(sample) < n:
+        sample = pd.concat([pd.DataFrame(older, columns=list(columns)), sample], ignore_index=True)
+        sample = sample.iloc[latest_positions(sample["timestamp"], n)]
+    return records(sample, columns)
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from .rules import Rules, default_rules
+from .windows import WindowedAggregates
+
+
+@dataclass(frozen=True)
+class FrameHistory:
+    """
+    All-time aggregates for transactions that are no longer in the frame.
+
+    Incremental analysis keeps only a recent window of rows; the few detector
+    inputs that depend on the whole history are carried here instead:
+
+    - row_count: number of older rows
+    - mno_seen: whether any older row matched the "mno" keyword family
+    - candidates: detector name -> (count, sum of abs_amount) of older candidates
+    - samples: detector name -> the latest older candidate rows (evidence samples)
+    - subscription_groups: per-merchant recurrence counters
+    - mailbox_hit: the first Mailbox Effect leak seen, as leak fields
+    """
+
+    row_count: int = 0
+    mno_seen: bool = False
+    candidates: Dict[str, Tuple[int, float]] = field(default_factory=dict)
+    samples: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    subscription_groups: Optional[pd.DataFrame] = None
+    mailbox_hit: Optional[Dict[str, Any]] = None
+
+
+@dataclass(frozen=True)
+class AnalysisFrame:
+    """
+    Enriched transaction frame produced once by ForensicEngine.ingest.
+
+    Besides the normalized transaction columns, `df` carries the shared
+    features every detector reads instead of rebuilding them:
+
+    - text: lowercased "description merchant category"
+    - keyword_mask: keyword family bits (see keyword_index), tagged with
+      `rules`, the catalog the frame was built with
+    - is_debit, in_last_30d / in_last_60d / in_last_90d, day_of_week
+    - direction / channel as categoricals (with ForensicEngine(lean=True),
+      the text columns are compact too: see forensic_engine._lean_dtypes)
+
+    Counts and sums per keyword family, direction, merchant and month over
+    the 7/30/90-day windows are shared through `windows` (see
+    WindowedAggregates); prefer them to re-filtering the frame for totals.
+
+    Detectors must treat the frame as read-only: filter it, never add columns
+    or assign into it. `history` is only set for incremental analysis.
+    Detectors read their thresholds from `rules` (see thresholds()).
+    """
+
+    df: pd.DataFrame
+    as_of: pd.Timestamp
+    history: Optional[FrameHistory] = None
+    rules: Rules = field(default_factory=default_rules)
+
+    @property
+    def empty(self) -> bool:
+        return self.df.empty
+
+    @property
+    def row_count(self) -> int:
+        """Transactions covered by the analysis, including rows folded into history."""
+        return len(self.df) + (self.history.row_count if self.history is not None else 0)
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def matches(self, family: str) -> pd.Series:
+        return self.rules.keyword_index.matches(self.df, family)
+
+    def thresholds(self, detector: str) -> Dict[str, Union[int, float]]:
+        return self.rules.thresholds[detector]
+
+    @cached_property
+    def windows(self) -> WindowedAggregates:
+        return WindowedAggregates(self)
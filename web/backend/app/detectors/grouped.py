@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, List
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class Groups:
+    """
+    Row -> group mapping for multi-user analysis (ForensicEngine.analyze_many).
+
+    `codes[i]` is the group of row i of the frame (-1 for rows without a key)
+    and `keys[g]` the key value of group g, in first-seen order. Per-group
+    counts and sums are single bincount passes over the whole frame, which is
+    what detector screens (DetectorSpec.screen) are built from.
+    """
+
+    codes: np.ndarray
+    keys: List[Any]
+
+    @classmethod
+    def of(cls, values: pd.Series) -> "Groups":
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        return cls(codes=codes.astype(np.int64), keys=uniques.tolist())
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def positions(self) -> List[np.ndarray]:
+        """Row positions of each group, in frame order."""
+        if not self.keys:
+            return []
+        keyed = np.flatnonzero(self.codes >= 0)
+        order = keyed[np.argsort(self.codes[keyed], kind="stable")]
+        return np.split(order, np.cumsum(self.rows(np.ones(len(self.codes), dtype=bool)))[:-1])
+
+    def rows(self, mask: Any) -> np.ndarray:
+        """Number of rows per group where `mask` holds."""
+        mask = np.asarray(mask, dtype=bool) & (self.codes >= 0)
+        return np.bincount(self.codes[mask], minlength=len(self.keys))
+
+    def total(self, mask: Any, values: pd.Series) -> np.ndarray:
+        """Sum of `values` per group over rows where `mask` holds."""
+        mask = np.asarray(mask, dtype=bool) & (self.codes >= 0)
+        weights = values.to_numpy(dtype="float64")[mask]
+        return np.bincount(self.codes[mask], weights=weights, minlength=len(self.keys))
+
+
+def at_least(values: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    values >= threshold, with slack for summation order.
+
+    Screens sum in a different order than the detectors, so a group sitting
+    exactly on a threshold may differ in the last bits; screens must never
+    drop a group the detector would report, so they err on the side of running it.
+    """
+    return values >= threshold - 1e-9 * np.maximum(np.abs(values), 1.0)
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Pattern, Tuple
+
+import numpy as np
+import pandas as pd
+
+# The default text source: lowercased, space-joined description, merchant and
+# category. Keyword families (see rules.py) may match other columns.
+TEXT_COLUMNS = ("description", "merchant", "category")
+
+
+@dataclass(frozen=True)
+class KeywordFamily:
+    name: str
+    keywords: Tuple[str, ...]
+    columns: Tuple[str, ...] = TEXT_COLUMNS
+
+
+def factorize_text(df: pd.DataFrame, columns: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (codes, uniques) for the lowercased, space-joined `columns` of each row.
+
+    Rows are grouped by their combination of column values first, so each
+    distinct text is built once instead of once per row; `uniques[codes]`
+    gives the per-row text.
+    """
+    values = [df[col].astype(str).to_numpy() for col in columns]
+    key = np.zeros(len(df), dtype=np.int64)
+    for column in values:
+        codes, uniques = pd.factorize(column)
+        key, _ = pd.factorize(key * len(uniques) + codes)
+    _, first = np.unique(key, return_index=True)
+    texts = np.array(
+        [" ".join(parts).lower() for parts in zip(*(column[first] for column in values))],
+        dtype=object,
+    )
+    return key, texts
+
+
+class KeywordIndex:
+    """
+    Compiles every detector keyword list into one lookahead regex per text
+    source and tags each row with a bitmask of the keyword families it matches.
+
+    Detectors then select rows with integer mask tests instead of re-scanning
+    strings once per keyword.
+    """
+
+    def __init__(self, families: Iterable[KeywordFamily]):
+        self.families = tuple(families)
+        if len(self.families) > 63:
+            raise ValueError("KeywordIndex supports at most 63 keyword families")
+        self.bits: Dict[str, int] = {family.name: 1 << i for i, family in enumerate(self.families)}
+        self._sources: List[Tuple[Tuple[str, ...], Pattern[str], Dict[str, int]]] = []
+
+        for columns in dict.fromkeys(family.columns for family in self.families):
+            keyword_bits: Dict[str, int] = {}
+            for family in self.families:
+                if family.columns != columns:
+                    continue
+                for keyword in family.keywords:
+                    keyword = keyword.lower()
+                    keyword_bits[keyword] = keyword_bits.get(keyword, 0) | self.bits[family.name]
+
+            # The lookahead reports the longest keyword starting at each position,
+            # so a hit also implies every shorter keyword that it starts with.
+            closure = {
+                keyword: _or_all(bits for other, bits in keyword_bits.items() if keyword.startswith(other))
+                for keyword in keyword_bits
+            }
+            ordered = sorted(keyword_bits, key=len, reverse=True)
+            pattern = re.compile("(?=(" + "|".join(re.escape(k) for k in ordered) + "))")
+            self._sources.append((columns, pattern, closure))
+
+    def bit(self, name: str) -> int:
+        return self.bits[name]
+
+    def tag(
+        self, df: pd.DataFrame, texts: Optional[Mapping[Tuple[str, ...], Tuple[np.ndarray, np.ndarray]]] = None
+    ) -> pd.Series:
+        """
+        Return an int64 Series with one bit set per matched keyword family.
+
+        Strings are scanned once per distinct value, so repeated merchants and
+        descriptions cost a single regex pass. `texts` may carry precomputed
+        factorize_text() results per column tuple.
+        """
+        mask = np.zeros(len(df), dtype=np.int64)
+        if df.empty:
+            return pd.Series(mask, index=df.index, name="keyword_mask")
+
+        for columns, pattern, closure in self._sources:
+            factorized = texts.get(columns) if texts else None
+            codes, uniques = factorized if factorized is not None else factorize_text(df, columns)
+            unique_bits = np.fromiter(
+                (_or_all(closure[k] for k in pattern.findall(s)) for s in uniques),
+                dtype=np.int64,
+                count=len(uniques),
+            )
+            mask |= unique_bits[codes]
+
+        return pd.Series(mask, index=df.index, name="keyword_mask")
+
+    def tag_values(self, values: Mapping[str, str]) -> int:
+        """tag() for a single row given as column -> normalized string value."""
+        mask = 0
+        for columns, pattern, closure in self._sources:
+            text = " ".join(values[col] for col in columns).lower()
+            mask |= _or_all(closure[k] for k in pattern.findall(text))
+        return mask
+
+    def matches(self, df: pd.DataFrame, name: str) -> pd.Series:
+        """Boolean mask of rows tagged with the given keyword family."""
+        bit = self.bits[name]
+        if "keyword_mask" in df.columns:
+            return (df["keyword_mask"] & bit) != 0
+        return (self.tag(df) & bit) != 0
+
+
+def _or_all(values: Iterable[int]) -> int:
+    result = 0
+    for value in values:
+        result |= value
+    return result
+
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
 
-@dataclass
+from .evidence import materialize
+
+
+@dataclass(slots=True)
 class Leak:
     id: str
     detector: str
@@ -13,3 +16,98 @@ class Leak:
     transaction_id: str | None = None
     estimated_monthly_cost: float | None = None
     evidence: Dict[str, Any] | None = None
+
+    def to_dict(self, evidence: str = "full") -> Dict[str, Any]:
+        """The leak as returned by ForensicEngine.analyze()."""
+        return {
+            "id": self.id,
+            "detector": self.detector,
+            "title": self.title,
+            "plain_language_reason": self.plain_language_reason,
+            "severity": self.severity,
+            "transaction_id": self.transaction_id,
+            "estimated_monthly_cost": self.estimated_monthly_cost,
+            "evidence": materialize(self.evidence, evidence),
+        }
+
+
+@dataclass(slots=True)
+class LeakBatch:
+    """
+    Many leaks held column-wise: one list per Leak field, and one list per
+    evidence key. Per-row detectors (one leak per qualifying transaction)
+    build it straight from frame columns; it is only expanded into leak
+    dicts for the analyze() result.
+    """
+
+    id: List[str]
+    detector: List[str]
+    title: List[str]
+    plain_language_reason: List[str]
+    severity: List[str]
+    transaction_id: List[Optional[str]]
+    estimated_monthly_cost: List[Optional[float]]
+    evidence: Dict[str, List[Any]]
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def to_dicts(self, evidence: str = "full") -> List[Dict[str, Any]]:
+        """Leak.to_dict() for every leak in the batch."""
+        keys = list(self.evidence)
+        if evidence == "none" or not keys:
+            evidence_rows: Sequence[Dict[str, Any]] = [{} for _ in self.id]
+        else:
+            evidence_rows = [
+                materialize(dict(zip(keys, values)), evidence) for values in zip(*(self.evidence[key] for key in keys))
+            ]
+        return [
+            {
+                "id": leak_id,
+                "detector": detector,
+                "title": title,
+                "plain_language_reason": reason,
+                "severity": severity,
+                "transaction_id": transaction_id,
+                "estimated_monthly_cost": cost,
+                "evidence": leak_evidence,
+            }
+            for leak_id, detector, title, reason, severity, transaction_id, cost, leak_evidence in zip(
+                self.id,
+                self.detector,
+                self.title,
+                self.plain_language_reason,
+                self.severity,
+                self.transaction_id,
+                self.estimated_monthly_cost,
+                evidence_rows,
+            )
+        ]
+
+
+# What detectors return: single leaks and leak batches, in report order.
+Leaks = List[Union[Leak, LeakBatch]]
+
+
+def leak_count(leaks: Leaks) -> int:
+    return sum(len(leak) if isinstance(leak, LeakBatch) else 1 for leak in leaks)
+
+
+def leak_values(leaks: Leaks, field: str) -> Iterator[Any]:
+    """One Leak field of every leak in `leaks`, in order, without expanding batches."""
+    for leak in leaks:
+        if isinstance(leak, LeakBatch):
+            yield from getattr(leak, field)
+        else:
+            yield getattr(leak, field)
+
+
+def leak_dicts(leaks: Leaks, evidence: str = "full") -> List[Dict[str, Any]]:
+    """`leaks` as analyze() result dicts."""
+    dicts: List[Dict[str, Any]] = []
+    for leak in leaks:
+        if isinstance(leak, LeakBatch):
+            dicts.extend(leak.to_dicts(evidence))
+        else:
+            dicts.append(leak.to_dict(evidence))
+    return dicts
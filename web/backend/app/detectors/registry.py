@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .frame import AnalysisFrame
+from .grouped import Groups
+from .models import Leaks
+
+COST_CHEAP = "cheap"
+COST_MODERATE = "moderate"
+COST_EXPENSIVE = "expensive"
+
+# Profiles select detectors by cost class: "fast" for latency-sensitive callers
+# (mobile), "full" for background jobs and dashboards.
+PROFILES: Dict[str, frozenset[str]] = {
+    "fast": frozenset({COST_CHEAP, COST_MODERATE}),
+    "full": frozenset({COST_CHEAP, COST_MODERATE, COST_EXPENSIVE}),
+}
+
+
+@dataclass(frozen=True)
+class DetectorSpec:
+    """
+    A registered detector.
+
+    `columns` are the frame columns the detector reads. `family` and
+    `direction` describe its candidate rows, which the engine counts for
+    diagnostics without running the detector's own filters.
+
+    `screen` serves multi-user analysis: given a frame of many users and their
+    Groups, it returns one bool per group, False only where the detector
+    cannot report anything for that group. Without one, groups with no
+    candidate rows are skipped.
+    """
+
+    name: str
+    func: Callable[[AnalysisFrame], Leaks]
+    columns: Tuple[str, ...]
+    cost: str = COST_CHEAP
+    family: Optional[str] = None
+    direction: Optional[str] = "debit"
+    screen: Optional[Callable[[AnalysisFrame, Groups], np.ndarray]] = None
+
+    def candidate_rows(self, frame: AnalysisFrame) -> int:
+        if frame.empty:
+            return 0
+        mask = self._candidates(frame)
+        return int(mask.sum()) if mask is not None else len(frame.df)
+
+    def candidate_rows_by_group(self, frame: AnalysisFrame, groups: Groups) -> np.ndarray:
+        """candidate_rows() for every group of a multi-user frame."""
+        mask = self._candidates(frame) if not frame.empty else None
+        return groups.rows(mask if mask is not None else np.ones(len(frame.df), dtype=bool))
+
+    def _candidates(self, frame: AnalysisFrame):
+        df = frame.df
+        mask = frame.matches(self.family) if self.family else None
+        if self.direction:
+            by_direction = df["direction"] == self.direction
+            mask = by_direction if mask is None else mask & by_direction
+        return mask
+
+
+class DetectorRegistry:
+    """Ordered set of detectors; leaks are always reported in registration order."""
+
+    def __init__(self, specs: Iterable[DetectorSpec] = ()):
+        self._specs: Dict[str, DetectorSpec] = {}
+        for spec in specs:
+            self.register(spec)
+
+    def register(self, spec: DetectorSpec) -> None:
+        if spec.name in self._specs:
+            raise ValueError(f"Detector already registered: {spec.name}")
+        if spec.cost not in PROFILES["full"]:
+            raise ValueError(f"Unknown cost class for {spec.name}: {spec.cost}")
+        self._specs[spec.name] = spec
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._specs)
+
+    def get(self, name: str) -> DetectorSpec:
+        return self._specs[name]
+
+    def select(self, profile: str = "full", names: Optional[Iterable[str]] = None) -> List[DetectorSpec]:
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown detector profile: {profile}")
+        costs = PROFILES[profile]
+        selected = self._specs.values()
+        if names is not None:
+            wanted = set(names)
+            unknown = wanted - set(self._specs)
+            if unknown:
+                raise ValueError(f"Unknown detectors: {', '.join(sorted(unknown))}")
+            selected = [spec for spec in selected if spec.name in wanted]
+        return [spec for spec in selected if spec.cost in costs]
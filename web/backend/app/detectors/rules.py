@@ -0,0 +1,198 @@
+"""
+Detector rules catalog: keyword families and thresholds, loaded from JSON.
+
+The catalog (rules.json next to this module by default) has three parts:
+
+- "version": any string; it is part of analysis cache keys, so bump it with
+  every change
+- "keyword_families": name, keywords and (optionally) the text columns they
+  are matched against, compiled into the KeywordIndex
+- "thresholds": per-detector limits, keyed by registry name
+
+A custom catalog must define the same families and threshold names as the
+bundled one; load_rules() rejects anything else, so a typo fails at load
+time rather than mid-analysis. RulesCatalog reloads the file when it changes.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple, Union
+
+from .keyword_index import TEXT_COLUMNS, KeywordFamily, KeywordIndex
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = Path(__file__).with_name("rules.json")
+RELOAD_CHECK_SECONDS = 5.0
+
+# Transaction text fields a keyword family may match against.
+_KEYWORD_COLUMNS = frozenset({"description", "merchant", "category", "counterparty", "channel", "direction"})
+# Threshold names with these suffixes are counts or sizes and must be whole numbers.
+_INTEGER_SUFFIXES = ("_count", "_size")
+
+
+@dataclass(frozen=True)
+class Rules:
+    """A compiled catalog. Treat as read-only: frames built with it share it."""
+
+    version: str
+    families: Tuple[KeywordFamily, ...]
+    keyword_index: KeywordIndex
+    thresholds: Dict[str, Dict[str, Union[int, float]]]
+
+
+def compile_rules(data: Mapping[str, Any], reference: Optional[Rules] = None) -> Rules:
+    """
+    Validate and compile a parsed catalog. `reference` (default: the bundled
+    catalog) fixes which families and threshold names must be present.
+    """
+    version = data.get("version")
+    if not isinstance(version, str) or not version:
+        raise ValueError("rules catalog needs a non-empty string 'version'")
+
+    families = tuple(_family(entry) for entry in _list(data, "keyword_families"))
+    names = [family.name for family in families]
+    if len(set(names)) != len(names):
+        raise ValueError("rules catalog defines a keyword family twice")
+
+    thresholds = data.get("thresholds")
+    if not isinstance(thresholds, dict):
+        raise ValueError("rules catalog needs a 'thresholds' object")
+    compiled = {detector: _limits(detector, limits) for detector, limits in thresholds.items()}
+
+    if reference is not None:
+        missing = {family.name for family in reference.families} - set(names)
+        if missing:
+            raise ValueError(f"rules catalog is missing keyword families: {', '.join(sorted(missing))}")
+        for detector, limits in reference.thresholds.items():
+            if set(compiled.get(detector, ())) != set(limits):
+                raise ValueError(f"rules catalog thresholds for {detector} must be: {', '.join(sorted(limits))}")
+
+    return Rules(version=version, families=families, keyword_index=KeywordIndex(families), thresholds=compiled)
+
+
+def load_rules(path: Union[str, Path], reference: Optional[Rules] = None) -> Rules:
+    with open(path, encoding="utf-8") as handle:
+        data = json.load(handle)
+    if not isinstance(data, dict):
+        raise ValueError("rules catalog must be a JSON object")
+    return compile_rules(data, reference if reference is not None else default_rules())
+
+
+@lru_cache(maxsize=None)
+def default_rules() -> Rules:
+    """The bundled catalog."""
+    with open(DEFAULT_RULES_PATH, encoding="utf-8") as handle:
+        return compile_rules(json.load(handle))
+
+
+def _list(data: Mapping[str, Any], key: str) -> list:
+    value = data.get(key)
+    if not isinstance(value, list) or not value:
+        raise ValueError(f"rules catalog needs a non-empty '{key}' list")
+    return value
+
+
+def _family(entry: Any) -> KeywordFamily:
+    if not isinstance(entry, dict) or not isinstance(entry.get("name"), str):
+        raise ValueError("each keyword family needs a 'name'")
+    name = entry["name"]
+    keywords = entry.get("keywords")
+    if not isinstance(keywords, list) or not keywords or not all(isinstance(k, str) and k for k in keywords):
+        raise ValueError(f"keyword family {name} needs a non-empty list of keywords")
+    columns = entry.get("columns", list(TEXT_COLUMNS))
+    if not isinstance(columns, list) or not columns or not set(columns) <= _KEYWORD_COLUMNS:
+        raise ValueError(f"keyword family {name} columns must be among: {', '.join(sorted(_KEYWORD_COLUMNS))}")
+    return KeywordFamily(name, tuple(keywords), tuple(columns))
+
+
+def _limits(detector: str, limits: Any) -> Dict[str, Union[int, float]]:
+    if not isinstance(limits, dict):
+        raise ValueError(f"thresholds for {detector} must be an object")
+    for name, value in limits.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            raise ValueError(f"threshold {detector}.{name} must be a non-negative number")
+        if name.endswith(_INTEGER_SUFFIXES) and not isinstance(value, int):
+            raise ValueError(f"threshold {detector}.{name} must be a whole number")
+    return dict(limits)
+
+
+class RulesCatalog:
+    """
+    A rules file, reloaded when it changes.
+
+    current() checks the file's mtime and size at most every `reload_seconds`
+    and compiles a changed file completely before swapping it in, so callers
+    always get one consistent Rules object. A file that fails to load or
+    validate is logged and ignored; the previous rules stay active until the
+    file changes again. Write updates to a temporary file and rename it over
+    the catalog so a reload never sees a partial write.
+    """
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_RULES_PATH, reload_seconds: float = RELOAD_CHECK_SECONDS):
+        self.path = Path(path)
+        self.reload_seconds = reload_seconds
+        self._lock = threading.Lock()
+        self._stamp = self._file_stamp()
+        self._rules = load_rules(self.path)
+        self._checked = time.monotonic()
+
+    @property
+    def version(self) -> str:
+        return self.current().version
+
+    def current(self) -> Rules:
+        if time.monotonic() - self._checked >= self.reload_seconds:
+            self.reload_if_changed()
+        return self._rules
+
+    def reload_if_changed(self) -> bool:
+        """Reload now if the file changed; True when new rules were swapped in."""
+        with self._lock:
+            self._checked = time.monotonic()
+            try:
+                stamp = self._file_stamp()
+            except OSError:
+                logger.warning("rules catalog %s is unreadable; keeping version %s", self.path, self._rules.version)
+                return False
+            if stamp == self._stamp:
+                return False
+            self._stamp = stamp
+            try:
+                rules = load_rules(self.path)
+            except (OSError, ValueError) as exc:
+                logger.error(
+                    "rules catalog %s failed to load (%s); keeping version %s", self.path, exc, self._rules.version
+                )
+                return False
+            self._rules = rules
+        logger.info("rules catalog reloaded", extra={"rules_version": rules.version, "path": str(self.path)})
+        return True
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Engines are pickled for process-pool detectors; locks don't pickle.
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _file_stamp(self) -> Tuple[int, int]:
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+
+@lru_cache(maxsize=None)
+def bundled_catalog() -> RulesCatalog:
+    """Catalog over the bundled rules.json; ForensicEngine's default."""
+    return RulesCatalog(DEFAULT_RULES_PATH)
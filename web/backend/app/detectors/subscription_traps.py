@@ -2,72 +2,244 @@ from __future__ import annotations
 
 from typing import Any, Dict, List
 
+import numpy as np
 import pandas as pd
 
+from .frame import AnalysisFrame
+from .grouped import Groups
 from .models import Leak
 
+# Per-group recurrence counters, as produced by summarize_subscription_groups and
+# carried in FrameHistory for incremental analysis.
+GROUP_COLUMNS = [
+    "key",
+    "merchant_name",
+    "last_id",
+    "occurrences",
+    "first_date",
+    "last_date",
+    "first_amount",
+    "min_amount",
+    "max_amount",
+]
 
-def detect_subscription_traps(df: pd.DataFrame) -> List[Leak]:
+
+def detect_subscription_traps(frame: AnalysisFrame) -> List[Leak]:
     """
     Subscription Traps:
     Detect recurring small deductions that haven't changed for 3+ months.
     These are often forgotten subscriptions that drain money silently.
     """
-    if df.empty:
+    if frame.empty:
         return []
 
-    debits = df[df["direction"] == "debit"].copy()
-    if debits.empty:
+    limits = frame.thresholds("subscription_traps")
+    history = frame.history.subscription_groups if frame.history is not None else None
+    if history is not None and not history.empty:
+        # Incremental analysis: fold this frame's groups into the stored counters first.
+        groups = merge_subscription_groups(history, summarize_subscription_groups(frame))
+        return _leaks(_passing(groups, frame.as_of, limits), limits)
+
+    grouped = _group_parts(frame)
+    if grouped is None:
+        return []
+    debits, parts = grouped
+
+    groups = _aggregate(debits, parts)
+    # Need at least 3 occurrences before anything else is worth computing
+    groups = groups[groups["occurrences"] >= limits["min_count"]]
+    if groups.empty:
         return []
 
+    # Leaks are only materialized for groups that pass
+    passing = _passing(groups, frame.as_of, limits)
+    return _leaks(_describe(debits, parts, passing), limits)
+
+
+def screen_subscription_traps(frame: AnalysisFrame, groups: Groups) -> np.ndarray:
+    """
+    Groups with a recurring series detect_subscription_traps may report: 3+
+    occurrences spanning 3+ months, the latest within 60 days. The amount
+    checks are left to the detector.
+    """
+    limits = frame.thresholds("subscription_traps")
+    screened = np.zeros(len(groups), dtype=bool)
+    grouped = _group_parts(frame) if not frame.empty else None
+    if grouped is None:
+        return screened
+    debits, parts = grouped
+
+    owner = groups.codes[frame.df.index.get_indexer(debits.index)]
+    series = (
+        pd.DataFrame(
+            {
+                "owner": owner,
+                "group": pd.util.hash_pandas_object(parts, index=False).to_numpy(),
+                "timestamp": debits["timestamp"].array,
+            }
+        )
+        .groupby(["owner", "group"], sort=False)["timestamp"]
+        .agg(["size", "first", "last"])
+    )
+    recurring = (
+        (series["size"] >= limits["min_count"])
+        & ((series["last"] - series["first"]).dt.days / 30.0 >= limits["min_months"])
+        & ((frame.as_of - series["last"]).dt.days <= limits["max_days_since_last"])
+    )
+    owners = series.index.get_level_values("owner")[recurring.to_numpy()]
+    screened[owners[owners >= 0]] = True
+    return screened
+
+
+def summarize_subscription_groups(frame: AnalysisFrame) -> pd.DataFrame:
+    """Recurrence counters for every debit group in the frame, indexed by group hash."""
+    grouped = _group_parts(frame) if not frame.empty else None
+    if grouped is None:
+        return pd.DataFrame(columns=GROUP_COLUMNS)
+    debits, parts = grouped
+    return _describe(debits, parts, _aggregate(debits, parts))
+
+
+def merge_subscription_groups(older: pd.DataFrame, newer: pd.DataFrame) -> pd.DataFrame:
+    """Combine two sets of group counters; `newer` wins ties on the latest occurrence."""
+    if older.empty:
+        return newer
+    if newer.empty:
+        return older
+    combined = pd.concat([older[GROUP_COLUMNS], newer[GROUP_COLUMNS]])
+    by_key = combined.groupby(level=0, sort=False)
+    earliest = combined.sort_values("first_date", kind="stable").groupby(level=0, sort=False)
+    latest = combined.sort_values("last_date", kind="stable").groupby(level=0, sort=False)
+    merged = pd.DataFrame(
+        {
+            "key": earliest["key"].first(),
+            "merchant_name": earliest["merchant_name"].first(),
+            "last_id": latest["last_id"].last(),
+            "occurrences": by_key["occurrences"].sum(),
+            "first_date": earliest["first_date"].first(),
+            "last_date": latest["last_date"].last(),
+            "first_amount": earliest["first_amount"].first(),
+            "min_amount": by_key["min_amount"].min(),
+            "max_amount": by_key["max_amount"].max(),
+        }
+    )
+    return merged[GROUP_COLUMNS]
+
+
+def _group_parts(frame: AnalysisFrame) -> tuple[pd.DataFrame, pd.DataFrame] | None:
+    df = frame.df
+    debits = df[df["is_debit"] & df["timestamp"].notna()].sort_values("timestamp", kind="stable")
+    if debits.empty:
+        return None
+
     # Group by merchant/description and amount to find recurring patterns
-    debits["merchant_normalized"] = debits["merchant"].fillna("").str.lower().str.strip()
-    debits["description_normalized"] = debits["description"].fillna("").str.lower().str.strip()
+    parts = pd.DataFrame(
+        {
+            "merchant": debits["merchant"].str.lower().str.strip(),
+            "description": debits["description"].str.lower().str.strip().str[:50],
+            "amount": debits["abs_amount"].round(2),
+        }
+    )
+    return debits, parts
+
 
-    # Create a key for grouping similar transactions
-    debits["transaction_key"] = (
-        debits["merchant_normalized"] + "_" + debits["description_normalized"].str[:50] + "_" + debits["abs_amount"].round(2).astype(str)
+def _aggregate(debits: pd.DataFrame, parts: pd.DataFrame) -> pd.DataFrame:
+    # Hash the key parts into one integer per row instead of concatenating strings
+    group_key = pd.util.hash_pandas_object(parts, index=False)
+
+    # One aggregation pass for every group; rows are time-ordered, so first/last are the
+    # earliest/latest occurrence.
+    groups = (
+        pd.DataFrame(
+            {
+                "group": group_key.to_numpy(),
+                "position": np.arange(len(debits)),
+                "timestamp": debits["timestamp"].array,
+                "amount": debits["abs_amount"].to_numpy(),
+            }
+        )
+        .groupby("group", sort=False)
+        .agg(
+            occurrences=("position", "size"),
+            first_position=("position", "first"),
+            last_position=("position", "last"),
+            first_date=("timestamp", "first"),
+            last_date=("timestamp", "last"),
+            first_amount=("amount", "first"),
+            min_amount=("amount", "min"),
+            max_amount=("amount", "max"),
+        )
     )
+    return groups
 
-    leaks = []
-    now = pd.Timestamp.now(tz="UTC") if not debits["timestamp"].empty else pd.Timestamp.now(tz="UTC")
 
-    # Group by transaction key
-    for key, group in debits.groupby("transaction_key"):
-        if len(group) < 3:  # Need at least 3 occurrences
-            continue
+def _describe(debits: pd.DataFrame, parts: pd.DataFrame, groups: pd.DataFrame) -> pd.DataFrame:
+    """Attach the readable key, merchant name and latest id to aggregated groups."""
+    first = groups["first_position"].to_numpy()
+    last = groups["last_position"].to_numpy()
 
-        group = group.sort_values("timestamp")
-        amounts = group["abs_amount"].values
-        first_amount = amounts[0]
+    merchant = debits["merchant"].to_numpy()[first]
+    description = debits["description"].to_numpy()[first]
+    merchant_name = [m or d or "Unknown" for m, d in zip(merchant, description)]
+    key = [
+        f"{m}_{d}_{float(a)}"
+        for m, d, a in zip(
+            parts["merchant"].to_numpy()[first],
+            parts["description"].to_numpy()[first],
+            parts["amount"].to_numpy()[first],
+        )
+    ]
 
-        # Check if all amounts are the same (within 1% tolerance)
-        if not all(abs(a - first_amount) / max(first_amount, 0.01) < 0.01 for a in amounts):
-            continue
+    described = groups.assign(key=key, merchant_name=merchant_name, last_id=debits["id"].to_numpy()[last])
+    described.index = described.index.astype(str)
+    return described.drop(columns=["first_position", "last_position"])
 
-        # Check if recurring for 3+ months
-        first_date = group["timestamp"].iloc[0]
-        last_date = group["timestamp"].iloc[-1]
-        months_span = (last_date - first_date).days / 30.0
 
-        if months_span < 3:
-            continue
+def _passing(groups: pd.DataFrame, as_of: pd.Timestamp, limits: Dict[str, Any]) -> pd.DataFrame:
+    # Need at least 3 occurrences
+    groups = groups[groups["occurrences"] >= limits["min_count"]]
 
-        # Calculate frequency (transactions per month)
-        freq_per_month = len(group) / max(months_span, 0.1)
-        monthly_cost = first_amount * freq_per_month
+    # Check if all amounts are the same (within 1% tolerance)
+    first_amount = groups["first_amount"]
+    max_deviation = np.maximum(groups["max_amount"] - first_amount, first_amount - groups["min_amount"])
+    same_amount = max_deviation / np.maximum(first_amount, 0.01) < limits["amount_tolerance"]
 
-        # Only flag if it's a meaningful amount
-        if monthly_cost < 10:
-            continue
+    # Check if recurring for 3+ months
+    months_span = (groups["last_date"] - groups["first_date"]).dt.days / 30.0
 
-        # Check last occurrence (should be recent)
-        days_since_last = (now - last_date).days
-        if days_since_last > 60:  # Not active anymore
-            continue
+    # Calculate frequency (transactions per month)
+    freq_per_month = groups["occurrences"] / np.maximum(months_span, 0.1)
+    monthly_cost = first_amount * freq_per_month
 
-        severity = "high" if monthly_cost >= 50 else "medium"
-        merchant_name = group["merchant"].iloc[0] or group["description"].iloc[0] or "Unknown"
+    # Check last occurrence (should be recent)
+    days_since_last = (as_of - groups["last_date"]).dt.days
+
+    # Only flag meaningful amounts that are still active
+    passing = (
+        same_amount
+        & (months_span >= limits["min_months"])
+        & (monthly_cost >= limits["min_monthly_cost"])
+        & (days_since_last <= limits["max_days_since_last"])
+    )
+    return groups[passing].assign(
+        months_span=months_span[passing],
+        freq_per_month=freq_per_month[passing],
+        monthly_cost=monthly_cost[passing],
+    )
+
+
+def _leaks(groups: pd.DataFrame, limits: Dict[str, Any]) -> List[Leak]:
+    leaks = []
+    # Keep the previous output order (sorted by the readable transaction key)
+    for group in groups.sort_values("key", kind="stable").itertuples(index=False):
+        key = str(group.key)
+        amount = float(group.first_amount)
+        span = float(group.months_span)
+        frequency = float(group.freq_per_month)
+        cost = float(group.monthly_cost)
+
+        severity = "high" if cost >= limits["high_monthly_cost"] else "medium"
+        merchant_name = group.merchant_name
 
         leaks.append(
             Leak(
@@ -75,22 +247,20 @@ def detect_subscription_traps(df: pd.DataFrame) -> List[Leak]:
                 detector="SubscriptionTraps",
                 title=f"Recurring charge: {merchant_name}",
                 plain_language_reason=(
-                    f"You've been paying R{first_amount:.2f} to {merchant_name} every month for {months_span:.1f} months. "
-                    f"That's about R{monthly_cost:.0f} per month. Check if you still need this."
+                    f"You've been paying R{amount:.2f} to {merchant_name} every month for {span:.1f} months. "
+                    f"That's about R{cost:.0f} per month. Check if you still need this."
                 ),
                 severity=severity,
-                transaction_id=str(group["id"].iloc[-1]),
-                estimated_monthly_cost=monthly_cost,
+                transaction_id=str(group.last_id),
+                estimated_monthly_cost=cost,
                 evidence={
                     "merchant": merchant_name,
-                    "amount": float(first_amount),
-                    "frequency_per_month": round(freq_per_month, 2),
-                    "months_active": round(months_span, 1),
-                    "total_occurrences": len(group),
-                    "last_occurrence": last_date.isoformat(),
+                    "amount": amount,
+                    "frequency_per_month": round(frequency, 2),
+                    "months_active": round(span, 1),
+                    "total_occurrences": int(group.occurrences),
+                    "last_occurrence": group.last_date.isoformat(),
                 },
             )
         )
-
     return leaks
-
@@ -1,61 +1,43 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from functools import partial
+from typing import List
 
-import pandas as pd
+import numpy as np
 
+from .evidence import Deferred, latest_records
+from .frame import AnalysisFrame
+from .grouped import Groups, at_least
 from .models import Leak
 
 
-def detect_vas_charges(df: pd.DataFrame) -> List[Leak]:
+def detect_vas_charges(frame: AnalysisFrame) -> List[Leak]:
     """
     VAS (Value-Added Service) Charges:
     Detect unauthorized or excessive value-added service charges.
     These are often subscription services, premium SMS, or app charges.
     """
-    if df.empty:
+    if frame.empty:
         return []
 
-    vas_keywords = [
-        "vas",
-        "value added",
-        "premium sms",
-        "sms service",
-        "subscription",
-        "opt-in",
-        "opt in",
-        "service charge",
-        "content charge",
-        "ringtone",
-        "wallpaper",
-        "game",
-        "app purchase",
-        "in-app",
-    ]
-
-    text = (df["description"].fillna("") + " " + df["merchant"].fillna("") + " " + df["category"].fillna("")).str.lower()
-    is_vas = text.apply(lambda s: any(k in s for k in vas_keywords))
-
-    vas_transactions = df[is_vas & (df["direction"] == "debit") & (df["abs_amount"] > 0)].copy()
-    if vas_transactions.empty:
+    limits = frame.thresholds("vas_charges")
+    totals = frame.windows.family("vas", 30)
+    if not totals.count:
         return []
 
-    now = pd.Timestamp.now(tz="UTC") if not df["timestamp"].empty else pd.Timestamp.now(tz="UTC")
-    last_30 = vas_transactions[vas_transactions["timestamp"] >= (now - pd.Timedelta(days=30))]
+    monthly_cost = totals.total
+    count = totals.count
 
-    if last_30.empty:
+    if monthly_cost < limits["min_monthly_cost"] and count < limits["min_count"]:
         return []
 
-    monthly_cost = float(last_30["abs_amount"].sum())
-    count = len(last_30)
+    df = frame.df
+    last_30 = df[frame.matches("vas") & df["is_debit"] & (df["abs_amount"] > 0) & df["in_last_30d"]]
 
-    if monthly_cost < 20 and count < 3:
-        return []
-
-    severity = "high" if monthly_cost >= 100 or count >= 10 else "medium"
+    severity = "high" if monthly_cost >= limits["high_monthly_cost"] or count >= limits["high_count"] else "medium"
 
     # Group by merchant to identify top offenders
-    top_merchant = last_30.groupby("merchant")["abs_amount"].sum().sort_values(ascending=False)
+    top_merchant = last_30.groupby("merchant", observed=True)["abs_amount"].sum().sort_values(ascending=False)
     top_merchant_name = top_merchant.index[0] if not top_merchant.empty else "Various services"
 
     return [
@@ -74,9 +56,25 @@ def detect_vas_charges(df: pd.DataFrame) -> List[Leak]:
             evidence={
                 "count_last_30_days": count,
                 "sum_last_30_days": monthly_cost,
-                "top_merchants": top_merchant.head(5).to_dict(),
-                "sample": last_30.sort_values("timestamp").tail(5)[["id", "timestamp", "abs_amount", "description", "merchant"]].to_dict(orient="records"),
+                "top_merchants": top_merchant.head(limits["top_merchants_size"]).to_dict(),
+                "sample": Deferred(
+                    partial(
+                        latest_records,
+                        last_30,
+                        limits["sample_size"],
+                        ["id", "timestamp", "abs_amount", "description", "merchant"],
+                    )
+                ),
             },
         )
     ]
 
+
+def screen_vas_charges(frame: AnalysisFrame, groups: Groups) -> np.ndarray:
+    """Groups detect_vas_charges may report on (same thresholds)."""
+    limits = frame.thresholds("vas_charges")
+    df = frame.df
+    last_30 = frame.matches("vas") & df["is_debit"] & (df["abs_amount"] > 0) & df["in_last_30d"]
+    count = groups.rows(last_30)
+    monthly_cost = groups.total(last_30, df["abs_amount"])
+    return (count > 0) & (at_least(monthly_cost, limits["min_monthly_cost"]) | (count >= limits["min_count"]))
@@ -1,39 +1,35 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import List
 
-import pandas as pd
+import numpy as np
 
+from .frame import AnalysisFrame
+from .grouped import Groups, at_least
 from .models import Leak
 
-def detect_weekend_spending(df: pd.DataFrame) -> List[Leak]:
+def detect_weekend_spending(frame: AnalysisFrame) -> List[Leak]:
     """
     Weekend Spending Spikes:
     Detect if spending is significantly higher on weekends, which might indicate
     impulse purchases or social spending pressure.
     """
-    if df.empty:
+    if frame.empty:
         return []
 
-    debits = df[df["direction"] == "debit"].copy()
-    if debits.empty:
+    limits = frame.thresholds("weekend_spending")
+    if frame.windows.direction("debit", 30).count < limits["min_count"]:  # Need enough data
         return []
 
-    # Add day of week
-    debits["day_of_week"] = debits["timestamp"].dt.dayofweek  # 0=Monday, 6=Sunday
-    debits["is_weekend"] = debits["day_of_week"].isin([5, 6])  # Saturday, Sunday
+    df = frame.df
+    last_30 = df[df["is_debit"] & df["in_last_30d"]]
 
-    now = pd.Timestamp.now(tz="UTC") if not df["timestamp"].empty else pd.Timestamp.now(tz="UTC")
-    last_30 = debits[debits["timestamp"] >= (now - pd.Timedelta(days=30))]
+    is_weekend = last_30["day_of_week"].isin([5, 6])  # Saturday, Sunday
+    weekend_spending = float(last_30.loc[is_weekend, "abs_amount"].sum())
+    weekday_spending = float(last_30.loc[~is_weekend, "abs_amount"].sum())
 
-    if len(last_30) < 10:  # Need enough data
-        return []
-
-    weekend_spending = float(last_30[last_30["is_weekend"]]["abs_amount"].sum())
-    weekday_spending = float(last_30[~last_30["is_weekend"]]["abs_amount"].sum())
-
-    weekend_days = (last_30["is_weekend"]).sum()
-    weekday_days = (~last_30["is_weekend"]).sum()
+    weekend_days = is_weekend.sum()
+    weekday_days = (~is_weekend).sum()
 
     if weekday_days == 0 or weekend_days == 0:
         return []
@@ -45,8 +41,8 @@ def detect_weekend_spending(df: pd.DataFrame) -> List[Leak]:
     # Flag if weekend spending is 50%+ higher than weekday
     if weekend_avg > 0 and weekday_avg > 0:
         ratio = weekend_avg / weekday_avg
-        if ratio >= 1.5 and weekend_spending >= 200:  # 50%+ higher and meaningful amount
-            severity = "medium" if ratio < 2.0 else "high"
+        if ratio >= limits["min_ratio"] and weekend_spending >= limits["min_weekend_spending"]:  # 50%+ higher and meaningful amount
+            severity = "medium" if ratio < limits["high_ratio"] else "high"
             return [
                 Leak(
                     id="weekend-spending-spike",
@@ -57,7 +53,7 @@ def detect_weekend_spending(df: pd.DataFrame) -> List[Leak]:
                         f"This might be impulse purchases or social spending. Consider planning weekend expenses."
                     ),
                     severity=severity,
-                    estimated_monthly_cost=weekend_spending * 4.33,  # Approximate monthly
+                    estimated_monthly_cost=weekend_spending * limits["monthly_factor"],  # Approximate monthly
                     evidence={
                         "weekend_spending": round(weekend_spending, 2),
                         "weekday_spending": round(weekday_spending, 2),
@@ -72,3 +68,23 @@ def detect_weekend_spending(df: pd.DataFrame) -> List[Leak]:
 
     return []
 
+
+def screen_weekend_spending(frame: AnalysisFrame, groups: Groups) -> np.ndarray:
+    """Groups detect_weekend_spending may report on (same thresholds)."""
+    limits = frame.thresholds("weekend_spending")
+    df = frame.df
+    last_30 = df["is_debit"] & df["in_last_30d"]
+    is_weekend = df["day_of_week"].isin([5, 6])
+    weekend_days = groups.rows(last_30 & is_weekend)
+    weekday_days = groups.rows(last_30 & ~is_weekend)
+    weekend_spending = groups.total(last_30 & is_weekend, df["abs_amount"])
+    weekday_spending = groups.total(last_30 & ~is_weekend, df["abs_amount"])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = (weekend_spending / weekend_days) / (weekday_spending / weekday_days)
+    return (
+        (weekend_days + weekday_days >= limits["min_count"])
+        & (weekend_days > 0)
+        & (weekday_days > 0)
+        & at_least(weekend_spending, limits["min_weekend_spending"])
+        & (np.isnan(ratio) | at_least(ratio, limits["min_ratio"]))
+    )
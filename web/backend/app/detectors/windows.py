@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from .frame import AnalysisFrame
+
+# Trailing windows, in days, every aggregate is available for (None = all time).
+WINDOW_DAYS = (7, 30, 90)
+
+
+@dataclass(frozen=True)
+class Totals:
+    """Row count and abs_amount sum of one slice of a frame."""
+
+    count: int
+    total: float
+
+
+def monthly_totals(timestamps: pd.Series, amounts: pd.Series) -> pd.DataFrame:
+    """Row count and sum of `amounts` per calendar month (UTC), oldest first; undated rows are dropped."""
+    months = timestamps.dt.tz_localize(None).dt.to_period("M")
+    return amounts.groupby(months).agg(["count", "sum"])
+
+
+class WindowedAggregates:
+    """
+    Counts and abs_amount sums of a frame per keyword family, direction and
+    merchant over the WINDOW_DAYS trailing windows and all time, plus
+    calendar months. Reached through AnalysisFrame.windows.
+
+    The window masks are computed once per frame, and each aggregate is
+    computed on first use and then reused, so detectors sharing a slice
+    (e.g. "fees in the last 30 days") pay for it once. Family, direction and
+    spend sums are taken over the selected rows in frame order, so they are
+    bit-for-bit the `df[mask]["abs_amount"].sum()` a detector would compute.
+
+    "Spend" rows are debits with a non-zero amount: the rows every
+    cost-estimating detector starts from.
+    """
+
+    def __init__(self, frame: "AnalysisFrame") -> None:
+        self._frame = frame
+        self._totals: Dict[Tuple[str, str, Optional[int]], Totals] = {}
+        self._merchants: Optional[pd.DataFrame] = None
+        self._months: Optional[pd.DataFrame] = None
+        if frame.empty:
+            return
+        df = frame.df
+        self._amounts = df["abs_amount"].to_numpy()
+        self._masks: Dict[Optional[int], np.ndarray] = {None: np.ones(len(df), dtype=bool)}
+        for days in WINDOW_DAYS:
+            column = f"in_last_{days}d"
+            # NaT compares False: undated rows only count towards all-time totals.
+            recent = df[column] if column in df.columns else df["timestamp"] >= frame.as_of - pd.Timedelta(days=days)
+            self._masks[days] = recent.to_numpy(dtype=bool)
+        self._spend = (df["is_debit"] & (df["abs_amount"] > 0)).to_numpy()
+
+    def family(self, name: str, window: Optional[int] = None, spend: bool = True) -> Totals:
+        """Rows matching keyword family `name` (spend rows only unless `spend=False`)."""
+        key = ("family" if spend else "family_all", name, window)
+        if key not in self._totals:
+            mask = self._frame.matches(name).to_numpy() if not self._frame.empty else None
+            self._totals[key] = self._sum(mask & self._spend if spend and mask is not None else mask, window)
+        return self._totals[key]
+
+    def direction(self, name: str, window: Optional[int] = None) -> Totals:
+        """Rows with direction `name` ("debit" or "credit"), zero amounts included."""
+        key = ("direction", name, window)
+        if key not in self._totals:
+            mask = (self._frame.df["direction"] == name).to_numpy() if not self._frame.empty else None
+            self._totals[key] = self._sum(mask, window)
+        return self._totals[key]
+
+    def spend(self, window: Optional[int] = None) -> Totals:
+        key = ("spend", "", window)
+        if key not in self._totals:
+            self._totals[key] = self._sum(self._spend if not self._frame.empty else None, window)
+        return self._totals[key]
+
+    @property
+    def merchants(self) -> pd.DataFrame:
+        """Spend per merchant: count_<w>d / sum_<w>d for each window, then count / sum for all time."""
+        if self._merchants is None:
+            columns: Dict[str, pd.Series] = {}
+            for window in WINDOW_DAYS + (None,):
+                suffix = f"_{window}d" if window is not None else ""
+                if self._frame.empty:
+                    by_merchant = pd.DataFrame({"count": pd.Series(dtype="int64"), "sum": pd.Series(dtype="float64")})
+                else:
+                    rows = self._frame.df.loc[self._spend & self._masks[window], ["merchant", "abs_amount"]]
+                    by_merchant = rows.groupby("merchant", observed=True)["abs_amount"].agg(["count", "sum"])
+                columns[f"count{suffix}"] = by_merchant["count"]
+                columns[f"sum{suffix}"] = by_merchant["sum"]
+            merchants = pd.DataFrame(columns)
+            for name in columns:
+                merchants[name] = merchants[name].fillna(0).astype("int64" if name.startswith("count") else "float64")
+            self._merchants = merchants
+        return self._merchants
+
+    @property
+    def months(self) -> pd.DataFrame:
+        """Per calendar month: count / sum over all rows and spend_count / spend_sum over spend rows."""
+        if self._months is None:
+            if self._frame.empty:
+                self._months = pd.DataFrame(columns=["count", "sum", "spend_count", "spend_sum"])
+            else:
+                df = self._frame.df
+                every = monthly_totals(df["timestamp"], df["abs_amount"])
+                spend = monthly_totals(df["timestamp"][self._spend], df["abs_amount"][self._spend])
+                months = every.join(spend.add_prefix("spend_"))
+                months["spend_count"] = months["spend_count"].fillna(0).astype("int64")
+                months["spend_sum"] = months["spend_sum"].fillna(0.0)
+                self._months = months
+        return self._months
+
+    def _sum(self, mask: Optional[np.ndarray], window: Optional[int]) -> Totals:
+        if mask is None:  # an empty frame
+            return Totals(count=0, total=0.0)
+        mask = mask & self._masks[window]
+        # Same pairwise summation as Series.sum over the filtered frame.
+        return Totals(count=int(np.count_nonzero(mask)), total=float(self._amounts[mask].sum()))
@@ -0,0 +1,173 @@
+"""
+Per-user ML features, maintained as transactions are stored.
+
+The ML endpoints used to reload a user's recent transactions and rebuild
+the same aggregates on every request. Instead, every path that inserts
+Transaction rows passes the new rows to record_transactions(), which folds
+them into the user's user_features row:
+
+- transaction count, total absolute amount, first and last timestamp
+- a 7 x 24 histogram of transactions by UTC weekday (Monday first) and hour
+- transaction counts per merchant (the MERCHANTS_KEPT most frequent)
+- count and absolute-amount total per UTC calendar month (the last MONTHS_KEPT)
+
+Readers get O(1) feature vectors from spending_features() and
+monthly_spend(). A user with no row yet (transactions stored before the
+feature store existed) is backfilled from their transactions once, by
+get_user_features(). Paths that delete transactions call
+reset_user_features(), so the next read rebuilds from what is left.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from .detectors.windows import monthly_totals
+from .models_db import Transaction, UserFeatures
+from .timestamps import to_utc_timestamps
+
+MERCHANTS_KEPT = 200
+MONTHS_KEPT = 24
+
+# (timestamp, amount, merchant) of one stored transaction.
+FeatureRow = Tuple[Any, float, Optional[str]]
+
+
+def empty_features() -> Dict[str, Any]:
+    return {
+        "transaction_count": 0,
+        "amount_total": 0.0,
+        "first_transaction_at": None,
+        "last_transaction_at": None,
+        "hour_weekday": [[0] * 24 for _ in range(7)],
+        "merchant_counts": {},
+        "monthly_totals": {},
+    }
+
+
+def fold_features(features: Dict[str, Any], rows: Sequence[FeatureRow]) -> Dict[str, Any]:
+    """`features` (as from empty_features) with `rows` added; the input is not modified."""
+    if not rows:
+        return features
+    timestamps, amounts, merchants = zip(*rows)
+    ts = to_utc_timestamps(pd.Series(timestamps, dtype=object))
+    abs_amounts = pd.Series(np.abs(np.asarray(amounts, dtype=float)))
+    dated = ts.notna().to_numpy()
+
+    hour_weekday = np.asarray(features["hour_weekday"], dtype=np.int64)
+    np.add.at(hour_weekday, (ts[dated].dt.dayofweek.to_numpy(), ts[dated].dt.hour.to_numpy()), 1)
+
+    merchant_counts = Counter(features["merchant_counts"])
+    merchant_counts.update(merchant for merchant in merchants if merchant)
+
+    months = {month: list(totals) for month, totals in features["monthly_totals"].items()}
+    for period, (count, total) in monthly_totals(ts, abs_amounts).iterrows():
+        stored = months.setdefault(str(period), [0, 0.0])
+        months[str(period)] = [stored[0] + int(count), stored[1] + float(total)]
+
+    first, last = features["first_transaction_at"], features["last_transaction_at"]
+    if dated.any():
+        first = min(filter(None, (first, ts.min().to_pydatetime())))
+        last = max(filter(None, (last, ts.max().to_pydatetime())))
+    return {
+        "transaction_count": features["transaction_count"] + len(rows),
+        "amount_total": features["amount_total"] + float(abs_amounts.sum()),
+        "first_transaction_at": first,
+        "last_transaction_at": last,
+        "hour_weekday": hour_weekday.tolist(),
+        "merchant_counts": dict(merchant_counts.most_common(MERCHANTS_KEPT)),
+        "monthly_totals": dict(sorted(months.items())[-MONTHS_KEPT:]),
+    }
+
+
+def spending_features(features: Any) -> Dict[str, float]:
+    """
+    The spending profile vector of a user_features row (or fold_features
+    dict): average transaction amount, transactions per day and weekend
+    ratio, as MLEngine.cluster_users computes them from transactions.
+    """
+    get = features.get if isinstance(features, dict) else lambda name: getattr(features, name)
+    count = get("transaction_count")
+    first, last = get("first_transaction_at"), get("last_transaction_at")
+    days = (last - first).days if first is not None and last is not None else 0
+    hour_weekday = np.asarray(get("hour_weekday"))
+    return {
+        "avg_transaction_amount": get("amount_total") / max(count, 1),
+        "transactions_per_day": count / max(days, 1),
+        "weekend_ratio": float(hour_weekday[5:].sum()) / max(int(hour_weekday.sum()), 1),
+    }
+
+
+def monthly_spend(features: Any) -> pd.Series:
+    """Absolute-amount total per calendar month, oldest first (MLEngine.predict_leaks_from_monthly input)."""
+    months = features["monthly_totals"] if isinstance(features, dict) else features.monthly_totals
+    return pd.Series({month: totals[1] for month, totals in sorted(months.items())}, dtype=float)
+
+
+def record_transactions(db: Session, user_id: Any, rows: Iterable[FeatureRow]) -> None:
+    """Fold newly inserted transactions into the user's features; the caller commits."""
+    rows = list(rows)
+    if not rows:
+        return
+    stored = _locked_row(db, user_id)
+    if stored is None:
+        # First write for this user: build from everything stored, which includes `rows` once flushed.
+        db.flush()
+        _store(db, user_id, _from_transactions(db, user_id))
+        return
+    _store_into(stored, fold_features(_as_dict(stored), rows))
+
+
+def get_user_features(db: Session, user_id: Any) -> Optional[UserFeatures]:
+    """The user's features row, backfilled from their transactions if missing; None without transactions."""
+    row = db.get(UserFeatures, user_id)
+    if row is not None:
+        return row
+    features = _from_transactions(db, user_id)
+    if not features["transaction_count"]:
+        return None
+    _store(db, user_id, features)
+    db.commit()
+    return db.get(UserFeatures, user_id)
+
+
+def reset_user_features(db: Session, user_id: Any) -> None:
+    """Drop the user's features after transactions were deleted; the caller commits."""
+    db.query(UserFeatures).filter(UserFeatures.user_id == user_id).delete(synchronize_session=False)
+
+
+def _from_transactions(db: Session, user_id: Any) -> Dict[str, Any]:
+    rows = (
+        db.query(Transaction.timestamp, Transaction.amount, Transaction.merchant)
+        .filter(Transaction.user_id == user_id)
+        .all()
+    )
+    return fold_features(empty_features(), [tuple(row) for row in rows])
+
+
+def _locked_row(db: Session, user_id: Any) -> Optional[UserFeatures]:
+    # Syncs for the same user may run concurrently; the row lock serializes their folds.
+    return db.query(UserFeatures).filter(UserFeatures.user_id == user_id).with_for_update().first()
+
+
+def _as_dict(row: UserFeatures) -> Dict[str, Any]:
+    return {name: getattr(row, name) for name in empty_features()}
+
+
+def _store_into(row: UserFeatures, features: Dict[str, Any]) -> None:
+    for name, value in features.items():
+        setattr(row, name, value)
+    row.updated_at = datetime.utcnow()
+
+
+def _store(db: Session, user_id: Any, features: Dict[str, Any]) -> None:
+    statement = insert(UserFeatures).values(user_id=user_id, updated_at=datetime.utcnow(), **features)
+    # A concurrent first write built the same row from the same transactions; keep either.
+    db.execute(statement.on_conflict_do_nothing(index_elements=[UserFeatures.user_id]))
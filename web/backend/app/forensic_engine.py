@@ -1,15 +1,188 @@
 from __future__ import annotations
 
+import importlib.util
+import logging
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
-from .detectors.debit_orders import detect_debit_orders
-from .detectors.models import Leak
-from .detectors.subscription_traps import detect_subscription_traps
-from .detectors.vas_charges import detect_vas_charges
-from .detectors.weekend_spending import detect_weekend_spending
+from .detectors.debit_orders import detect_debit_orders, screen_debit_orders
+from .detectors.evidence import Deferred, check_evidence, latest_records
+from .detectors.frame import AnalysisFrame
+from .detectors.grouped import Groups, at_least
+from .detectors.keyword_index import TEXT_COLUMNS, factorize_text
+from .detectors.models import Leak, Leaks, leak_count, leak_dicts, leak_values
+from .detectors.registry import (
+    COST_EXPENSIVE,
+    COST_MODERATE,
+    DetectorRegistry,
+    DetectorSpec,
+)
+from .detectors.rules import Rules, RulesCatalog, bundled_catalog
+from .detectors.subscription_traps import detect_subscription_traps, screen_subscription_traps
+from .detectors.vas_charges import detect_vas_charges, screen_vas_charges
+from .detectors.weekend_spending import detect_weekend_spending, screen_weekend_spending
+from . import small_engine
+from .small_engine import SMALL_INPUT_ROWS
+from .timestamps import to_utc_timestamps
+
+logger = logging.getLogger(__name__)
+
+_WINDOW_COLUMNS = ("id", "timestamp", "abs_amount", "is_debit", "in_last_30d")
+
+EXECUTION_MODES = ("serial", "thread", "process")
+
+# Lean mode (ForensicEngine(lean=True)): labels become categoricals; free text
+# becomes Arrow-backed strings when pyarrow is installed, else a categorical if
+# it repeats enough to pay for one.
+_LABEL_COLUMNS = ("merchant", "category")
+_FREE_TEXT_COLUMNS = ("description", "counterparty")
+_ARROW_STRINGS = importlib.util.find_spec("pyarrow") is not None
+
+# Transaction fields the engine reads; anything else is carried along untouched.
+TRANSACTION_COLUMNS = ("id", "timestamp", "amount", "description", "merchant", "category", "counterparty", "direction", "channel")
+
+# Bump whenever detector output can change for the same input; cached analysis
+# results are keyed on it.
+ENGINE_VERSION = "3"
+
+SAMPLE_COLUMNS = ["id", "timestamp", "abs_amount", "description"]
+
+
+def columns_from_rows(rows: Sequence[Sequence[Any]], names: Sequence[str]) -> Dict[str, np.ndarray]:
+    """
+    Transpose result tuples (e.g. a column-selecting SQLAlchemy query) into
+    ingest_columns() input: one object-array column view per name.
+    """
+    table = np.empty((len(rows), len(names)), dtype=object)
+    if len(rows):
+        table[:] = rows
+    return {name: table[:, i] for i, name in enumerate(names)}
+
+
+def _utc(value: Any) -> pd.Timestamp:
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def derive_columns(df: pd.DataFrame, as_of: pd.Timestamp) -> None:
+    """
+    Add the frame columns that follow from direction and timestamp alone:
+    is_debit, in_last_30d / 60d / 90d (relative to `as_of`) and day_of_week.
+    """
+    df["is_debit"] = df["direction"] == "debit"
+    for days in (30, 60, 90):
+        df[f"in_last_{days}d"] = df["timestamp"] >= (as_of - pd.Timedelta(days=days))
+    df["day_of_week"] = df["timestamp"].dt.dayofweek.fillna(-1).astype("int8")  # 0=Monday, 6=Sunday
+    df["direction"] = df["direction"].astype("category")
+
+
+def airtime_candidates(frame: AnalysisFrame) -> pd.DataFrame:
+    """Small telco debits considered by the Airtime Drains detector."""
+    max_amount = frame.thresholds("airtime_drains")["max_amount"]
+    df = frame.df
+    return df[frame.matches("airtime") & df["is_debit"] & (df["abs_amount"] > 0) & (df["abs_amount"] <= max_amount)]
+
+
+def fee_candidates(frame: AnalysisFrame) -> pd.DataFrame:
+    """Fee debits considered by the Fee Leakage detector."""
+    df = frame.df
+    return df[frame.matches("fees") & df["is_debit"] & (df["abs_amount"] > 0)]
+
+
+# Multi-user screens (DetectorSpec.screen) for the detectors defined on the engine.
+def screen_airtime_drains(frame: AnalysisFrame, groups: Groups) -> np.ndarray:
+    limits = frame.thresholds("airtime_drains")
+    df = frame.df
+    candidates = (
+        frame.matches("airtime") & df["is_debit"] & (df["abs_amount"] > 0) & (df["abs_amount"] <= limits["max_amount"])
+    )
+    last_30 = candidates & df["in_last_30d"]
+    freq = groups.rows(last_30)
+    monthly_cost = np.where(
+        freq > 0, groups.total(last_30, df["abs_amount"]), groups.total(candidates, df["abs_amount"])
+    )
+    return (groups.rows(candidates) > 0) & (
+        (freq >= limits["min_count"]) | at_least(monthly_cost, limits["min_monthly_cost"])
+    )
+
+
+def screen_fee_leakage(frame: AnalysisFrame, groups: Groups) -> np.ndarray:
+    limits = frame.thresholds("fee_leakage")
+    df = frame.df
+    fees = frame.matches("fees") & df["is_debit"] & (df["abs_amount"] > 0)
+    last_30 = fees & df["in_last_30d"]
+    recent = groups.rows(last_30)
+    monthly_cost = np.where(recent > 0, groups.total(last_30, df["abs_amount"]), groups.total(fees, df["abs_amount"]))
+    count = np.where(recent > 0, recent, groups.rows(fees))
+    return (count > 0) & (at_least(monthly_cost, limits["min_monthly_cost"]) | (count >= limits["min_count"]))
+
+
+def screen_informal_loan_ratios(frame: AnalysisFrame, groups: Groups) -> np.ndarray:
+    limits = frame.thresholds("informal_loan_ratios")
+    df = frame.df
+    last_30 = df["is_debit"] & (df["abs_amount"] > 0) & df["in_last_30d"]
+    p2p_last_30 = last_30 & frame.matches("p2p")
+    p2p_total = groups.total(p2p_last_30, df["abs_amount"])
+    ratio = p2p_total / np.maximum(groups.total(last_30, df["abs_amount"]), 1.0)
+    tagged = groups.rows(p2p_last_30 & frame.matches("loan"))
+    return (groups.rows(p2p_last_30) > 0) & (
+        at_least(ratio, limits["min_ratio"])
+        | (tagged >= limits["min_loan_count"])
+        | at_least(p2p_total * limits["interest_rate"], limits["min_interest"])
+    )
+
+
+def screen_mailbox_effect(frame: AnalysisFrame, groups: Groups) -> np.ndarray:
+    # A dated large credit and a dated debit; the 48-hour windows are left to the detector.
+    min_credit = frame.thresholds("mailbox_effect")["min_credit"]
+    df = frame.df
+    dated = df["timestamp"].notna()
+    large_credits = groups.rows(dated & (df["direction"] == "credit") & (df["abs_amount"] >= min_credit))
+    return (large_credits > 0) & (groups.rows(dated & df["is_debit"]) > 0)
+
+
+def _history_totals(frame: AnalysisFrame, detector: str) -> Tuple[int, float]:
+    """(count, sum) of a detector's candidates that were folded out of an incremental frame."""
+    if frame.history is None:
+        return 0, 0.0
+    return frame.history.candidates.get(detector, (0, 0.0))
+
+
+def _latest_sample(frame: AnalysisFrame, detector: str, candidates: pd.DataFrame, n: int, columns: List[str]) -> Deferred:
+    older = frame.history.samples.get(detector) if frame.history is not None else None
+    return Deferred(partial(latest_records, candidates, n, columns, older))
+
+
+def _lean_dtypes(df: pd.DataFrame) -> None:
+    """
+    Swap the object string columns of a built frame for compact dtypes.
+
+    Runs after the keyword tags are computed, so only storage changes. Money
+    columns stay float64: abs_amount feeds sums and subscription group keys,
+    which float32 would shift by fractions of a cent.
+    """
+    for col in _LABEL_COLUMNS:
+        df[col] = df[col].astype("category")
+    for col in _FREE_TEXT_COLUMNS:
+        if _ARROW_STRINGS:
+            df[col] = df[col].astype("string[pyarrow]")
+        elif df[col].nunique() * 2 <= len(df):
+            df[col] = df[col].astype("category")
+
+
+def _timed_detector(
+    func: Callable[[AnalysisFrame], Leaks], frame: AnalysisFrame
+) -> Tuple[Leaks, float]:
+    # Module-level so it can be shipped to process-pool workers.
+    started = time.perf_counter()
+    found = func(frame)
+    return found, round((time.perf_counter() - started) * 1000, 3)
 
 
 class ForensicEngine:
@@ -20,17 +193,138 @@ class ForensicEngine:
     Designed to be explainable + plain-language for the Eastern Cape context.
     """
 
-    def ingest(self, transactions: List[Dict[str, Any]]) -> pd.DataFrame:
-        df = pd.DataFrame(transactions).copy()
+    def __init__(
+        self,
+        execution: str = "serial",
+        max_workers: Optional[int] = None,
+        lean: bool = False,
+        small_input_rows: int = SMALL_INPUT_ROWS,
+        rules: Union[Rules, RulesCatalog, None] = None,
+    ) -> None:
+        """
+        `execution` selects how detectors run once the frame is built:
+        "serial" (default), "thread" (a thread pool; pandas/NumPy release the
+        GIL for most of the heavy lifting) or "process" (a process pool, only
+        worth it for very large frames since each worker receives a pickled
+        copy of the frame). Leaks are reported in registry order either way.
+
+        `lean=True` stores the frame's text columns in compact dtypes (see
+        _lean_dtypes) for large histories; results are the same.
+
+        Inputs with fewer than `small_input_rows` transactions are analyzed in
+        pure Python (see small_engine) instead of pandas, with identical
+        results; 0 always uses pandas.
+
+        `rules` supplies detector keywords and thresholds: fixed Rules, or a
+        RulesCatalog that is re-checked for changes as each frame is built
+        (default: the bundled catalog, see detectors/rules.py).
+        """
+        if execution not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode: {execution}")
+        self.execution = execution
+        self.lean = lean
+        self.small_input_rows = small_input_rows
+        self.rules = rules if rules is not None else bundled_catalog()
+        self.max_workers = max_workers
+        self._executor: Optional[Executor] = None
+        self.registry = DetectorRegistry(
+            [
+                # Original detectors
+                DetectorSpec(
+                    "airtime_drains",
+                    self.detect_airtime_drains,
+                    _WINDOW_COLUMNS + ("keyword_mask", "description"),
+                    family="airtime",
+                    screen=screen_airtime_drains,
+                ),
+                DetectorSpec(
+                    "fee_leakage",
+                    self.detect_fee_leakage,
+                    _WINDOW_COLUMNS + ("keyword_mask", "description"),
+                    family="fees",
+                    screen=screen_fee_leakage,
+                ),
+                DetectorSpec(
+                    "informal_loan_ratios",
+                    self.detect_informal_loan_ratios,
+                    _WINDOW_COLUMNS + ("keyword_mask", "description", "counterparty"),
+                    family="p2p",
+                    screen=screen_informal_loan_ratios,
+                ),
+                # Enhanced detectors
+                DetectorSpec(
+                    "subscription_traps",
+                    detect_subscription_traps,
+                    ("id", "timestamp", "abs_amount", "is_debit", "merchant", "description"),
+                    cost=COST_EXPENSIVE,
+                    screen=screen_subscription_traps,
+                ),
+                DetectorSpec(
+                    "vas_charges",
+                    detect_vas_charges,
+                    _WINDOW_COLUMNS + ("keyword_mask", "description", "merchant"),
+                    family="vas",
+                    screen=screen_vas_charges,
+                ),
+                DetectorSpec(
+                    "debit_orders",
+                    detect_debit_orders,
+                    _WINDOW_COLUMNS + ("keyword_mask", "description", "merchant"),
+                    cost=COST_MODERATE,
+                    family="debit_order",
+                    screen=screen_debit_orders,
+                ),
+                DetectorSpec(
+                    "weekend_spending",
+                    detect_weekend_spending,
+                    ("abs_amount", "is_debit", "in_last_30d", "day_of_week"),
+                    screen=screen_weekend_spending,
+                ),
+                # MISSION: Mailbox Effect
+                DetectorSpec(
+                    "mailbox_effect",
+                    self.detect_mailbox_effect,
+                    ("id", "timestamp", "abs_amount", "is_debit", "direction"),
+                    cost=COST_MODERATE,
+                    direction="credit",
+                    screen=screen_mailbox_effect,
+                ),
+            ]
+        )
+
+    def current_rules(self) -> Rules:
+        """The rules the next analysis will use."""
+        return self.rules.current() if isinstance(self.rules, RulesCatalog) else self.rules
+
+    @property
+    def rules_version(self) -> str:
+        return self.current_rules().version
+
+    def ingest(self, transactions: List[Dict[str, Any]], as_of: Optional[pd.Timestamp] = None) -> AnalysisFrame:
+        return self._build_frame(pd.DataFrame(transactions), as_of)
+
+    def ingest_columns(self, columns: Mapping[str, Any], as_of: Optional[pd.Timestamp] = None) -> AnalysisFrame:
+        """
+        Columnar ingest: `columns` maps transaction fields (TRANSACTION_COLUMNS)
+        to equal-length sequences or NumPy arrays, e.g. from columns_from_rows().
+        Skips the per-row dicts of ingest(); missing fields are treated as empty.
+        """
+        # No copy: every column is replaced (not mutated) during normalization.
+        return self._build_frame(pd.DataFrame(dict(columns), copy=False), as_of)
+
+    def _build_frame(self, df: pd.DataFrame, as_of: Optional[pd.Timestamp]) -> AnalysisFrame:
+        as_of = _utc(as_of) if as_of is not None else pd.Timestamp.now(tz="UTC")
+        # Resolved once: every detector on this frame sees the same catalog version.
+        rules = self.current_rules()
         if df.empty:
-            return df
+            return AnalysisFrame(df=df, as_of=as_of, rules=rules)
 
         # Normalize expected fields
-        for col in ["id", "timestamp", "amount", "description", "merchant", "category", "counterparty", "direction", "channel"]:
+        for col in TRANSACTION_COLUMNS:
             if col not in df.columns:
                 df[col] = None
 
-        df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce", utc=True)
+        df["timestamp"] = to_utc_timestamps(df["timestamp"])
         df["amount"] = pd.to_numeric(df["amount"], errors="coerce").fillna(0.0)
         df["description"] = df["description"].fillna("").astype(str)
         df["merchant"] = df["merchant"].fillna("").astype(str)
@@ -45,46 +339,51 @@ class ForensicEngine:
         df.loc[missing_dir & (df["amount"] > 0), "direction"] = "credit"
         df["abs_amount"] = df["amount"].abs()
 
-        return df
+        # Shared features: built once here so detectors only filter.
+        text_codes, texts = factorize_text(df, TEXT_COLUMNS)
+        if self.lean:
+            # Distinct raw values can lowercase and join to the same text ("Airtime", "airtime").
+            text_ids, categories = pd.factorize(texts)
+            df["text"] = pd.Categorical.from_codes(text_ids[text_codes], categories)
+        else:
+            df["text"] = texts[text_codes]
+        df["keyword_mask"] = rules.keyword_index.tag(df, texts={TEXT_COLUMNS: (text_codes, texts)})
+        derive_columns(df, as_of)
+        df["channel"] = df["channel"].astype("category")
+        if self.lean:
+            _lean_dtypes(df)
+
+        return AnalysisFrame(df=df, as_of=as_of, rules=rules)
 
     # -----------------------------
     # Detectors
     # -----------------------------
-    def detect_airtime_drains(self, df: pd.DataFrame) -> List[Leak]:
+    def detect_airtime_drains(self, frame: AnalysisFrame) -> List[Leak]:
         """
         Airtime Drains:
         Identify repeated small telco-related purchases (e.g., airtime/data),
         especially if frequent (many small debits).
         """
-        if df.empty:
+        if frame.empty:
             return []
 
-        telco_keywords = [
-            "airtime",
-            "data",
-            "bundle",
-            "vodacom",
-            "mtn",
-            "cell c",
-            "telkom",
-            "prepaid",
-        ]
-
-        text = (df["description"] + " " + df["merchant"] + " " + df["category"]).str.lower()
-        is_telco = text.apply(lambda s: any(k in s for k in telco_keywords))
+        limits = frame.thresholds("airtime_drains")
+        older_count, older_sum = _history_totals(frame, "airtime_drains")
+        if not frame.windows.family("airtime").count and not older_count:
+            return []
 
-        candidates = df[is_telco & (df["direction"] == "debit") & (df["abs_amount"] > 0) & (df["abs_amount"] <= 50)]
-        if candidates.empty:
+        candidates = airtime_candidates(frame)
+        if candidates.empty and not older_count:
             return []
 
-        last_30 = candidates[candidates["timestamp"] >= (pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=30))]
+        last_30 = candidates[candidates["in_last_30d"]]
         freq = int(len(last_30))
-        monthly_cost = float(last_30["abs_amount"].sum()) if not last_30.empty else float(candidates["abs_amount"].sum())
+        monthly_cost = float(last_30["abs_amount"].sum()) if not last_30.empty else float(candidates["abs_amount"].sum()) + older_sum
 
-        if freq < 5 and monthly_cost < 150:
+        if freq < limits["min_count"] and monthly_cost < limits["min_monthly_cost"]:
             return []
 
-        severity = "high" if monthly_cost >= 300 or freq >= 12 else "medium"
+        severity = "high" if monthly_cost >= limits["high_monthly_cost"] or freq >= limits["high_count"] else "medium"
         return [
             Leak(
                 id="airtime-drain",
@@ -100,43 +399,36 @@ class ForensicEngine:
                 evidence={
                     "count_last_30_days": freq,
                     "sum_last_30_days": monthly_cost,
-                    "sample": candidates.sort_values("timestamp").tail(5)[["id", "timestamp", "abs_amount", "description"]].to_dict(orient="records"),
+                    "sample": _latest_sample(frame, "airtime_drains", candidates, limits["sample_size"], SAMPLE_COLUMNS),
                 },
             )
         ]
 
-    def detect_fee_leakage(self, df: pd.DataFrame) -> List[Leak]:
+    def detect_fee_leakage(self, frame: AnalysisFrame) -> List[Leak]:
         """
         Fee Leakage:
         Identify service fees / cash-out fees keywords and sum them.
         """
-        if df.empty:
+        if frame.empty:
             return []
 
-        fee_keywords = [
-            "service fee",
-            "charge",
-            "fee",
-            "cash-out",
-            "cash out",
-            "withdrawal fee",
-            "transfer fee",
-        ]
-
-        text = (df["description"] + " " + df["merchant"] + " " + df["category"]).str.lower()
-        is_fee = text.apply(lambda s: any(k in s for k in fee_keywords))
-        fees = df[is_fee & (df["direction"] == "debit") & (df["abs_amount"] > 0)]
-        if fees.empty:
+        limits = frame.thresholds("fee_leakage")
+        older_count, older_sum = _history_totals(frame, "fee_leakage")
+        all_time = frame.windows.family("fees")
+        if not all_time.count and not older_count:
             return []
 
-        last_30 = fees[fees["timestamp"] >= (pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=30))]
-        monthly_cost = float(last_30["abs_amount"].sum()) if not last_30.empty else float(fees["abs_amount"].sum())
-        count = int(len(last_30)) if not last_30.empty else int(len(fees))
+        recent = frame.windows.family("fees", 30)
+        monthly_cost = recent.total if recent.count else all_time.total + older_sum
+        count = recent.count if recent.count else all_time.count + older_count
 
-        if monthly_cost < 40 and count < 3:
+        if monthly_cost < limits["min_monthly_cost"] and count < limits["min_count"]:
             return []
 
-        severity = "high" if monthly_cost >= 150 else "medium"
+        fees = fee_candidates(frame)
+        last_30 = fees[fees["in_last_30d"]]
+
+        severity = "high" if monthly_cost >= limits["high_monthly_cost"] else "medium"
         return [
             Leak(
                 id="fee-leakage",
@@ -152,65 +444,43 @@ class ForensicEngine:
                 evidence={
                     "count_last_30_days": count,
                     "sum_last_30_days": monthly_cost,
-                    "sample": fees.sort_values("timestamp").tail(8)[["id", "timestamp", "abs_amount", "description"]].to_dict(orient="records"),
+                    "sample": _latest_sample(frame, "fee_leakage", fees, limits["sample_size"], SAMPLE_COLUMNS),
                 },
             )
         ]
 
-    def detect_informal_loan_ratios(self, df: pd.DataFrame) -> List[Leak]:
+    def detect_informal_loan_ratios(self, frame: AnalysisFrame) -> List[Leak]:
         """
         Informal Loan Ratios (Mashonisa):
         Flag frequent P2P transfers (non-bank) where many debits look like borrowing/repayment.
         Improved detection with better interest calculation.
         """
-        if df.empty:
+        if frame.empty:
             return []
 
-        p2p_keywords = [
-            "p2p",
-            "send money",
-            "momo",
-            "wallet",
-            "pay to",
-            "payto",
-            "e-wallet",
-            "ewallet",
-        ]
-        loan_keywords = ["loan", "borrow", "repay", "repayment", "stokvel", "sassa", "mashonisa", "mashonisa interest"]
-
-        text = (df["description"] + " " + df["counterparty"] + " " + df["channel"]).str.lower()
-        is_p2p = text.apply(lambda s: any(k in s for k in p2p_keywords))
-        looks_like_loan = text.apply(lambda s: any(k in s for k in loan_keywords))
-
-        debits = df[(df["direction"] == "debit") & (df["abs_amount"] > 0)]
-        if debits.empty:
+        limits = frame.thresholds("informal_loan_ratios")
+        spend = frame.windows.spend(30)
+        p2p = frame.windows.family("p2p", 30)
+        if not p2p.count:
             return []
 
-        last_30 = debits[debits["timestamp"] >= (pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=30))]
-        if last_30.empty:
-            return []
+        ratio = p2p.total / float(max(spend.total, 1.0))
+        # Estimate interest as a percentage of principal (simplified)
+        # Assume 20-50% interest rate for informal loans (conservative estimate)
+        estimated_interest = p2p.total * limits["interest_rate"]  # 15% of payments might be interest
 
-        p2p_last_30 = last_30[is_p2p.reindex(last_30.index, fill_value=False)]
-        if p2p_last_30.empty:
-            return []
+        df = frame.df
+        p2p_last_30 = df[frame.matches("p2p") & df["is_debit"] & (df["abs_amount"] > 0) & df["in_last_30d"]]
+        tagged = p2p_last_30[frame.rules.keyword_index.matches(p2p_last_30, "loan")]
 
-        ratio = float(p2p_last_30["abs_amount"].sum()) / float(max(last_30["abs_amount"].sum(), 1.0))
-        tagged = p2p_last_30[looks_like_loan.reindex(p2p_last_30.index, fill_value=False)]
-
-        # Calculate estimated interest (if we see regular payments to same counterparty)
-        estimated_interest = 0.0
-        if not p2p_last_30.empty:
-            counterparty_payments = p2p_last_30.groupby("counterparty")["abs_amount"].sum()
-            if len(counterparty_payments) > 0:
-                # Estimate interest as a percentage of principal (simplified)
-                total_p2p = float(p2p_last_30["abs_amount"].sum())
-                # Assume 20-50% interest rate for informal loans (conservative estimate)
-                estimated_interest = total_p2p * 0.15  # 15% of payments might be interest
-
-        if ratio < 0.25 and len(tagged) < 2 and estimated_interest < 50:
+        if (
+            ratio < limits["min_ratio"]
+            and len(tagged) < limits["min_loan_count"]
+            and estimated_interest < limits["min_interest"]
+        ):
             return []
 
-        severity = "high" if ratio >= 0.45 or estimated_interest >= 200 else "medium"
+        severity = "high" if ratio >= limits["high_ratio"] or estimated_interest >= limits["high_interest"] else "medium"
         return [
             Leak(
                 id="informal-loan-ratio",
@@ -223,100 +493,123 @@ class ForensicEngine:
                 ),
                 severity=severity,
                 transaction_id=str(p2p_last_30.sort_values("timestamp").iloc[-1]["id"]),
-                estimated_monthly_cost=float(p2p_last_30["abs_amount"].sum()),
+                estimated_monthly_cost=p2p.total,
                 evidence={
-                    "p2p_spend_last_30_days": float(p2p_last_30["abs_amount"].sum()),
-                    "total_spend_last_30_days": float(last_30["abs_amount"].sum()),
+                    "p2p_spend_last_30_days": p2p.total,
+                    "total_spend_last_30_days": spend.total,
                     "ratio": ratio,
                     "tagged_loan_like_count": int(len(tagged)),
                     "estimated_interest": float(estimated_interest),
-                    "sample": p2p_last_30.sort_values("timestamp").tail(6)[["id", "timestamp", "abs_amount", "description", "counterparty"]].to_dict(
-                        orient="records"
+                    "sample": Deferred(
+                        partial(
+                            latest_records,
+                            p2p_last_30,
+                            limits["sample_size"],
+                            ["id", "timestamp", "abs_amount", "description", "counterparty"],
+                        )
                     ),
                 },
             )
         ]
 
-    def detect_mailbox_effect(self, df: pd.DataFrame) -> List[Leak]:
+    def detect_mailbox_effect(self, frame: AnalysisFrame) -> List[Leak]:
         """
         Mailbox Effect Detector (Eastern Cape Hackathon Mission):
         Detects if large credits (salaries/grants) are immediately withdrawn in full/large part.
         """
-        if df.empty:
+        if frame.empty:
             return []
 
+        # Incremental analysis: the first pass-through credit was already found earlier.
+        if frame.history is not None and frame.history.mailbox_hit is not None:
+            return [Leak(**frame.history.mailbox_hit)]
+
+        limits = frame.thresholds("mailbox_effect")
+        df = frame.df
+
         # Find large credits (>= R500)
         credits = df[df["direction"] == "credit"]
-        large_credits = credits[credits["abs_amount"] >= 500]
+        large_credits = credits[credits["abs_amount"] >= limits["min_credit"]]
         
         if large_credits.empty:
             return []
 
-        mailbox_leaks = []
-        for idx, row in large_credits.iterrows():
-            credit_time = row["timestamp"]
-            credit_amount = row["abs_amount"]
-            
-            # Look for withdrawals/debits within 48 hours after this credit
-            window_end = credit_time + pd.Timedelta(hours=48)
-            following_debits = df[(df["direction"] == "debit") & (df["timestamp"] > credit_time) & (df["timestamp"] <= window_end)]
-            
-            total_withdrawn = following_debits["abs_amount"].sum()
-            
-            if total_withdrawn >= (credit_amount * 0.8):
-                # Detected Mailbox Effect
-                mailbox_leaks.append(
-                    Leak(
-                        id=f"mailbox-effect-{row['id']}",
-                        detector="MailboxEffect",
-                        title="Passing through: Mailbox Effect detected",
-                        plain_language_reason=(
-                            f"You received R{credit_amount:.0f} and withdrew/spent about {total_withdrawn/credit_amount*100:.0f}% of it "
-                            "within 48 hours. This 'pass-through' behavior often leads to high fees and low financial resilience."
-                        ),
-                        severity="high",
-                        transaction_id=str(row["id"]),
-                        estimated_monthly_cost=total_withdrawn * 0.05, # Estimated 5% loss in fees/informal costs
-                        evidence={
-                            "credit_amount": credit_amount,
-                            "withdrawn_amount": total_withdrawn,
-                            "withdrawal_ratio": total_withdrawn / credit_amount,
-                            "window_hours": 48
-                        }
-                    )
-                )
-        
-        return mailbox_leaks[:1]
+        # Debits on a sorted time axis with a running total, so each credit's
+        # 48-hour window sum is two binary searches instead of a frame scan.
+        debits = df[df["is_debit"] & df["timestamp"].notna()]
+        debit_times = debits["timestamp"].to_numpy(dtype="datetime64[ns]")
+        order = np.argsort(debit_times, kind="stable")
+        debit_times = debit_times[order]
+        debit_amounts = debits["abs_amount"].to_numpy(dtype="float64")[order]
+        running = np.concatenate(([0.0], np.cumsum(debit_amounts)))
 
-    def calculate_inclusion_score(self, df: pd.DataFrame, leaks: List[Leak]) -> Dict[str, Any]:
+        credit_times = large_credits["timestamp"].to_numpy(dtype="datetime64[ns]")
+        credit_amounts = large_credits["abs_amount"].to_numpy(dtype="float64")
+        window_start = np.searchsorted(debit_times, credit_times, side="right")
+        window_end = np.searchsorted(debit_times, credit_times + np.timedelta64(int(limits["window_hours"] * 3600), "s"), side="right")
+        withdrawn = running[window_end] - running[window_start]
+
+        # Look for withdrawals/debits within 48 hours after each credit
+        hits = np.flatnonzero(~np.isnat(credit_times) & (withdrawn >= credit_amounts * limits["withdrawal_ratio"]))
+        if hits.size == 0:
+            return []
+
+        # Only the first pass-through credit is reported.
+        hit = int(hits[0])
+        credit_id = large_credits["id"].iloc[hit]
+        credit_amount = float(credit_amounts[hit])
+        total_withdrawn = float(debit_amounts[window_start[hit] : window_end[hit]].sum())
+
+        return [
+            Leak(
+                id=f"mailbox-effect-{credit_id}",
+                detector="MailboxEffect",
+                title="Passing through: Mailbox Effect detected",
+                plain_language_reason=(
+                    f"You received R{credit_amount:.0f} and withdrew/spent about {total_withdrawn/credit_amount*100:.0f}% of it "
+                    f"within {limits['window_hours']:g} hours. This 'pass-through' behavior often leads to high fees and low financial resilience."
+                ),
+                severity="high",
+                transaction_id=str(credit_id),
+                estimated_monthly_cost=total_withdrawn * limits["fee_rate"], # Estimated 5% loss in fees/informal costs
+                evidence={
+                    "credit_amount": credit_amount,
+                    "withdrawn_amount": total_withdrawn,
+                    "withdrawal_ratio": total_withdrawn / credit_amount,
+                    "window_hours": limits["window_hours"]
+                }
+            )
+        ]
+
+    def calculate_inclusion_score(self, frame: AnalysisFrame, leaks: Leaks) -> Dict[str, Any]:
         """
         Hybrid Inclusion Score (MNO Bonus):
         An alternative credit score based on MNO consistency and forensic stability.
         """
-        if df.empty:
+        if frame.empty:
             return {"score": 0, "level": "N/A"}
 
+        mno_seen = frame.windows.family("mno", spend=False).count > 0 or (
+            frame.history is not None and frame.history.mno_seen
+        )
+        telco_last_30 = frame.windows.family("mno", 30, spend=False).count
+        return self._inclusion_score(telco_last_30, mno_seen, frame.row_count, leaks)
+
+    def _inclusion_score(self, telco_last_30: int, mno_seen: bool, row_count: int, leaks: Leaks) -> Dict[str, Any]:
         base_score = 50.0
 
         # 1. MNO Consistency Reward
-        telco_keywords = ["airtime", "data", "mtn", "vodacom", "cell c", "telkom", "momo"]
-        text = (df["description"] + " " + df["merchant"]).str.lower()
-        is_telco = text.apply(lambda s: any(k in s for k in telco_keywords))
-        telco_txs = df[is_telco]
-        
-        if not telco_txs.empty:
-            last_30 = telco_txs[telco_txs["timestamp"] >= (pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=30))]
-            if len(last_30) >= 3:
-                base_score += 15.0
-            elif len(last_30) >= 1:
-                base_score += 5.0
+        if telco_last_30 >= 3:
+            base_score += 15.0
+        elif telco_last_30 >= 1:
+            base_score += 5.0
 
         # 2. Forensic Stability
-        high_severity_leaks = [l for l in leaks if l.severity == "high"]
+        high_severity_leaks = [s for s in leak_values(leaks, "severity") if s == "high"]
         base_score -= (len(high_severity_leaks) * 10.0)
 
         # 3. Transaction Depth
-        if len(df) > 20:
+        if row_count > 20:
             base_score += 10.0
         
         final_score = int(max(0, min(100, base_score)))
@@ -325,45 +618,356 @@ class ForensicEngine:
         return {
             "score": final_score,
             "level": level,
-            "mno_consistency": True if not telco_txs.empty else False
+            "mno_consistency": mno_seen
         }
 
     # -----------------------------
     # Scoring + orchestration
     # -----------------------------
-    def analyze(self, transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
-        df = self.ingest(transactions)
-
-        leaks: List[Leak] = []
-        # Original detectors
-        leaks.extend(self.detect_airtime_drains(df))
-        leaks.extend(self.detect_fee_leakage(df))
-        leaks.extend(self.detect_informal_loan_ratios(df))
-        
-        # Enhanced detectors
-        leaks.extend(detect_subscription_traps(df))
-        leaks.extend(detect_vas_charges(df))
-        leaks.extend(detect_debit_orders(df))
-        leaks.extend(detect_weekend_spending(df))
+    def run_detectors(
+        self, frame: AnalysisFrame, specs: Iterable[DetectorSpec]
+    ) -> Tuple[Leaks, List[Dict[str, Any]]]:
+        """Run the given detectors over a frame, timing each one."""
+        specs = list(specs)
+        for spec in specs:
+            missing = [col for col in spec.columns if col not in frame.df.columns] if not frame.empty else []
+            if missing:
+                raise ValueError(f"Detector {spec.name} needs missing columns: {', '.join(missing)}")
 
-        # MISSION: Mailbox Effect
-        leaks.extend(self.detect_mailbox_effect(df))
+        if self.execution == "serial" or len(specs) < 2 or frame.empty:
+            outcomes = [_timed_detector(spec.func, frame) for spec in specs]
+        else:
+            executor = self._get_executor()
+            futures = [executor.submit(_timed_detector, spec.func, frame) for spec in specs]
+            # Collect in submission order so leak ordering stays deterministic.
+            outcomes = [future.result() for future in futures]
 
-        score = self._score(df, leaks)
-        band = "green" if score >= 75 else "yellow" if score >= 50 else "red"
-        summary = self._summary_plain_language(score, band, leaks)
+        leaks: Leaks = []
+        timings: List[Dict[str, Any]] = []
+        for spec, (found, wall_ms) in zip(specs, outcomes):
+            timings.append(
+                {
+                    "name": spec.name,
+                    "cost": spec.cost,
+                    "wall_ms": wall_ms,
+                    "candidate_rows": spec.candidate_rows(frame),
+                    "leaks": leak_count(found),
+                }
+            )
+            leaks.extend(found)
+        return leaks, timings
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.execution == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="forensic-detector"
+                )
+        return self._executor
+
+    def close(self) -> None:
+        """Shut down the detector pool, if one was started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Bound detector methods pickle the engine for process workers; pools don't pickle.
+        state = self.__dict__.copy()
+        state["_executor"] = None
+        return state
+
+    def analyze(
+        self,
+        transactions: List[Dict[str, Any]],
+        profile: str = "full",
+        detectors: Optional[Iterable[str]] = None,
+        diagnostics: bool = False,
+        as_of: Optional[pd.Timestamp] = None,
+        evidence: str = "full",
+    ) -> Dict[str, Any]:
+        """
+        Run the forensic detectors over a transaction list.
+
+        `profile` ("fast" | "full") and `detectors` (registry names) restrict
+        which detectors run. Per-detector timings are always logged; pass
+        `diagnostics=True` to also return them in a "diagnostics" block.
+        `as_of` is the analysis clock (default: now); the 30/60/90-day windows
+        and recency checks are relative to it, so a fixed value makes the
+        result reproducible. `evidence` ("none" | "summary" | "full") sets how
+        much leak evidence is returned; only "full" builds the sample rows
+        (see detectors/evidence.py).
+        """
+        check_evidence(evidence)
+        if 0 < len(transactions) < self.small_input_rows:
+            result = self._analyze_small(transactions, profile, detectors, diagnostics, as_of, evidence)
+            if result is not None:
+                return result
+        started = time.perf_counter()
+        frame = self.ingest(transactions, as_of=as_of)
+        ingest_ms = round((time.perf_counter() - started) * 1000, 3)
+        return self.analyze_frame(frame, profile, detectors, diagnostics, ingest_ms=ingest_ms, evidence=evidence)
+
+    def analyze_columns(
+        self,
+        columns: Mapping[str, Any],
+        profile: str = "full",
+        detectors: Optional[Iterable[str]] = None,
+        diagnostics: bool = False,
+        as_of: Optional[pd.Timestamp] = None,
+        evidence: str = "full",
+    ) -> Dict[str, Any]:
+        """analyze() for columnar input; see ingest_columns()."""
+        check_evidence(evidence)
+        rows = len(next(iter(columns.values()), ()))
+        if 0 < rows < self.small_input_rows:
+            transactions = [{field: values[i] for field, values in columns.items()} for i in range(rows)]
+            result = self._analyze_small(transactions, profile, detectors, diagnostics, as_of, evidence)
+            if result is not None:
+                return result
+        started = time.perf_counter()
+        frame = self.ingest_columns(columns, as_of=as_of)
+        ingest_ms = round((time.perf_counter() - started) * 1000, 3)
+        return self.analyze_frame(frame, profile, detectors, diagnostics, ingest_ms=ingest_ms, evidence=evidence)
+
+    def analyze_frame(
+        self,
+        frame: AnalysisFrame,
+        profile: str = "full",
+        detectors: Optional[Iterable[str]] = None,
+        diagnostics: bool = False,
+        ingest_ms: float = 0.0,
+        evidence: str = "full",
+    ) -> Dict[str, Any]:
+        """Score an already-ingested frame; see analyze()."""
+        check_evidence(evidence)
+        specs = self.registry.select(profile, detectors)
+        started = time.perf_counter()
+
+        leaks, timings = self.run_detectors(frame, specs)
 
         # MISSION: Hybrid Inclusion Score
-        inclusion = self.calculate_inclusion_score(df, leaks)
+        inclusion = self.calculate_inclusion_score(frame, leaks)
+        return self._result(
+            leaks,
+            timings,
+            inclusion,
+            frame.row_count,
+            thin=frame.empty or frame.row_count < 8,
+            profile=profile,
+            diagnostics=diagnostics,
+            ingest_ms=ingest_ms,
+            started=started,
+            evidence=evidence,
+        )
+
+    def analyze_many(
+        self,
+        transactions: List[Dict[str, Any]],
+        key: str = "user_id",
+        profile: str = "full",
+        detectors: Optional[Iterable[str]] = None,
+        diagnostics: bool = False,
+        as_of: Optional[pd.Timestamp] = None,
+        evidence: str = "full",
+    ) -> Dict[Any, Dict[str, Any]]:
+        """
+        analyze() for many users at once, for sync pipelines and re-analysis.
+
+        Every transaction carries a `key` field (e.g. "user_id" or
+        "account_id"); the result maps each key value, in first-seen order, to
+        what analyze() returns for that user's transactions. Rows without a key
+        are ignored.
+
+        The batch is ingested once (one pandas setup instead of one per user),
+        and each detector's screen (DetectorSpec.screen) checks every user's
+        thresholds in one grouped pass over all rows. This is grouped
+        screening, not grouped detection: a detector still runs once per user
+        whose screen passes, over that user's slice of the frame. Users no
+        detector can report on cost only their share of the grouped passes,
+        but when every user screens in, the work is users × detectors runs.
+        """
+        started = time.perf_counter()
+        frame = self.ingest(transactions, as_of=as_of)
+        ingest_ms = round((time.perf_counter() - started) * 1000, 3)
+        return self.analyze_frame_many(
+            frame, key, profile, detectors, diagnostics, ingest_ms=ingest_ms, evidence=evidence
+        )
+
+    def analyze_many_columns(
+        self,
+        columns: Mapping[str, Any],
+        key: str = "user_id",
+        profile: str = "full",
+        detectors: Optional[Iterable[str]] = None,
+        diagnostics: bool = False,
+        as_of: Optional[pd.Timestamp] = None,
+        evidence: str = "full",
+    ) -> Dict[Any, Dict[str, Any]]:
+        """analyze_many() for columnar input; see ingest_columns()."""
+        started = time.perf_counter()
+        frame = self.ingest_columns(columns, as_of=as_of)
+        ingest_ms = round((time.perf_counter() - started) * 1000, 3)
+        return self.analyze_frame_many(
+            frame, key, profile, detectors, diagnostics, ingest_ms=ingest_ms, evidence=evidence
+        )
+
+    def analyze_frame_many(
+        self,
+        frame: AnalysisFrame,
+        key: str,
+        profile: str = "full",
+        detectors: Optional[Iterable[str]] = None,
+        diagnostics: bool = False,
+        ingest_ms: float = 0.0,
+        evidence: str = "full",
+    ) -> Dict[Any, Dict[str, Any]]:
+        """
+        Score an already-ingested multi-user frame; see analyze_many().
+        Per-user diagnostics report the shared ingest time of the batch.
+        """
+        check_evidence(evidence)
+        specs = self.registry.select(profile, detectors)
+        if frame.empty:
+            return {}
+        if key not in frame.df.columns:
+            raise ValueError(f"Transactions have no {key!r} field to group by")
+
+        df = frame.df
+        groups = Groups.of(df[key])
+        candidates = {spec.name: spec.candidate_rows_by_group(frame, groups) for spec in specs}
+        screened = {
+            spec.name: spec.screen(frame, groups) if spec.screen is not None else candidates[spec.name] > 0
+            for spec in specs
+        }
+        telco = frame.matches("mno")
+        telco_last_30 = groups.rows(telco & df["in_last_30d"])
+        mno_seen = groups.rows(telco) > 0
+
+        results: Dict[Any, Dict[str, Any]] = {}
+        for group, positions in enumerate(groups.positions()):
+            started = time.perf_counter()
+            user_frame = AnalysisFrame(df=df.take(positions), as_of=frame.as_of, rules=frame.rules)
+            active = [spec for spec in specs if screened[spec.name][group]]
+            leaks, ran = self.run_detectors(user_frame, active) if active else ([], [])
+
+            ran_by_name = {timing["name"]: timing for timing in ran}
+            timings = [
+                ran_by_name.get(spec.name)
+                or {
+                    "name": spec.name,
+                    "cost": spec.cost,
+                    "wall_ms": 0.0,
+                    "candidate_rows": int(candidates[spec.name][group]),
+                    "leaks": 0,
+                }
+                for spec in specs
+            ]
+            rows = len(positions)
+            inclusion = self._inclusion_score(int(telco_last_30[group]), bool(mno_seen[group]), rows, leaks)
+            results[groups.keys[group]] = self._result(
+                leaks,
+                timings,
+                inclusion,
+                rows,
+                thin=rows < 8,
+                profile=profile,
+                diagnostics=diagnostics,
+                ingest_ms=ingest_ms,
+                started=started,
+                evidence=evidence,
+            )
+        return results
+
+    def _analyze_small(
+        self,
+        transactions: Sequence[Mapping[str, Any]],
+        profile: str,
+        detectors: Optional[Iterable[str]],
+        diagnostics: bool,
+        as_of: Optional[pd.Timestamp],
+        evidence: str,
+    ) -> Optional[Dict[str, Any]]:
+        """The small_engine path of analyze(); None when the input needs pandas."""
+        specs = self.registry.select(profile, detectors)
+        if any(spec.name not in small_engine.DETECTORS for spec in specs):
+            return None  # a detector registered without a pure-Python port
+        started = time.perf_counter()
+        as_of = _utc(as_of) if as_of is not None else pd.Timestamp.now(tz="UTC")
+        rules = self.current_rules()
+        rows = small_engine.prepare_rows(transactions, as_of, rules)
+        if rows is None:
+            return None
+        ingest_ms = round((time.perf_counter() - started) * 1000, 3)
+
+        started = time.perf_counter()
+        leaks: Leaks = []
+        timings: List[Dict[str, Any]] = []
+        for spec in specs:
+            found, wall_ms = _timed_detector(partial(small_engine.DETECTORS[spec.name], as_of=as_of, rules=rules), rows)
+            timings.append(
+                {
+                    "name": spec.name,
+                    "cost": spec.cost,
+                    "wall_ms": wall_ms,
+                    "candidate_rows": small_engine.candidate_rows(rows, spec.family, spec.direction, rules),
+                    "leaks": leak_count(found),
+                }
+            )
+            leaks.extend(found)
+
+        telco_last_30, mno_seen = small_engine.inclusion_counts(rows, rules)
+        inclusion = self._inclusion_score(telco_last_30, mno_seen, len(rows), leaks)
+        return self._result(
+            leaks,
+            timings,
+            inclusion,
+            len(rows),
+            thin=len(rows) < 8,
+            profile=profile,
+            diagnostics=diagnostics,
+            ingest_ms=ingest_ms,
+            started=started,
+            evidence=evidence,
+        )
+
+    def _result(
+        self,
+        leaks: Leaks,
+        timings: List[Dict[str, Any]],
+        inclusion: Dict[str, Any],
+        rows: int,
+        thin: bool,
+        profile: str,
+        diagnostics: bool,
+        ingest_ms: float,
+        started: float,
+        evidence: str = "full",
+    ) -> Dict[str, Any]:
+        """Score detector output into the analyze() result (shared by the pandas and small-input paths)."""
+        score = self._score(leaks, thin)
+        band = "green" if score >= 75 else "yellow" if score >= 50 else "red"
+        summary = self._summary_plain_language(score, band, leaks)
 
         # HACKATHON: Advanced Stakeholder Metrics
         inclusion_delta = self.calculate_inclusion_delta(inclusion["score"], leaks)
         retail_velocity = self.calculate_retail_velocity(leaks)
 
-        return {
+        total_ms = round(ingest_ms + (time.perf_counter() - started) * 1000, 3)
+        logger.info(
+            "forensic analysis completed",
+            extra={
+                "duration_ms": total_ms,
+                "detector_timings": {t["name"]: t["wall_ms"] for t in timings},
+            },
+        )
+
+        result: Dict[str, Any] = {
             "financial_health_score": score,
             "health_band": band,
-            "money_leaks": [self._leak_to_dict(l) for l in leaks],
+            "money_leaks": leak_dicts(leaks, evidence),
             "summary_plain_language": summary,
             "inclusion_metrics": inclusion,
             "stakeholder_metrics": {
@@ -372,61 +976,59 @@ class ForensicEngine:
                 "potential_recovered_capital": retail_velocity
             }
         }
+        if diagnostics:
+            result["diagnostics"] = {
+                "profile": profile,
+                "rows": rows,
+                "ingest_ms": ingest_ms,
+                "total_ms": total_ms,
+                "detectors": timings,
+            }
+        return result
 
-    def calculate_inclusion_delta(self, hybrid_score: int, leaks: List[Leak]) -> int:
+    def calculate_inclusion_delta(self, hybrid_score: int, leaks: Leaks) -> int:
         """
         Calculates the 'Inclusion Delta'—how much TracePay improves a user's 
         credit-worthiness profile compared to traditional banking metrics.
         """
         # Traditional bank score would be lower if high leaks/mailbox effect present
-        mailbox_penalty = 25 if any(l.detector == "MailboxEffect" for l in leaks) else 0
+        mailbox_penalty = 25 if any(d == "MailboxEffect" for d in leak_values(leaks, "detector")) else 0
         traditional_score = max(0, hybrid_score - 15 - mailbox_penalty)
         return hybrid_score - traditional_score
 
-    def calculate_retail_velocity(self, leaks: List[Leak]) -> float:
+    def calculate_retail_velocity(self, leaks: Leaks) -> float:
         """
         Estimates the monthly Rand value that can be 'redirected' from leaks 
         back into the local retail economy.
         """
-        return sum(l.estimated_monthly_cost for l in leaks if l.estimated_monthly_cost)
+        return sum(cost for cost in leak_values(leaks, "estimated_monthly_cost") if cost)
 
-    def _score(self, df: pd.DataFrame, leaks: List[Leak]) -> int:
+    def _score(self, leaks: Leaks, thin: bool) -> int:
         # Start at 100 and subtract penalties based on severity + estimated leakage.
         score = 100.0
 
         sev_penalty = {"low": 8, "medium": 18, "high": 30}
-        for leak in leaks:
-            score -= sev_penalty.get(leak.severity, 12)
-            if leak.estimated_monthly_cost:
-                score -= min(25.0, leak.estimated_monthly_cost / 20.0)  # e.g. R500 => -25 max
+        for severity, cost in zip(leak_values(leaks, "severity"), leak_values(leaks, "estimated_monthly_cost")):
+            score -= sev_penalty.get(severity, 12)
+            if cost:
+                score -= min(25.0, cost / 20.0)  # e.g. R500 => -25 max
 
         # If we have few/no transactions, reduce confidence slightly.
-        if df.empty or len(df) < 8:
+        if thin:
             score -= 10.0
 
         return int(max(0, min(100, round(score))))
 
-    def _summary_plain_language(self, score: int, band: str, leaks: List[Leak]) -> str:
+    def _summary_plain_language(self, score: int, band: str, leaks: Leaks) -> str:
         if not leaks:
             return "No big money leaks found. Keep tracking your spending and check again after a few days."
 
-        top = sorted(leaks, key=lambda l: {"high": 0, "medium": 1, "low": 2}.get(l.severity, 9))[0]
+        ranked = zip(leak_values(leaks, "severity"), leak_values(leaks, "title"))
+        _, top_title = sorted(ranked, key=lambda leak: {"high": 0, "medium": 1, "low": 2}.get(leak[0], 9))[0]
         if band == "red":
-            return f"Warning: your money is leaking. Biggest issue: {top.title}. Tap Freeze to simulate stopping it."
+            return f"Warning: your money is leaking. Biggest issue: {top_title}. Tap Freeze to simulate stopping it."
         if band == "yellow":
-            return f"Your finances are under pressure. Biggest issue: {top.title}. Small changes can help fast."
-        return f"Looking good overall. Still, watch out for: {top.title}."
-
-    def _leak_to_dict(self, leak: Leak) -> Dict[str, Any]:
-        return {
-            "id": leak.id,
-            "detector": leak.detector,
-            "title": leak.title,
-            "plain_language_reason": leak.plain_language_reason,
-            "severity": leak.severity,
-            "transaction_id": leak.transaction_id,
-            "estimated_monthly_cost": leak.estimated_monthly_cost,
-            "evidence": leak.evidence or {},
-        }
+            return f"Your finances are under pressure. Biggest issue: {top_title}. Small changes can help fast."
+        return f"Looking good overall. Still, watch out for: {top_title}."
 
 
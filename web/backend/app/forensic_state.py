@@ -0,0 +1,342 @@
+"""
+Incremental forensic analysis for account syncs.
+
+A sync usually brings in a handful of new transactions, so instead of
+re-analysing an account's whole history we persist a compact state per
+linked account and fold only the new rows into it:
+
+- the rows of the last WINDOW days, which the trailing-window detectors
+  (30-day sums, 48-hour mailbox windows) read, reduced to the detector input
+  columns with their keyword tags (WINDOW_COLUMNS), so they are never
+  re-ingested
+- all-time aggregates for rows older than that (see FrameHistory): candidate
+  totals and samples, per-merchant recurrence counters, the mailbox hit
+- a watermark: the start of the window at the last fold. Rows before it
+  only live on in the aggregates, which cannot take a late row in its
+  place, so a new row dated before the watermark rebuilds the state from
+  the full list. Other new rows are folded in unless their id is already
+  in the window, so a row sent twice is not double-counted.
+
+Folding produces the same result as a full run over the same transactions.
+Row order can differ from the provider's (tie-breaks on equal timestamps,
+the "first" mailbox credit), so the state is rebuilt from scratch every
+FULL_RECOMPUTE_FOLDS folds or FULL_RECOMPUTE_AGE, whichever comes first.
+The keyword tags and carried aggregates depend on the rules, so a state
+built under another rules catalog version is rebuilt too.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from .detectors.evidence import check_evidence, latest_positions
+from .detectors.frame import AnalysisFrame, FrameHistory
+from .detectors.subscription_traps import (
+    GROUP_COLUMNS,
+    merge_subscription_groups,
+    summarize_subscription_groups,
+)
+from .forensic_engine import (
+    SAMPLE_COLUMNS,
+    ForensicEngine,
+    airtime_candidates,
+    derive_columns,
+    fee_candidates,
+)
+from .models_db import ForensicState, LinkedAccount
+from .timestamps import to_utc_timestamps
+
+STATE_VERSION = 2
+# The longest trailing window a detector reads (in_last_30d).
+WINDOW = timedelta(days=30)
+FULL_RECOMPUTE_FOLDS = 24
+FULL_RECOMPUTE_AGE = pd.Timedelta(days=7)
+
+# Detector input columns (see DetectorSpec.columns) kept per window row; the
+# rest are rebuilt by derive_columns().
+WINDOW_COLUMNS = [
+    "id",
+    "timestamp",
+    "abs_amount",
+    "direction",
+    "keyword_mask",
+    "description",
+    "merchant",
+    "counterparty",
+]
+
+# Detectors that fall back to all-time totals; samples keep their "sample_size" threshold.
+_CARRIED = {
+    "airtime_drains": airtime_candidates,
+    "fee_leakage": fee_candidates,
+}
+
+
+@dataclass
+class IncrementalState:
+    window: pd.DataFrame
+    history: FrameHistory
+    built_at: pd.Timestamp
+    # Start of the window: every row folded in since is still in `window`;
+    # an older new row cannot be folded in (see analyze_incremental).
+    watermark: pd.Timestamp
+    folds: int = 0
+    version: int = STATE_VERSION
+    rules_version: Optional[str] = None
+
+    def needs_full_recompute(self, now: Optional[pd.Timestamp] = None, rules_version: Optional[str] = None) -> bool:
+        now = now if now is not None else pd.Timestamp.now(tz="UTC")
+        return (
+            self.version != STATE_VERSION
+            or (rules_version is not None and self.rules_version != rules_version)
+            or self.folds >= FULL_RECOMPUTE_FOLDS
+            or now - self.built_at >= FULL_RECOMPUTE_AGE
+        )
+
+    def unseen(self, df: pd.DataFrame) -> pd.Series:
+        """Mask of the rows of `df` that were not folded in before."""
+        # Only for rows dated at or after the watermark; undated rows never leave the window.
+        return ~df["id"].isin(self.window["id"])
+
+    def predates(self, df: pd.DataFrame) -> bool:
+        """Whether `df` has a row dated before the watermark."""
+        return bool((df["timestamp"] < self.watermark).any())
+
+
+def build_state(
+    engine: ForensicEngine, transactions: List[Dict[str, Any]], evidence: str = "full"
+) -> Tuple[Dict[str, Any], IncrementalState]:
+    """Full analysis of `transactions`, plus the state to fold later syncs into."""
+    _check_state_evidence(evidence)
+    frame = engine.ingest(transactions)
+    result = engine.analyze_frame(frame, evidence=evidence)
+    window, history = _expire(frame, FrameHistory())
+    history = replace(history, mailbox_hit=_mailbox_hit(result))
+    return result, IncrementalState(
+        window=_window_rows(window),
+        history=history,
+        built_at=frame.as_of,
+        watermark=frame.as_of - WINDOW,
+        rules_version=frame.rules.version,
+    )
+
+
+def analyze_incremental(
+    engine: ForensicEngine,
+    state: Optional[IncrementalState],
+    transactions: List[Dict[str, Any]],
+    new_transactions: List[Dict[str, Any]],
+    evidence: str = "full",
+) -> Tuple[Dict[str, Any], IncrementalState]:
+    """
+    Fold `new_transactions` into `state` and analyse the result.
+
+    Only `new_transactions` are ingested; rows already folded in (see
+    IncrementalState.unseen) are skipped. `transactions` is the account's full
+    list; it is only ingested when the state is missing, due for a full
+    recompute, has no recent rows left, or a new row predates the watermark.
+    """
+    _check_state_evidence(evidence)
+    if state is None or state.needs_full_recompute(rules_version=engine.rules_version):
+        return build_state(engine, transactions, evidence)
+
+    new = engine.ingest(new_transactions)
+    if new.rules.version != state.rules_version:
+        return build_state(engine, transactions, evidence)  # the catalog was reloaded in between
+    if not new.empty and state.predates(new.df):
+        return build_state(engine, transactions, evidence)  # back-dated: its period is aggregated
+    fresh = _window_rows(new.df.loc[state.unseen(new.df)] if not new.empty else new.df)
+    df = pd.concat([state.window, fresh], ignore_index=True)
+    derive_columns(df, new.as_of)
+    window, history = _expire(AnalysisFrame(df=df, as_of=new.as_of, rules=new.rules), state.history)
+    if window.empty:
+        return build_state(engine, transactions, evidence)
+
+    result = engine.analyze_frame(
+        AnalysisFrame(df=window, as_of=new.as_of, history=history, rules=new.rules), evidence=evidence
+    )
+    if history.mailbox_hit is None:
+        history = replace(history, mailbox_hit=_mailbox_hit(result))
+    return result, IncrementalState(
+        window=_window_rows(window),
+        history=history,
+        built_at=state.built_at,
+        watermark=new.as_of - WINDOW,
+        folds=state.folds + 1,
+        rules_version=state.rules_version,
+    )
+
+
+def analyze_account(
+    db: Session,
+    engine: ForensicEngine,
+    account: LinkedAccount,
+    transactions: List[Dict[str, Any]],
+    new_transactions: List[Dict[str, Any]],
+    evidence: str = "full",
+) -> Dict[str, Any]:
+    """analyze_incremental() against the account's stored state; the caller commits."""
+    row = db.query(ForensicState).filter(ForensicState.account_id == account.id).first()
+    state = state_from_json(row.state) if row is not None and row.version == STATE_VERSION else None
+
+    result, state = analyze_incremental(engine, state, transactions, new_transactions, evidence)
+
+    if row is None:
+        row = ForensicState(user_id=account.user_id, account_id=account.id)
+        db.add(row)
+    row.version = state.version
+    row.folds = state.folds
+    row.state = state_to_json(state)
+    row.built_at = state.built_at.to_pydatetime()
+    row.updated_at = datetime.utcnow()
+    return result
+
+
+def _expire(frame: AnalysisFrame, history: FrameHistory) -> Tuple[pd.DataFrame, FrameHistory]:
+    """Move rows older than WINDOW out of the frame and into `history`."""
+    df = frame.df
+    if df.empty:
+        return df, history
+    # NaT compares False, so undated rows are always retained.
+    expired_mask = (df["timestamp"] < frame.as_of - WINDOW).to_numpy()
+    if not expired_mask.any():
+        return df, history
+
+    expired = AnalysisFrame(df=df[expired_mask], as_of=frame.as_of, rules=frame.rules)
+    candidates = dict(history.candidates)
+    samples = dict(history.samples)
+    for name, select in _CARRIED.items():
+        size = expired.thresholds(name)["sample_size"]
+        rows = select(expired)
+        if rows.empty:
+            continue
+        count, total = candidates.get(name, (0, 0.0))
+        candidates[name] = (count + len(rows), total + float(rows["abs_amount"].sum()))
+        latest = rows[SAMPLE_COLUMNS]
+        if samples.get(name):
+            latest = pd.concat([pd.DataFrame(samples[name], columns=SAMPLE_COLUMNS), latest])
+            latest = latest.reset_index(drop=True)
+        samples[name] = latest.iloc[latest_positions(latest["timestamp"], size)].to_dict(orient="records")
+
+    older_groups = history.subscription_groups
+    if older_groups is None:
+        older_groups = pd.DataFrame(columns=GROUP_COLUMNS)
+    groups = merge_subscription_groups(older_groups, summarize_subscription_groups(expired))
+
+    history = FrameHistory(
+        row_count=history.row_count + int(expired_mask.sum()),
+        mno_seen=history.mno_seen or bool(expired.matches("mno").any()),
+        candidates=candidates,
+        samples=samples,
+        subscription_groups=groups if not groups.empty else None,
+        mailbox_hit=history.mailbox_hit,
+    )
+    return df[~expired_mask].reset_index(drop=True), history
+
+
+def _check_state_evidence(evidence: str) -> None:
+    # The stored mailbox hit is replayed as-is by later folds, so it needs its evidence.
+    check_evidence(evidence)
+    if evidence == "none":
+        raise ValueError('Incremental analysis needs evidence="summary" or "full"')
+
+
+def _mailbox_hit(result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    for leak in result["money_leaks"]:
+        if leak["detector"] == "MailboxEffect":
+            return dict(leak)
+    return None
+
+
+def _isoformat(values: pd.Series) -> List[Optional[str]]:
+    return [None if pd.isna(value) else value.isoformat() for value in values]
+
+
+def _timestamps(values: List[Optional[str]]) -> pd.Series:
+    return to_utc_timestamps(pd.Series(values, dtype=object))
+
+
+def _window_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """The WINDOW_COLUMNS of frame rows, as kept in IncrementalState.window."""
+    if df.empty:
+        return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in _window_dtypes().items()})
+    return df[WINDOW_COLUMNS].assign(direction=df["direction"].astype(str)).reset_index(drop=True)
+
+
+def _window_dtypes() -> Dict[str, Any]:
+    dtypes: Dict[str, Any] = {col: object for col in WINDOW_COLUMNS}
+    dtypes.update(timestamp="datetime64[ns, UTC]", abs_amount="float64", keyword_mask="int64")
+    return dtypes
+
+
+def state_to_json(state: IncrementalState) -> Dict[str, Any]:
+    history = state.history
+    groups = history.subscription_groups
+    group_rows: List[Dict[str, Any]] = []
+    if groups is not None:
+        group_rows = (
+            groups.assign(first_date=_isoformat(groups["first_date"]), last_date=_isoformat(groups["last_date"]))
+            .rename_axis("group")
+            .reset_index()
+            .to_dict(orient="records")
+        )
+    return {
+        "version": state.version,
+        "rules_version": state.rules_version,
+        "built_at": state.built_at.isoformat(),
+        "folds": state.folds,
+        "watermark": state.watermark.isoformat(),
+        # Column-wise: one list per WINDOW_COLUMNS entry.
+        "window": {
+            col: _isoformat(state.window[col]) if col == "timestamp" else state.window[col].tolist()
+            for col in WINDOW_COLUMNS
+        },
+        "history": {
+            "row_count": history.row_count,
+            "mno_seen": history.mno_seen,
+            "candidates": {name: list(totals) for name, totals in history.candidates.items()},
+            "samples": {
+                name: [{**sample, "timestamp": _isoformat([sample["timestamp"]])[0]} for sample in rows]
+                for name, rows in history.samples.items()
+            },
+            "subscription_groups": group_rows,
+            "mailbox_hit": history.mailbox_hit,
+        },
+    }
+
+
+def state_from_json(data: Dict[str, Any]) -> IncrementalState:
+    history = data["history"]
+    groups = None
+    if history["subscription_groups"]:
+        groups = pd.DataFrame(history["subscription_groups"]).set_index("group")[GROUP_COLUMNS]
+        groups["first_date"] = to_utc_timestamps(groups["first_date"])
+        groups["last_date"] = to_utc_timestamps(groups["last_date"])
+    samples = {}
+    for name, rows in history["samples"].items():
+        timestamps = _timestamps([row["timestamp"] for row in rows])
+        samples[name] = [{**row, "timestamp": ts} for row, ts in zip(rows, timestamps)]
+    window = pd.DataFrame(data["window"])
+    window["timestamp"] = _timestamps(data["window"]["timestamp"])
+    return IncrementalState(
+        window=window.astype(_window_dtypes()),
+        history=FrameHistory(
+            row_count=history["row_count"],
+            mno_seen=history["mno_seen"],
+            candidates={name: (int(count), float(total)) for name, (count, total) in history["candidates"].items()},
+            samples=samples,
+            subscription_groups=groups,
+            mailbox_hit=history["mailbox_hit"],
+        ),
+        built_at=pd.Timestamp(data["built_at"]),
+        watermark=pd.Timestamp(data["watermark"]),
+        folds=data["folds"],
+        version=data["version"],
+        # States saved before rules catalogs have none and are rebuilt on next use.
+        rules_version=data.get("rules_version"),
+    )
@@ -2,17 +2,20 @@ from __future__ import annotations
 
 from contextlib import asynccontextmanager
 import logging
-from typing import Any, AsyncIterator, Dict
+from typing import Any, AsyncIterator, Dict, Literal
 
-from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import Response, RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
+from .analysis_cache import analysis_cache, analysis_day
+from .analysis_pool import AnalysisPoolFull, analysis_pool
 from .auth import get_current_admin_user, get_current_user
 from .audit import add_audit_event
 from .database import get_db
@@ -22,7 +25,6 @@ from .errors import (
     validation_exception_handler,
 )
 from .external_http import request_with_retries
-from .forensic_engine import ForensicEngine
 from .observability import RequestLoggingMiddleware, configure_logging
 from .settings import settings
 from .background_jobs import start_background_worker, stop_background_worker
@@ -30,10 +32,12 @@ from .models_db import BackgroundJob, FrozenItem, User
 from .models import (
     AnalyzeRequest,
     AnalyzeResponse,
+    ColumnarAnalyzeRequest,
     FreezeRequest,
     FreezeResponse,
     MoneyLeak,
 )
+from .transaction_stream import TransactionStreamError, read_transaction_stream
 from .routers import accounts, admin, auth, mobile, ml, mtn_momo, open_banking, voice
 
 configure_logging()
@@ -42,11 +46,13 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    analysis_pool.start()
     start_background_worker()
     try:
         yield
     finally:
         await stop_background_worker()
+        analysis_pool.stop()
 
 
 app = FastAPI(title="TracePay – Forensic Engine", version="1.0.0", lifespan=lifespan)
@@ -66,9 +72,6 @@ app.add_middleware(
 )
 
 
-forensic_engine = ForensicEngine()
-
-
 @app.get("/v1/health")
 @app.get("/health")
 def health() -> Dict[str, str]:
@@ -182,9 +185,82 @@ def favicon() -> Response:
 
 @app.post("/v1/analyze", response_model=AnalyzeResponse)
 @app.post("/analyze", response_model=AnalyzeResponse)
-def analyze(req: AnalyzeRequest) -> AnalyzeResponse:
-    """Analyze a request body shaped as { "transactions": [...], "context": {...} }."""
-    result = forensic_engine.analyze([t.model_dump() for t in req.transactions])
+def analyze(
+    req: AnalyzeRequest,
+    profile: Literal["fast", "full"] = Query(default="full"),
+    diagnostics: bool = Query(default=False),
+    evidence: Literal["none", "summary", "full"] = Query(default="full"),
+) -> AnalyzeResponse:
+    """
+    Analyze a request body shaped as { "transactions": [...], "context": {...} }.
+
+    `profile=fast` skips the expensive detectors for latency-sensitive clients;
+    `diagnostics=true` adds per-detector timings to the response.
+    `evidence=summary` leaves out the sample transactions behind each leak,
+    and `evidence=none` all leak evidence.
+
+    Results are computed as of the start of the current UTC day and cached by
+    content, so re-submitting the same transactions is a cache hit.
+    """
+    return _analyze([t.model_dump() for t in req.transactions], profile, diagnostics, evidence)
+
+
+@app.post("/v1/analyze/columnar", response_model=AnalyzeResponse)
+@app.post("/analyze/columnar", response_model=AnalyzeResponse)
+def analyze_columnar(
+    req: ColumnarAnalyzeRequest,
+    profile: Literal["fast", "full"] = Query(default="full"),
+    diagnostics: bool = Query(default=False),
+    evidence: Literal["none", "summary", "full"] = Query(default="full"),
+) -> AnalyzeResponse:
+    """
+    Analyze parallel arrays: { "ids": [...], "timestamps": [...], "amounts": [...], ... }.
+
+    Same result as /v1/analyze for the same transactions, with a smaller
+    payload and a higher row cap (see ColumnarAnalyzeRequest).
+    """
+    return _analyze(req.columns(), profile, diagnostics, evidence)
+
+
+@app.post("/v1/analyze/stream", response_model=AnalyzeResponse)
+@app.post("/analyze/stream", response_model=AnalyzeResponse)
+async def analyze_stream(
+    request: Request,
+    profile: Literal["fast", "full"] = Query(default="full"),
+    diagnostics: bool = Query(default=False),
+    evidence: Literal["none", "summary", "full"] = Query(default="full"),
+) -> AnalyzeResponse:
+    """
+    Analyze an NDJSON body (Content-Type: application/x-ndjson): one
+    transaction object per line, in the /v1/analyze item schema.
+
+    The body is validated in batches while it streams in, so large statement
+    histories are never held as raw JSON; the engine runs once the stream
+    ends. Up to ANALYZE_STREAM_MAX_ROWS rows.
+    """
+    try:
+        columns = await read_transaction_stream(
+            request.stream(), max_rows=settings.analyze_stream_max_rows
+        )
+    except TransactionStreamError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc)) from exc
+    return await run_in_threadpool(_analyze, columns, profile, diagnostics, evidence)
+
+
+def _analyze(transactions: Any, profile: str, diagnostics: bool, evidence: str = "full") -> AnalyzeResponse:
+    try:
+        if diagnostics:
+            # Timings describe this run, so never serve them from the cache.
+            analyze = analysis_pool.analyze_columns if isinstance(transactions, dict) else analysis_pool.analyze
+            result = analyze(transactions, profile=profile, diagnostics=True, as_of=analysis_day(), evidence=evidence)
+        else:
+            result = analysis_cache.analyze(analysis_pool, transactions, profile=profile, evidence=evidence)
+    except AnalysisPoolFull as exc:
+        raise HTTPException(
+            status_code=503,
+            detail="The analysis service is busy. Please try again later.",
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
     # Cast money_leaks into pydantic model for stable API output
     leaks = [MoneyLeak(**leak) for leak in result["money_leaks"]]
     return AnalyzeResponse(
@@ -192,6 +268,7 @@ def analyze(req: AnalyzeRequest) -> AnalyzeResponse:
         health_band=result["health_band"],
         money_leaks=leaks,
         summary_plain_language=result["summary_plain_language"],
+        diagnostics=result.get("diagnostics"),
     )
 
 
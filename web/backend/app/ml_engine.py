@@ -1,13 +1,61 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
-from sklearn.cluster import KMeans
+from sklearn.base import clone
+from sklearn.cluster import MiniBatchKMeans
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 
+from .detectors.windows import monthly_totals
+from .ml_models import AnomalyModel, ModelRegistry
+from .timestamps import to_utc_timestamps
+
+Transactions = Union[List[Dict[str, Any]], Mapping[str, Any]]
+
+
+def anomaly_features(df: pd.DataFrame) -> Tuple[Optional[np.ndarray], List[str]]:
+    """
+    The feature matrix anomaly models score: amount, plus hour and day of
+    week when there are timestamps. Adds abs_amount/timestamp/hour/day_of_week
+    columns to `df`; the matrix is None when no feature is available.
+    """
+    features = []
+    feature_names = []
+
+    # Amount features
+    if "amount" in df.columns:
+        df["abs_amount"] = df["amount"].abs()
+        features.append(df["abs_amount"].values)
+        feature_names.append("amount")
+
+    # Time features
+    if "timestamp" in df.columns:
+        df["timestamp"] = to_utc_timestamps(df["timestamp"])
+        if not df["timestamp"].isna().all():
+            df["hour"] = df["timestamp"].dt.hour
+            df["day_of_week"] = df["timestamp"].dt.dayofweek
+            features.append(df["hour"].fillna(12).values)
+            features.append(df["day_of_week"].fillna(3).values)
+            feature_names.extend(["hour", "day_of_week"])
+
+    if not features:
+        return None, feature_names
+    return np.column_stack(features), feature_names
+
+
+def spending_profile(avg_amount: float, transactions_per_day: float) -> Tuple[int, str]:
+    """Heuristic spending profile (id, name) for an average amount and transaction frequency."""
+    if avg_amount < 50 and transactions_per_day > 5:
+        return 0, "frequent_small_spender"
+    if avg_amount > 500:
+        return 1, "high_value_spender"
+    if transactions_per_day < 1:
+        return 2, "infrequent_spender"
+    return 3, "moderate_spender"
+
 
 class MLEngine:
     """
@@ -17,69 +65,71 @@ class MLEngine:
     def __init__(self):
         self.scaler = StandardScaler()
         self.isolation_forest = IsolationForest(contamination=0.1, random_state=42)
-        self.kmeans = KMeans(n_clusters=5, random_state=42, n_init=10)
+        self.kmeans = MiniBatchKMeans(n_clusters=5, random_state=42, n_init=10, batch_size=1024)
 
-    def detect_anomalies(self, transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def detect_anomalies(self, transactions: Transactions, model: Optional[AnomalyModel] = None) -> Dict[str, Any]:
         """
         Detect anomalous transactions using Isolation Forest
+
+        `transactions` is a list of transaction dicts or a mapping of columns
+        (see forensic_engine.columns_from_rows). With a stored `model` (see
+        ml_models) the transactions are only scored; without one, or when it
+        was trained on other features, a model is fitted on them first.
         
         Returns:
             - anomalies: List of anomalous transaction IDs
             - anomaly_scores: Scores for each transaction (lower = more anomalous)
+            - model_version: The stored model used, if any
         """
-        if len(transactions) < 10:
+        df = pd.DataFrame(dict(transactions) if isinstance(transactions, Mapping) else transactions)
+        if len(df) < 10:
             return {"anomalies": [], "anomaly_scores": {}, "message": "Not enough transactions for anomaly detection"}
 
-        df = pd.DataFrame(transactions)
-
-        # Prepare features
-        features = []
-        feature_names = []
-
-        # Amount features
-        if "amount" in df.columns:
-            df["abs_amount"] = df["amount"].abs()
-            features.append(df["abs_amount"].values)
-            feature_names.append("amount")
-
-        # Time features
-        if "timestamp" in df.columns:
-            df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
-            if not df["timestamp"].isna().all():
-                df["hour"] = df["timestamp"].dt.hour
-                df["day_of_week"] = df["timestamp"].dt.dayofweek
-                features.append(df["hour"].fillna(12).values)
-                features.append(df["day_of_week"].fillna(3).values)
-                feature_names.extend(["hour", "day_of_week"])
-
-        if not features:
+        X, feature_names = anomaly_features(df)
+        if X is None:
             return {"anomalies": [], "anomaly_scores": {}, "message": "Insufficient features for anomaly detection"}
 
-        # Combine features
-        X = np.column_stack(features)
-
-        # Scale features
-        X_scaled = self.scaler.fit_transform(X)
+        if model is not None and model.features == tuple(feature_names):
+            anomaly_scores, flagged = model.score(X)
+        else:
+            model = None
+            # Scale features
+            X_scaled = self.scaler.fit_transform(X)
 
-        # Fit Isolation Forest
-        self.isolation_forest.fit(X_scaled)
-        anomaly_scores = self.isolation_forest.score_samples(X_scaled)
-        predictions = self.isolation_forest.predict(X_scaled)
+            # Fit Isolation Forest
+            self.isolation_forest.fit(X_scaled)
+            anomaly_scores = self.isolation_forest.score_samples(X_scaled)
+            # Anomalies are those predicted as -1
+            flagged = self.isolation_forest.predict(X_scaled) == -1
 
-        # Anomalies are those predicted as -1
-        anomaly_indices = np.where(predictions == -1)[0]
-        anomaly_ids = [str(df.iloc[i].get("id", i)) for i in anomaly_indices]
+        ids = (df["id"] if "id" in df.columns else pd.Series(df.index)).astype(str).tolist()
+        anomaly_ids = [ids[i] for i in np.flatnonzero(flagged)]
 
         # Create score dictionary
-        scores_dict = {str(df.iloc[i].get("id", i)): float(anomaly_scores[i]) for i in range(len(df))}
+        scores_dict = dict(zip(ids, anomaly_scores.tolist()))
 
         return {
             "anomalies": anomaly_ids,
             "anomaly_scores": scores_dict,
             "anomaly_count": len(anomaly_ids),
-            "total_transactions": len(transactions),
+            "total_transactions": len(df),
+            "model_version": model.version if model is not None else None,
         }
 
+    def train_anomaly_model(
+        self, registry: ModelRegistry, key: str, transactions: Transactions
+    ) -> Optional[AnomalyModel]:
+        """Fit the anomaly scaler and forest on `transactions` and save them as `key`'s current model."""
+        df = pd.DataFrame(dict(transactions) if isinstance(transactions, Mapping) else transactions)
+        if len(df) < 10:
+            return None
+        X, feature_names = anomaly_features(df)
+        if X is None:
+            return None
+        scaler = clone(self.scaler)
+        forest = clone(self.isolation_forest).fit(scaler.fit_transform(X))
+        return registry.save(key, tuple(feature_names), len(df), scaler, forest)
+
     def cluster_users(self, user_transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Cluster users by spending profile using K-means
@@ -104,7 +154,7 @@ class MLEngine:
 
         # Transaction frequency (transactions per day)
         if "timestamp" in df.columns:
-            df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+            df["timestamp"] = to_utc_timestamps(df["timestamp"])
             if not df["timestamp"].isna().all():
                 date_range = (df["timestamp"].max() - df["timestamp"].min()).days
                 freq = len(df) / max(date_range, 1)
@@ -121,26 +171,11 @@ class MLEngine:
         if len(features) < 2:
             return {"cluster_id": -1, "cluster_profile": "insufficient_features"}
 
-        # For single user, we can't cluster. This would be used with multiple users.
-        # For now, return a simple profile based on features
-        X = np.array([features])
-
-        # Simple heuristic clustering based on spending patterns
+        # A single user can't be clustered (see fit_user_clusters for the
+        # platform-wide job); return a simple profile based on features
         avg_amount = features[0] if len(features) > 0 else 0
         freq = features[1] if len(features) > 1 else 0
-
-        if avg_amount < 50 and freq > 5:
-            cluster_id = 0
-            profile = "frequent_small_spender"
-        elif avg_amount > 500:
-            cluster_id = 1
-            profile = "high_value_spender"
-        elif freq < 1:
-            cluster_id = 2
-            profile = "infrequent_spender"
-        else:
-            cluster_id = 3
-            profile = "moderate_spender"
+        cluster_id, profile = spending_profile(avg_amount, freq)
 
         return {
             "cluster_id": cluster_id,
@@ -151,6 +186,38 @@ class MLEngine:
             },
         }
 
+    def fit_user_clusters(self, features: np.ndarray) -> Optional[Dict[str, Any]]:
+        """
+        Cluster users by spending profile with MiniBatchKMeans.
+
+        `features` has one row per user: average transaction amount,
+        transactions per day and weekend ratio (see user_clusters). The scaled
+        rows are fed to partial_fit in shuffled batches, so each k-means step
+        works on batch_size rows. The feature matrix, its scaled and shuffled
+        copies, the labels and the distances are all held in full, so memory
+        grows linearly with the user count: about 120 bytes per user with 5
+        clusters. Returns each user's cluster and distances to every
+        centroid, plus a spending_profile() name per cluster (from its
+        centroid); None with fewer users than clusters.
+        """
+        if len(features) < self.kmeans.n_clusters:
+            return None
+        scaler = clone(self.scaler).fit(features)
+        scaled = scaler.transform(features)
+        kmeans = clone(self.kmeans)
+        # Shuffled, so the first batch (which seeds the centroids) is not just one kind of user.
+        shuffled = scaled[np.random.default_rng(42).permutation(len(scaled))]
+        for start in range(0, len(shuffled), kmeans.batch_size):
+            kmeans.partial_fit(shuffled[start : start + kmeans.batch_size])
+
+        distances = kmeans.transform(scaled)
+        centroids = scaler.inverse_transform(kmeans.cluster_centers_)
+        return {
+            "labels": distances.argmin(axis=1),
+            "distances": distances,
+            "profiles": [spending_profile(avg_amount, freq)[1] for avg_amount, freq, _ in centroids],
+        }
+
     def predict_future_leaks(self, transactions: List[Dict[str, Any]], historical_leaks: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Predict potential future money leaks based on patterns
@@ -166,18 +233,33 @@ class MLEngine:
 
         # Pattern: Increasing subscription-like payments
         if "amount" in df.columns and "timestamp" in df.columns:
-            df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+            df["timestamp"] = to_utc_timestamps(df["timestamp"])
             df["abs_amount"] = df["amount"].abs()
-            monthly_totals = df.groupby(df["timestamp"].dt.to_period("M"))["abs_amount"].sum()
-
-            if len(monthly_totals) >= 3:
-                trend = (monthly_totals.iloc[-1] - monthly_totals.iloc[0]) / len(monthly_totals)
-                if trend > 50:  # Increasing trend
-                    predicted.append({
-                        "type": "increasing_spending",
-                        "description": "Your spending is trending upward",
-                        "confidence": 0.7,
-                    })
+            # The same month buckets AnalysisFrame.windows.months reports.
+            monthly = monthly_totals(df["timestamp"], df["abs_amount"])["sum"]
+            return self.predict_leaks_from_monthly(monthly)
+
+        return {
+            "predicted_leaks": predicted,
+            "confidence": 0.6 if predicted else 0.0,
+        }
+
+    def predict_leaks_from_monthly(self, monthly: pd.Series) -> Dict[str, Any]:
+        """
+        predict_future_leaks from precomputed absolute spend per calendar
+        month, oldest first (e.g. feature_store.monthly_spend).
+        """
+        predicted = []
+
+        # Pattern: Increasing subscription-like payments
+        if len(monthly) >= 3:
+            trend = (monthly.iloc[-1] - monthly.iloc[0]) / len(monthly)
+            if trend > 50:  # Increasing trend
+                predicted.append({
+                    "type": "increasing_spending",
+                    "description": "Your spending is trending upward",
+                    "confidence": 0.7,
+                })
 
         return {
             "predicted_leaks": predicted,
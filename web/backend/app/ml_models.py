@@ -0,0 +1,152 @@
+"""
+Versioned anomaly model artifacts.
+
+MLEngine.detect_anomalies can score against a stored scaler + IsolationForest
+instead of fitting both on every request. Models are trained per key (one
+user's history, or COHORT_KEY for users with too little of it), saved with
+joblib and swapped in by a pointer file:
+
+    <root>/<key>/<version>.joblib   the fitted scaler and forest
+    <root>/<key>/CURRENT            the version in use
+
+Artifacts are stored uncompressed and loaded with mmap_mode="r", so their
+arrays are read from the page cache instead of copied into every worker.
+Loaded models are kept in memory, least recently used first out past
+`max_loaded` keys, and dropped once CURRENT names another version or their
+file is pruned. A model older than `max_age` is due for retraining (see
+is_stale).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import joblib
+import numpy as np
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+logger = logging.getLogger(__name__)
+
+COHORT_KEY = "cohort"
+KEEP_VERSIONS = 2
+
+_KEY = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+@dataclass
+class AnomalyModel:
+    key: str
+    version: str
+    trained_at: datetime
+    features: Tuple[str, ...]
+    rows: int
+    scaler: StandardScaler
+    forest: IsolationForest
+
+    def score(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """score_samples of each row (lower = more anomalous), and which rows predict() flags."""
+        scores = self.forest.score_samples(self.scaler.transform(X))
+        # IsolationForest.predict flags score_samples - offset_ < 0.
+        return scores, scores < self.forest.offset_
+
+
+class ModelRegistry:
+    def __init__(
+        self, root: Union[str, Path], max_age: timedelta = timedelta(hours=24), max_loaded: int = 256
+    ) -> None:
+        self.root = Path(root)
+        self.max_age = max_age
+        self.max_loaded = max_loaded
+        self._loaded: "OrderedDict[str, AnomalyModel]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def current(self, key: str) -> Optional[AnomalyModel]:
+        """The model CURRENT points at for `key`, or None if none was saved (or it fails to load)."""
+        version = self._current_version(key)
+        with self._lock:
+            model = self._loaded.get(key)
+            if model is not None and model.version == version:
+                self._loaded.move_to_end(key)
+                return model
+            # Another worker saved (or removed) a version: release the old mapping.
+            self._loaded.pop(key, None)
+        if version is None:
+            return None
+        try:
+            artifact = joblib.load(self._path(key, version), mmap_mode="r")
+        except (OSError, ValueError, EOFError) as exc:
+            logger.error("anomaly model %s/%s failed to load (%s)", key, version, exc)
+            return None
+        model = AnomalyModel(key=key, version=version, **artifact)
+        self._remember(model)
+        return model
+
+    def is_stale(self, model: Optional[AnomalyModel], now: Optional[datetime] = None) -> bool:
+        """True when `model` is missing or older than max_age."""
+        now = now if now is not None else datetime.now(timezone.utc)
+        return model is None or now - model.trained_at >= self.max_age
+
+    def save(
+        self, key: str, features: Tuple[str, ...], rows: int, scaler: StandardScaler, forest: IsolationForest
+    ) -> AnomalyModel:
+        """Store a fitted model as the new current version of `key`."""
+        if not _KEY.match(key):
+            raise ValueError(f"Invalid model key: {key}")
+        trained_at = datetime.now(timezone.utc)
+        version = trained_at.strftime("%Y%m%dT%H%M%S%fZ")
+        artifact = {"trained_at": trained_at, "features": tuple(features), "rows": rows, "scaler": scaler, "forest": forest}
+        directory = self.root / key
+        directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key, version)
+        # Write aside and rename, so readers never see a partial file.
+        joblib.dump(artifact, f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+        pointer = directory / "CURRENT"
+        pointer.with_suffix(".tmp").write_text(version, encoding="utf-8")
+        os.replace(pointer.with_suffix(".tmp"), pointer)
+        self._prune(key)
+        logger.info("anomaly model saved", extra={"model_key": key, "model_version": version, "rows": rows})
+
+        model = AnomalyModel(key=key, version=version, **artifact)
+        self._remember(model)
+        return model
+
+    def _remember(self, model: AnomalyModel) -> None:
+        with self._lock:
+            self._loaded[model.key] = model
+            self._loaded.move_to_end(model.key)
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+
+    def _current_version(self, key: str) -> Optional[str]:
+        try:
+            version = (self.root / key / "CURRENT").read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+        return version or None
+
+    def _path(self, key: str, version: str) -> Path:
+        return self.root / key / f"{version}.joblib"
+
+    def _prune(self, key: str) -> None:
+        # Versions sort by training time; keep the newest few for workers still loading them.
+        versions: List[Path] = sorted((self.root / key).glob("*.joblib"))
+        pruned = {path.stem for path in versions[:-KEEP_VERSIONS]}
+        for path in versions[:-KEEP_VERSIONS]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        with self._lock:
+            model = self._loaded.get(key)
+            if model is not None and model.version in pruned:
+                del self._loaded[key]
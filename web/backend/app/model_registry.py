@@ -0,0 +1,20 @@
+"""
+The anomaly model registry used by the app's ML jobs.
+
+Artifacts live under ML_MODEL_DIR (default: ml_models/ next to the app) and
+are retrained once older than ML_MODEL_MAX_AGE_HOURS. Users with fewer than
+ML_USER_MODEL_MIN_ROWS transactions are scored by the shared cohort model.
+See ml_models.py for the layout.
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+from .ml_models import ModelRegistry
+from .settings import BASE_DIR, settings
+
+model_registry = ModelRegistry(
+    settings.ml_model_dir or BASE_DIR / "ml_models",
+    max_age=timedelta(hours=settings.ml_model_max_age_hours),
+)
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from typing import Any, Dict, List, Literal, Optional
 
+import numpy as np
+import pandas as pd
 from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
@@ -28,6 +30,77 @@ class AnalyzeRequest(BaseModel):
     context: Dict[str, Any] = Field(default_factory=dict)
 
 
+COLUMNAR_MAX_ROWS = 100_000
+
+# Request column -> (ForensicEngine transaction field, max string length)
+_COLUMNAR_FIELDS = {
+    "ids": ("id", 255),
+    "timestamps": ("timestamp", 64),
+    "amounts": ("amount", None),
+    "descriptions": ("description", 1000),
+    "merchants": ("merchant", 255),
+    "categories": ("category", 100),
+    "counterparties": ("counterparty", 255),
+    "directions": ("direction", None),
+    "channels": ("channel", 50),
+}
+
+
+class ColumnarAnalyzeRequest(BaseModel):
+    """
+    Parallel-array form of AnalyzeRequest: one list per transaction field,
+    all the same length. Optional columns may be omitted entirely.
+
+    Only element types are checked per item; lengths and string limits
+    (the same as TransactionIn) are checked column-wise after parsing.
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    ids: List[str] = Field(min_length=1, max_length=COLUMNAR_MAX_ROWS)
+    timestamps: List[str]
+    amounts: List[float]
+    descriptions: Optional[List[str]] = None
+    merchants: Optional[List[Optional[str]]] = None
+    categories: Optional[List[Optional[str]]] = None
+    counterparties: Optional[List[Optional[str]]] = None
+    directions: Optional[List[Optional[Literal["debit", "credit"]]]] = None
+    channels: Optional[List[Optional[str]]] = None
+    context: Dict[str, Any] = Field(default_factory=dict)
+
+    @model_validator(mode="after")
+    def validate_columns(self) -> "ColumnarAnalyzeRequest":
+        rows = len(self.ids)
+        for name, (_, max_length) in _COLUMNAR_FIELDS.items():
+            values = getattr(self, name)
+            if values is None:
+                continue
+            if len(values) != rows:
+                raise ValueError(f"{name} has {len(values)} items, expected {rows} (one per id)")
+            if max_length is None:
+                continue
+            lengths = pd.Series(values, dtype=object).str.len().to_numpy(dtype=float, na_value=0)
+            too_long = np.flatnonzero(lengths > max_length)
+            if too_long.size:
+                raise ValueError(f"{name}[{too_long[0]}] is longer than {max_length} characters")
+            if name in ("ids", "timestamps"):
+                empty = np.flatnonzero(lengths == 0)
+                if empty.size:
+                    raise ValueError(f"{name}[{empty[0]}] must not be empty")
+        not_finite = np.flatnonzero(~np.isfinite(np.asarray(self.amounts, dtype=float)))
+        if not_finite.size:
+            raise ValueError(f"amounts[{not_finite[0]}] must be a finite number")
+        return self
+
+    def columns(self) -> Dict[str, List[Any]]:
+        """The provided columns keyed by ForensicEngine transaction field."""
+        return {
+            field: getattr(self, name)
+            for name, (field, _) in _COLUMNAR_FIELDS.items()
+            if getattr(self, name) is not None
+        }
+
+
 class MoneyLeak(BaseModel):
     id: str
     detector: str
@@ -44,6 +117,7 @@ class AnalyzeResponse(BaseModel):
     health_band: Literal["green", "yellow", "red"]
     money_leaks: List[MoneyLeak]
     summary_plain_language: str
+    diagnostics: Optional[Dict[str, Any]] = None
 
 
 class FreezeRequest(BaseModel):
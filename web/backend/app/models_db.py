@@ -184,3 +184,78 @@ class AuditLog(Base):
     created_at = Column(
         DateTime(timezone=True), default=datetime.utcnow, nullable=False, index=True
     )
+
+
+class ForensicState(Base):
+    __tablename__ = "forensic_states"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    account_id = Column(
+        Integer, ForeignKey("linked_accounts.id", ondelete="CASCADE"), unique=True, nullable=False
+    )
+    version = Column(Integer, nullable=False)
+    folds = Column(Integer, default=0, nullable=False)
+    state = Column(JSON, nullable=False)
+    built_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True), default=datetime.utcnow, nullable=False
+    )
+
+
+class AnomalyScore(Base):
+    __tablename__ = "anomaly_scores"
+
+    transaction_id = Column(
+        Integer, ForeignKey("transactions.id", ondelete="CASCADE"), primary_key=True
+    )
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    model_key = Column(String(100), nullable=False)
+    model_version = Column(String(64), nullable=False)
+    score = Column(Float, nullable=False)
+    is_anomaly = Column(Boolean, nullable=False)
+    scored_at = Column(
+        DateTime(timezone=True), default=datetime.utcnow, nullable=False
+    )
+
+
+class UserCluster(Base):
+    __tablename__ = "user_clusters"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    cluster_id = Column(Integer, nullable=False)
+    cluster_profile = Column(String(50), nullable=False)
+    distances = Column(JSON, nullable=False)
+    features = Column(JSON, nullable=False)
+    model_version = Column(String(64), nullable=False, index=True)
+    updated_at = Column(
+        DateTime(timezone=True), default=datetime.utcnow, nullable=False
+    )
+
+
+class UserFeatures(Base):
+    __tablename__ = "user_features"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    transaction_count = Column(Integer, default=0, nullable=False)
+    amount_total = Column(Float, default=0.0, nullable=False)
+    first_transaction_at = Column(DateTime(timezone=True), nullable=True)
+    last_transaction_at = Column(DateTime(timezone=True), nullable=True)
+    hour_weekday = Column(JSON, nullable=False)
+    merchant_counts = Column(JSON, nullable=False)
+    monthly_totals = Column(JSON, nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True), default=datetime.utcnow, nullable=False
+    )
+
+
+class AnalysisCacheEntry(Base):
+    __tablename__ = "analysis_cache_entries"
+
+    key = Column(String(64), primary_key=True)
+    engine_version = Column(String(32), nullable=False)
+    as_of = Column(DateTime(timezone=True), nullable=False, index=True)
+    result = Column(JSON, nullable=False)
+    created_at = Column(
+        DateTime(timezone=True), default=datetime.utcnow, nullable=False
+    )
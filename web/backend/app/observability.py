@@ -23,7 +23,14 @@ class JsonLogFormatter(logging.Formatter):
             "message": record.getMessage(),
             "request_id": getattr(record, "request_id", request_id_ctx.get()),
         }
-        for field in ("method", "path", "status_code", "duration_ms", "client_ip"):
+        for field in (
+            "method",
+            "path",
+            "status_code",
+            "duration_ms",
+            "client_ip",
+            "detector_timings",
+        ):
             value = getattr(record, field, None)
             if value is not None:
                 payload[field] = value
@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 from ..auth import get_current_user
 from ..audit import add_audit_event
 from ..database import get_db
+from ..feature_store import reset_user_features
 from ..models_db import LinkedAccount, User
 from ..open_banking_client import OpenBankingSandboxClient, SandboxConfig
 
@@ -136,6 +137,8 @@ def unlink_account(
         request=request,
     )
     db.delete(account)
+    # The account's transactions go with it; their aggregates must too.
+    reset_user_features(db, current_user.id)
     db.commit()
     return {"message": "Account unlinked successfully"}
 
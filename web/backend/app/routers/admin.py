@@ -8,13 +8,23 @@ from pydantic import BaseModel
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from ..analysis_cache import analysis_cache
 from ..audit import add_audit_event
 from ..auth import get_current_admin_user
+from ..background_jobs import (
+    JOB_ML_CLUSTER_USERS,
+    JOB_ML_TRAIN_MODELS,
+    JobAcceptedResponse,
+    enqueue_background_job,
+)
 from ..database import get_db, SessionLocal
+from ..feature_store import record_transactions
 from ..models_db import AnalysisResult, FrozenItem, LinkedAccount, RegionalStat, Transaction, User
 from ..open_banking_client import OpenBankingSandboxClient, SandboxConfig
 from ..settings import settings
-from ..forensic_engine import ForensicEngine
+from ..forensic_engine import ForensicEngine, columns_from_rows
+from ..forensic_state import analyze_account
+from ..rules_catalog import rules_catalog
 
 
 def audit_admin_request(
@@ -46,7 +56,7 @@ sandbox_config = SandboxConfig(
     client_secret=settings.open_banking_client_secret,
 )
 ob_client = OpenBankingSandboxClient(sandbox_config)
-forensic_engine = ForensicEngine()
+forensic_engine = ForensicEngine(rules=rules_catalog)
 
 
 class OverviewStats(BaseModel):
@@ -323,10 +333,13 @@ async def perform_global_sync():
 
         total_new_txs = 0
         accounts_processed = 0
+        stored_only: Dict[int, LinkedAccount] = {}
         
         for account in accounts:
             try:
                 tx_dicts_for_analysis = []
+                new_tx_dicts = []
+                inserted = []
                 
                 if account.open_banking_consent_id:
                     # Open Banking Flow
@@ -344,6 +357,15 @@ async def perform_global_sync():
                             ext_id = rt.get("TransactionId")
                             if not ext_id: continue
                             
+                            tx_dict = {
+                                "id": ext_id,
+                                "timestamp": rt.get("BookingDateTime"),
+                                "amount": float(rt.get("Amount", {}).get("Amount", 0)),
+                                "description": rt.get("ProprietaryBankTransactionCode", {}).get("Description", ""),
+                                "merchant": rt.get("MerchantDetails", {}).get("MerchantName", ""),
+                                "direction": "debit" if float(rt.get("Amount", {}).get("Amount", 0)) < 0 else "credit"
+                            }
+
                             # Save & Deduplicate
                             existing = db.query(Transaction).filter(Transaction.transaction_id == ext_id).first()
                             if not existing:
@@ -360,63 +382,26 @@ async def perform_global_sync():
                                     direction="debit" if float(amount_data.get("Amount", 0)) < 0 else "credit"
                                 )
                                 db.add(tx)
+                                inserted.append(tx)
                                 total_new_txs += 1
+                                new_tx_dicts.append(tx_dict)
                             
-                            tx_dicts_for_analysis.append({
-                                "id": ext_id,
-                                "timestamp": rt.get("BookingDateTime"),
-                                "amount": float(rt.get("Amount", {}).get("Amount", 0)),
-                                "description": rt.get("ProprietaryBankTransactionCode", {}).get("Description", ""),
-                                "merchant": rt.get("MerchantDetails", {}).get("MerchantName", ""),
-                                "direction": "debit" if float(rt.get("Amount", {}).get("Amount", 0)) < 0 else "credit"
-                            })
+                            tx_dicts_for_analysis.append(tx_dict)
                     except Exception as e:
                         print(f"Open Banking sync failed for account {account.id}: {str(e)}")
-                
-                if not tx_dicts_for_analysis:
-                    existing_txs = db.query(Transaction).filter(Transaction.account_id == account.id).limit(100).all()
-                    for t in existing_txs:
-                        tx_dicts_for_analysis.append({
-                            "id": t.transaction_id,
-                            "timestamp": t.timestamp.isoformat(),
-                            "amount": t.amount,
-                            "description": t.description or "",
-                            "merchant": t.merchant or "",
-                            "direction": t.direction or ("debit" if t.amount < 0 else "credit")
-                        })
 
+                    record_transactions(db, account.user_id, [(t.timestamp, t.amount, t.merchant) for t in inserted])
+                
                 # 3. Run Forensic Engine
                 if tx_dicts_for_analysis:
-                    analysis = forensic_engine.analyze(tx_dicts_for_analysis)
-                    analysis_leaks = analysis["money_leaks"]
-                    if "inclusion_metrics" in analysis:
-                        analysis_leaks.append({
-                            "id": "inclusion-metadata",
-                            "detector": "InclusionScorer",
-                            "title": "Inclusion Metrics",
-                            "score": analysis["inclusion_metrics"]["score"],
-                            "level": analysis["inclusion_metrics"]["level"],
-                            "mno_consistency": analysis["inclusion_metrics"]["mno_consistency"]
-                        })
-                    
-                    if "stakeholder_metrics" in analysis:
-                        analysis_leaks.append({
-                            "id": "stakeholder-metadata",
-                            "detector": "StakeholderMetrics",
-                            "title": "Stakeholder Analytics",
-                            "inclusion_delta": analysis["stakeholder_metrics"]["inclusion_delta"],
-                            "retail_velocity": analysis["stakeholder_metrics"]["retail_velocity"]
-                        })
-
-                    result = AnalysisResult(
-                        user_id=account.user_id,
-                        financial_health_score=analysis["financial_health_score"],
-                        health_band=analysis["health_band"],
-                        money_leaks=analysis_leaks,
-                        summary_plain_language=analysis["summary_plain_language"],
-                        transaction_count=len(tx_dicts_for_analysis)
+                    # Open Banking data: fold only the new rows into the stored state
+                    analysis = analyze_account(
+                        db, forensic_engine, account, tx_dicts_for_analysis, new_tx_dicts, evidence="summary"
                     )
-                    db.add(result)
+                    _store_analysis(db, account, analysis, len(tx_dicts_for_analysis))
+                else:
+                    # Stored data only: analyzed below in one batch with the other accounts
+                    stored_only[account.id] = account
                 
                 account.last_synced_at = datetime.utcnow()
                 accounts_processed += 1
@@ -425,10 +410,83 @@ async def perform_global_sync():
                 print(f"Failed to sync account {account.id}: {str(e)}")
                 continue
 
+        if stored_only:
+            try:
+                _analyze_stored_accounts(db, stored_only)
+            except Exception as e:
+                print(f"Batch analysis of stored transactions failed: {str(e)}")
+
         db.commit()
     finally:
         db.close()
 
+
+_STORED_COLUMNS = ("id", "timestamp", "amount", "description", "merchant", "direction")
+
+
+def _analyze_stored_accounts(db: Session, accounts: Dict[int, LinkedAccount]) -> None:
+    """Analyze up to 100 stored transactions per account with one engine run for all of them."""
+    ranked = (
+        db.query(
+            Transaction.account_id,
+            Transaction.transaction_id,
+            Transaction.timestamp,
+            Transaction.amount,
+            Transaction.description,
+            Transaction.merchant,
+            Transaction.direction,
+            func.row_number().over(partition_by=Transaction.account_id).label("position"),
+        )
+        .filter(Transaction.account_id.in_(list(accounts)))
+        .subquery()
+    )
+    stored = (
+        db.query(*(column for column in ranked.c if column.name != "position"))
+        .filter(ranked.c.position <= 100)
+        .all()
+    )
+    rows_by_account: Dict[int, List[Any]] = {}
+    for account_id, *row in stored:
+        rows_by_account.setdefault(account_id, []).append(row)
+
+    batches = {account_id: columns_from_rows(rows, _STORED_COLUMNS) for account_id, rows in rows_by_account.items()}
+    # Stored for the dashboards, which never show sample transactions.
+    analyses = analysis_cache.analyze_many(forensic_engine, batches, evidence="summary")
+    for account_id, analysis in analyses.items():
+        _store_analysis(db, accounts[account_id], analysis, len(rows_by_account[account_id]))
+
+
+def _store_analysis(db: Session, account: LinkedAccount, analysis: Dict[str, Any], transaction_count: int) -> None:
+    analysis_leaks = analysis["money_leaks"]
+    if "inclusion_metrics" in analysis:
+        analysis_leaks.append({
+            "id": "inclusion-metadata",
+            "detector": "InclusionScorer",
+            "title": "Inclusion Metrics",
+            "score": analysis["inclusion_metrics"]["score"],
+            "level": analysis["inclusion_metrics"]["level"],
+            "mno_consistency": analysis["inclusion_metrics"]["mno_consistency"]
+        })
+    
+    if "stakeholder_metrics" in analysis:
+        analysis_leaks.append({
+            "id": "stakeholder-metadata",
+            "detector": "StakeholderMetrics",
+            "title": "Stakeholder Analytics",
+            "inclusion_delta": analysis["stakeholder_metrics"]["inclusion_delta"],
+            "retail_velocity": analysis["stakeholder_metrics"]["retail_velocity"]
+        })
+
+    result = AnalysisResult(
+        user_id=account.user_id,
+        financial_health_score=analysis["financial_health_score"],
+        health_band=analysis["health_band"],
+        money_leaks=analysis_leaks,
+        summary_plain_language=analysis["summary_plain_language"],
+        transaction_count=transaction_count
+    )
+    db.add(result)
+
 @router.post("/sync-all")
 async def sync_all_data(
     background_tasks: BackgroundTasks,
@@ -441,6 +499,34 @@ async def sync_all_data(
     }
 
 
+@router.post("/ml/train-models", response_model=JobAcceptedResponse, status_code=status.HTTP_202_ACCEPTED)
+def train_ml_models(
+    current_user: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db),
+) -> JobAcceptedResponse:
+    """Queue retraining of the anomaly models: the cohort model and every stale per-user model."""
+    job = enqueue_background_job(db, JOB_ML_TRAIN_MODELS, current_user.id, {})
+    return JobAcceptedResponse(
+        job_id=job.job_id,
+        status=job.status,
+        message="Model training queued. Poll /v1/jobs/{job_id} for status.",
+    )
+
+
+@router.post("/ml/cluster-users", response_model=JobAcceptedResponse, status_code=status.HTTP_202_ACCEPTED)
+def cluster_all_users(
+    current_user: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db),
+) -> JobAcceptedResponse:
+    """Queue re-clustering of every user; /ml/user-cluster serves the stored assignments."""
+    job = enqueue_background_job(db, JOB_ML_CLUSTER_USERS, current_user.id, {})
+    return JobAcceptedResponse(
+        job_id=job.job_id,
+        status=job.status,
+        message="User clustering queued. Poll /v1/jobs/{job_id} for status.",
+    )
+
+
 @router.get("/users")
 def list_users(
     current_user: User = Depends(get_current_admin_user),
@@ -14,13 +14,13 @@ from ..background_jobs import (
     enqueue_background_job,
 )
 from ..database import get_db
-from ..models_db import Transaction, User
-from ..ml_engine import MLEngine
+from ..feature_store import get_user_features, spending_features
+from ..models_db import User
+from ..ml_engine import spending_profile
+from ..user_clusters import MIN_TRANSACTIONS, stored_cluster
 
 router = APIRouter(prefix="/ml", tags=["machine learning"])
 
-ml_engine = MLEngine()
-
 
 class AnomalyResponse(BaseModel):
     anomalies: List[str]
@@ -58,30 +58,30 @@ def get_user_cluster(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> Dict[str, Any]:
-    """Get user's spending profile cluster"""
-    transactions = (
-        db.query(Transaction)
-        .filter(Transaction.user_id == current_user.id)
-        .order_by(Transaction.timestamp.desc())
-        .limit(500)
-        .all()
-    )
-
-    if not transactions:
+    """
+    Get user's spending profile cluster: the assignment stored by the last
+    platform-wide clustering job (see user_clusters), or a heuristic profile
+    from the user's stored features (see feature_store) for users it has not
+    clustered yet.
+    """
+    cluster = stored_cluster(db, current_user.id)
+    if cluster is not None:
+        return cluster
+
+    features = get_user_features(db, current_user.id)
+    if features is None or features.transaction_count < MIN_TRANSACTIONS:
         return {"cluster_id": -1, "cluster_profile": "insufficient_data"}
 
-    txn_dicts = [
-        {
-            "id": t.id,
-            "timestamp": t.timestamp.isoformat(),
-            "amount": t.amount,
-            "description": t.description,
-            "merchant": t.merchant,
-        }
-        for t in transactions
-    ]
-
-    return ml_engine.cluster_users(txn_dicts)
+    profile_features = spending_features(features)
+    cluster_id, profile = spending_profile(
+        profile_features["avg_transaction_amount"],
+        profile_features["transactions_per_day"],
+    )
+    return {
+        "cluster_id": cluster_id,
+        "cluster_profile": profile,
+        "features": profile_features,
+    }
 
 
 @router.post(
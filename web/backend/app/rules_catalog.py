@@ -0,0 +1,17 @@
+"""
+The detector rules catalog used by the app's engines.
+
+RULES_PATH points at a rules JSON file (default: the bundled
+detectors/rules.json); it is re-checked at most every RULES_RELOAD_SECONDS and
+swapped in without a restart. See detectors/rules.py for the file format.
+"""
+
+from __future__ import annotations
+
+from .detectors.rules import DEFAULT_RULES_PATH, RulesCatalog
+from .settings import settings
+
+rules_catalog = RulesCatalog(
+    settings.rules_path or DEFAULT_RULES_PATH,
+    reload_seconds=settings.rules_reload_seconds,
+)
@@ -34,6 +34,19 @@ class Settings(BaseModel):
     smtp_from_email: str = ""
     smtp_from_name: str = "TracePay"
     smtp_use_tls: bool = True
+    analysis_cache_size: int = 1024
+    analysis_cache_shared: bool = False
+    analyze_stream_max_rows: int = 250_000
+    analysis_workers: int = 2
+    analysis_queue_size: int = 16
+    background_job_workers: int = 2
+    background_job_lease_minutes: int = 60
+    rules_path: str = ""
+    rules_reload_seconds: float = 5.0
+    ml_model_dir: str = ""
+    ml_model_max_age_hours: float = 24.0
+    ml_train_interval_hours: float = 6.0
+    ml_user_model_min_rows: int = 200
 
     @field_validator("database_url")
     @classmethod
@@ -100,6 +113,22 @@ def get_settings() -> Settings:
             os.getenv("SMTP_USE_TLS", "true").strip().lower()
             not in {"0", "false", "no"}
         ),
+        analysis_cache_size=int(os.getenv("ANALYSIS_CACHE_SIZE", "1024")),
+        analysis_cache_shared=(
+            os.getenv("ANALYSIS_CACHE_SHARED", "false").strip().lower()
+            in {"1", "true", "yes"}
+        ),
+        analyze_stream_max_rows=int(os.getenv("ANALYZE_STREAM_MAX_ROWS", "250000")),
+        analysis_workers=int(os.getenv("ANALYSIS_WORKERS", "2")),
+        analysis_queue_size=int(os.getenv("ANALYSIS_QUEUE_SIZE", "16")),
+        background_job_workers=int(os.getenv("BACKGROUND_JOB_WORKERS", "2")),
+        background_job_lease_minutes=int(os.getenv("BACKGROUND_JOB_LEASE_MINUTES", "60")),
+        rules_path=os.getenv("RULES_PATH", ""),
+        rules_reload_seconds=float(os.getenv("RULES_RELOAD_SECONDS", "5")),
+        ml_model_dir=os.getenv("ML_MODEL_DIR", ""),
+        ml_model_max_age_hours=float(os.getenv("ML_MODEL_MAX_AGE_HOURS", "24")),
+        ml_train_interval_hours=float(os.getenv("ML_TRAIN_INTERVAL_HOURS", "6")),
+        ml_user_model_min_rows=int(os.getenv("ML_USER_MODEL_MIN_ROWS", "200")),
     )
 
 
@@ -0,0 +1,655 @@
+"""
+Pure-Python analysis for small inputs.
+
+For a few dozen transactions, pandas' fixed costs (frame construction, string
+accessors, groupby setup) dominate ForensicEngine.analyze. This module runs the
+same detector rules over plain dicts; ForensicEngine switches to it below
+`small_input_rows` and keeps pandas for anything it does not handle (non-string
+ids or text, numeric strings, non-ISO timestamps, detectors without a port here).
+
+Results are identical to the pandas path, float bits included: sums follow
+NumPy's pairwise summation, groupby sums pandas' Kahan summation, and sorts go
+through the same NumPy argsort. tests/test_small_engine.py compares the two.
+"""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+from functools import partial
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .detectors.evidence import Deferred
+from .detectors.models import Leak
+from .detectors.rules import Rules
+
+SMALL_INPUT_ROWS = 50
+
+Row = Dict[str, Any]
+
+_DAY_NS = 86_400 * 10**9
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_INT64 = (-(2**63), 2**63 - 1)
+_ISO_TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2}(T\d{2}:\d{2}(:\d{2}(\.\d{1,6})?)?(Z|[+-]\d{2}:\d{2})?)?")
+_TEXT_FIELDS = ("description", "merchant", "category", "counterparty", "direction", "channel")
+_SAMPLE_COLUMNS = ("id", "timestamp", "abs_amount", "description")
+
+
+class _Unsupported(Exception):
+    """Raised while normalizing a value only the pandas path handles."""
+
+
+# -----------------------------
+# Ingest
+# -----------------------------
+def prepare_rows(
+    transactions: Sequence[Mapping[str, Any]], as_of: pd.Timestamp, rules: Rules
+) -> Optional[List[Row]]:
+    """Normalize transactions the way ForensicEngine._build_frame does; None if pandas is needed."""
+    try:
+        amounts = [_amount(tx.get("amount")) for tx in transactions]
+        # An all-int column stays int64 in pandas; anything else becomes float64.
+        if not all(type(amount) is int for amount in amounts):
+            amounts = [0.0 if amount is None or amount != amount else float(amount) for amount in amounts]
+        parsed = [_parse_timestamp(tx.get("timestamp")) for tx in transactions]
+        # pandas resolves naive values next to offset-aware ones by their neighbours' offsets.
+        if len({stamp.tzinfo is None for stamp in parsed if stamp is not None}) > 1:
+            return None
+        stamps = [_timestamp_ns(stamp) if stamp is not None else None for stamp in parsed]
+        rows = [_row(tx, amount, ts, as_of, rules) for tx, amount, ts in zip(transactions, amounts, stamps)]
+    except _Unsupported:
+        return None
+    return rows
+
+
+def _amount(value: Any) -> Any:
+    if value is None or type(value) is float:
+        return value
+    if type(value) is int and _INT64[0] <= value <= _INT64[1]:
+        return value
+    raise _Unsupported
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if value is None or type(value) is datetime:
+        return value
+    if isinstance(value, str) and _ISO_TIMESTAMP.fullmatch(value):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            raise _Unsupported from None
+    raise _Unsupported
+
+
+def _timestamp_ns(stamp: datetime) -> int:
+    if stamp.tzinfo is None:
+        stamp = stamp.replace(tzinfo=timezone.utc)
+    ns = (stamp - _EPOCH) // _MICROSECOND * 1000
+    if not pd.Timestamp.min.value <= ns <= pd.Timestamp.max.value:
+        raise _Unsupported  # out of datetime64[ns] range: pandas coerces it to NaT
+    return ns
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    raise _Unsupported
+
+
+def _row(tx: Mapping[str, Any], amount: Any, ts: Optional[int], as_of: pd.Timestamp, rules: Rules) -> Row:
+    tx_id = tx.get("id")
+    if not isinstance(tx_id, str):
+        raise _Unsupported
+    row: Row = {field: _text(tx.get(field)) for field in _TEXT_FIELDS}
+    direction = row["direction"].lower()
+    # Heuristic: if direction missing, infer from sign
+    if direction in ("", "none", "nan"):
+        direction = "debit" if amount < 0 else "credit" if amount > 0 else direction
+    row["direction"] = direction
+    row["channel"] = row["channel"].lower()
+    row["id"] = tx_id
+    row["ts"] = ts
+    row["amount"] = amount
+    row["abs_amount"] = abs(amount)
+    row["keyword_mask"] = rules.keyword_index.tag_values(row)
+    row["is_debit"] = direction == "debit"
+    row["in_last_30d"] = ts is not None and ts >= as_of.value - 30 * _DAY_NS
+    row["day_of_week"] = (ts // _DAY_NS + 3) % 7 if ts is not None else -1  # 1970-01-01 was a Thursday
+    return row
+
+
+# -----------------------------
+# NumPy / pandas arithmetic, reproduced exactly
+# -----------------------------
+def _sum(values: Sequence[Any]) -> Any:
+    """Series.sum(): NumPy's pairwise summation."""
+    return _pairwise(values, 0, len(values))
+
+
+def _pairwise(values: Sequence[Any], start: int, n: int) -> Any:
+    if n < 8:
+        total = 0 if values and type(values[0]) is int else 0.0
+        for i in range(start, start + n):
+            total += values[i]
+        return total
+    if n <= 128:
+        r = list(values[start : start + 8])
+        i = 8
+        while i < n - n % 8:
+            for j in range(8):
+                r[j] += values[start + i + j]
+            i += 8
+        total = ((r[0] + r[1]) + (r[2] + r[3])) + ((r[4] + r[5]) + (r[6] + r[7]))
+        while i < n:
+            total += values[start + i]
+            i += 1
+        return total
+    half = n // 2
+    half -= half % 8
+    return _pairwise(values, start, half) + _pairwise(values, start + half, n - half)
+
+
+def _group_sum(values: Sequence[Any]) -> Any:
+    """groupby(...).sum() for one group: pandas' Kahan summation (exact for ints)."""
+    if values and type(values[0]) is int:
+        return sum(values)
+    total = compensation = 0.0
+    for value in values:
+        y = value - compensation
+        t = total + y
+        compensation = t - total - y
+        if compensation != compensation:
+            compensation = 0.0
+        total = t
+    return total
+
+
+def _by_time(rows: Sequence[Row]) -> List[Row]:
+    """sort_values("timestamp"): NumPy quicksort on datetime64, missing timestamps last."""
+    timed = [row for row in rows if row["ts"] is not None]
+    order = np.argsort(np.array([row["ts"] for row in timed], dtype="datetime64[ns]"), kind="quicksort")
+    return [timed[i] for i in order] + [row for row in rows if row["ts"] is None]
+
+
+def _top_merchants(rows: Sequence[Row]) -> Dict[str, Any]:
+    """groupby("merchant")["abs_amount"].sum().sort_values(ascending=False)."""
+    amounts: Dict[str, List[Any]] = {}
+    for row in rows:
+        amounts.setdefault(row["merchant"], []).append(row["abs_amount"])
+    names = sorted(amounts)
+    totals = np.array([_group_sum(amounts[name]) for name in names])
+    # pandas' descending nargsort: argsort the reversed values, then reverse back.
+    order = np.arange(len(names))[::-1][totals[::-1].argsort(kind="quicksort")][::-1]
+    return {names[i]: totals[i].item() for i in order}
+
+
+def _timestamp(ts: Optional[int]) -> Any:
+    return pd.Timestamp(ts, tz="UTC") if ts is not None else pd.NaT
+
+
+def _latest_records(rows: Sequence[Row], n: int, columns: Sequence[str]) -> List[Dict[str, Any]]:
+    """evidence.latest_records for prepared rows: undated rows last, ties in row order."""
+    if n <= 0:
+        return []
+    dated = sorted((row for row in rows if row["ts"] is not None), key=lambda row: row["ts"])
+    latest = (dated + [row for row in rows if row["ts"] is None])[-n:]
+    return [
+        {
+            column: (_timestamp(row["ts"]).isoformat() if row["ts"] is not None else None)
+            if column == "timestamp"
+            else row[column]
+            for column in columns
+        }
+        for row in latest
+    ]
+
+
+def _sample(rows: Sequence[Row], n: int, columns: Sequence[str]) -> Deferred:
+    return Deferred(partial(_latest_records, list(rows), n, columns))
+
+
+def _matches(row: Row, family: str, rules: Rules) -> bool:
+    return bool(row["keyword_mask"] & rules.keyword_index.bit(family))
+
+
+def _last_id(rows: Sequence[Row]) -> str:
+    return str(_by_time(rows)[-1]["id"])
+
+
+def candidate_rows(rows: Sequence[Row], family: Optional[str], direction: Optional[str], rules: Rules) -> int:
+    """DetectorSpec.candidate_rows for prepared rows."""
+    return sum(
+        1
+        for row in rows
+        if (family is None or _matches(row, family, rules)) and (direction is None or row["direction"] == direction)
+    )
+
+
+def inclusion_counts(rows: Sequence[Row], rules: Rules) -> Tuple[int, bool]:
+    """(MNO rows in the last 30 days, any MNO row) for ForensicEngine._inclusion_score."""
+    telco = [row for row in rows if _matches(row, "mno", rules)]
+    return sum(1 for row in telco if row["in_last_30d"]), bool(telco)
+
+
+# -----------------------------
+# Detectors (same rules as the pandas implementations)
+# -----------------------------
+def detect_airtime_drains(rows: Sequence[Row], as_of: pd.Timestamp, rules: Rules) -> List[Leak]:
+    limits = rules.thresholds["airtime_drains"]
+    candidates = [
+        row
+        for row in rows
+        if _matches(row, "airtime", rules)
+        and row["is_debit"]
+        and row["abs_amount"] > 0
+        and row["abs_amount"] <= limits["max_amount"]
+    ]
+    if not candidates:
+        return []
+
+    last_30 = [row for row in candidates if row["in_last_30d"]]
+    freq = len(last_30)
+    monthly_cost = float(_sum([row["abs_amount"] for row in last_30 or candidates]))
+
+    if freq < limits["min_count"] and monthly_cost < limits["min_monthly_cost"]:
+        return []
+
+    severity = "high" if monthly_cost >= limits["high_monthly_cost"] or freq >= limits["high_count"] else "medium"
+    return [
+        Leak(
+            id="airtime-drain",
+            detector="AirtimeDrains",
+            title="Airtime is quietly draining your money",
+            plain_language_reason=(
+                f"You made {freq} small airtime/data buys recently. "
+                f"Small top-ups add up — estimated about R{monthly_cost:.0f} per month."
+            ),
+            severity=severity,
+            transaction_id=_last_id(last_30) if last_30 else None,
+            estimated_monthly_cost=monthly_cost,
+            evidence={
+                "count_last_30_days": freq,
+                "sum_last_30_days": monthly_cost,
+                "sample": _sample(candidates, limits["sample_size"], _SAMPLE_COLUMNS),
+            },
+        )
+    ]
+
+
+def detect_fee_leakage(rows: Sequence[Row], as_of: pd.Timestamp, rules: Rules) -> List[Leak]:
+    limits = rules.thresholds["fee_leakage"]
+    fees = [row for row in rows if _matches(row, "fees", rules) and row["is_debit"] and row["abs_amount"] > 0]
+    if not fees:
+        return []
+
+    last_30 = [row for row in fees if row["in_last_30d"]]
+    monthly_cost = float(_sum([row["abs_amount"] for row in last_30 or fees]))
+    count = len(last_30 or fees)
+
+    if monthly_cost < limits["min_monthly_cost"] and count < limits["min_count"]:
+        return []
+
+    severity = "high" if monthly_cost >= limits["high_monthly_cost"] else "medium"
+    return [
+        Leak(
+            id="fee-leakage",
+            detector="FeeLeakage",
+            title="Fees are eating your balance",
+            plain_language_reason=(
+                f"You paid about R{monthly_cost:.0f} in fees recently (service fees / cash-out fees). "
+                "That’s money leaving without helping your household."
+            ),
+            severity=severity,
+            transaction_id=_last_id(last_30) if last_30 else None,
+            estimated_monthly_cost=monthly_cost,
+            evidence={
+                "count_last_30_days": count,
+                "sum_last_30_days": monthly_cost,
+                "sample": _sample(fees, limits["sample_size"], _SAMPLE_COLUMNS),
+            },
+        )
+    ]
+
+
+def detect_informal_loan_ratios(rows: Sequence[Row], as_of: pd.Timestamp, rules: Rules) -> List[Leak]:
+    limits = rules.thresholds["informal_loan_ratios"]
+    last_30 = [row for row in rows if row["is_debit"] and row["abs_amount"] > 0 and row["in_last_30d"]]
+    p2p_last_30 = [row for row in last_30 if _matches(row, "p2p", rules)]
+    if not p2p_last_30:
+        return []
+
+    p2p_total = float(_sum([row["abs_amount"] for row in p2p_last_30]))
+    total = float(_sum([row["abs_amount"] for row in last_30]))
+    ratio = p2p_total / float(max(total, 1.0))
+    tagged = [row for row in p2p_last_30 if _matches(row, "loan", rules)]
+    # 15% of P2P payments might be interest (see ForensicEngine.detect_informal_loan_ratios)
+    estimated_interest = p2p_total * limits["interest_rate"]
+
+    if (
+        ratio < limits["min_ratio"]
+        and len(tagged) < limits["min_loan_count"]
+        and estimated_interest < limits["min_interest"]
+    ):
+        return []
+
+    severity = "high" if ratio >= limits["high_ratio"] or estimated_interest >= limits["high_interest"] else "medium"
+    return [
+        Leak(
+            id="informal-loan-ratio",
+            detector="InformalLoanRatios",
+            title="Too much money is going to informal loans (Mashonisa)",
+            plain_language_reason=(
+                f"About {ratio*100:.0f}% of your spending in the last 30 days looks like person-to-person transfers. "
+                f"Estimated interest paid: R{estimated_interest:.0f}. "
+                "This can be a sign of informal borrowing pressure. Consider formal financial options."
+            ),
+            severity=severity,
+            transaction_id=_last_id(p2p_last_30),
+            estimated_monthly_cost=p2p_total,
+            evidence={
+                "p2p_spend_last_30_days": p2p_total,
+                "total_spend_last_30_days": total,
+                "ratio": ratio,
+                "tagged_loan_like_count": len(tagged),
+                "estimated_interest": float(estimated_interest),
+                "sample": _sample(
+                    p2p_last_30, limits["sample_size"], ("id", "timestamp", "abs_amount", "description", "counterparty")
+                ),
+            },
+        )
+    ]
+
+
+def detect_subscription_traps(rows: Sequence[Row], as_of: pd.Timestamp, rules: Rules) -> List[Leak]:
+    limits = rules.thresholds["subscription_traps"]
+    debits = sorted((row for row in rows if row["is_debit"] and row["ts"] is not None), key=lambda row: row["ts"])
+    rounded = np.round(np.array([row["abs_amount"] for row in debits]), 2).tolist()
+
+    # Group by merchant/description and amount to find recurring patterns
+    groups: Dict[Tuple[str, str, Any], List[Row]] = {}
+    keys: Dict[Tuple[str, str, Any], str] = {}
+    for row, amount in zip(debits, rounded):
+        parts = (row["merchant"].lower().strip(), row["description"].lower().strip()[:50], amount)
+        groups.setdefault(parts, []).append(row)
+        keys.setdefault(parts, f"{parts[0]}_{parts[1]}_{float(amount)}")
+
+    passing = []
+    for parts, members in groups.items():
+        if len(members) < limits["min_count"]:
+            continue
+        first, last = members[0], members[-1]
+        amounts = [row["abs_amount"] for row in members]
+        first_amount = first["abs_amount"]
+        max_deviation = max(max(amounts) - first_amount, first_amount - min(amounts))
+        same_amount = max_deviation / max(first_amount, 0.01) < limits["amount_tolerance"]
+        months_span = ((last["ts"] - first["ts"]) // _DAY_NS) / 30.0
+        freq_per_month = len(members) / max(months_span, 0.1)
+        monthly_cost = first_amount * freq_per_month
+        days_since_last = (as_of.value - last["ts"]) // _DAY_NS
+        if (
+            same_amount
+            and months_span >= limits["min_months"]
+            and monthly_cost >= limits["min_monthly_cost"]
+            and days_since_last <= limits["max_days_since_last"]
+        ):
+            passing.append((keys[parts], members, months_span, freq_per_month, monthly_cost))
+
+    leaks = []
+    # Keep the previous output order (sorted by the readable transaction key)
+    for key, members, span, frequency, cost in sorted(passing, key=lambda group: group[0]):
+        first, last = members[0], members[-1]
+        amount = float(first["abs_amount"])
+        severity = "high" if cost >= limits["high_monthly_cost"] else "medium"
+        merchant_name = first["merchant"] or first["description"] or "Unknown"
+        leaks.append(
+            Leak(
+                id=f"subscription-trap-{key[:20]}",
+                detector="SubscriptionTraps",
+                title=f"Recurring charge: {merchant_name}",
+                plain_language_reason=(
+                    f"You've been paying R{amount:.2f} to {merchant_name} every month for {span:.1f} months. "
+                    f"That's about R{cost:.0f} per month. Check if you still need this."
+                ),
+                severity=severity,
+                transaction_id=str(last["id"]),
+                estimated_monthly_cost=float(cost),
+                evidence={
+                    "merchant": merchant_name,
+                    "amount": amount,
+                    "frequency_per_month": round(float(frequency), 2),
+                    "months_active": round(float(span), 1),
+                    "total_occurrences": len(members),
+                    "last_occurrence": _timestamp(last["ts"]).isoformat(),
+                },
+            )
+        )
+    return leaks
+
+
+def detect_vas_charges(rows: Sequence[Row], as_of: pd.Timestamp, rules: Rules) -> List[Leak]:
+    limits = rules.thresholds["vas_charges"]
+    last_30 = [
+        row
+        for row in rows
+        if _matches(row, "vas", rules) and row["is_debit"] and row["abs_amount"] > 0 and row["in_last_30d"]
+    ]
+    if not last_30:
+        return []
+
+    monthly_cost = float(_sum([row["abs_amount"] for row in last_30]))
+    count = len(last_30)
+
+    if monthly_cost < limits["min_monthly_cost"] and count < limits["min_count"]:
+        return []
+
+    severity = "high" if monthly_cost >= limits["high_monthly_cost"] or count >= limits["high_count"] else "medium"
+    top_merchants = _top_merchants(last_30)
+    top_merchant_name = next(iter(top_merchants))
+    latest = _by_time(last_30)
+
+    return [
+        Leak(
+            id="vas-charges",
+            detector="VASCharges",
+            title="Value-added service charges are adding up",
+            plain_language_reason=(
+                f"You've paid R{monthly_cost:.0f} in value-added service charges in the last 30 days ({count} charges). "
+                f"These are often subscriptions, premium SMS, or app purchases you might have forgotten about. "
+                f"Top charge: {top_merchant_name}."
+            ),
+            severity=severity,
+            transaction_id=str(latest[-1]["id"]),
+            estimated_monthly_cost=monthly_cost,
+            evidence={
+                "count_last_30_days": count,
+                "sum_last_30_days": monthly_cost,
+                "top_merchants": dict(list(top_merchants.items())[: limits["top_merchants_size"]]),
+                "sample": _sample(last_30, limits["sample_size"], ("id", "timestamp", "abs_amount", "description", "merchant")),
+            },
+        )
+    ]
+
+
+def detect_debit_orders(rows: Sequence[Row], as_of: pd.Timestamp, rules: Rules) -> List[Leak]:
+    limits = rules.thresholds["debit_orders"]
+    last_30 = [
+        row
+        for row in rows
+        if _matches(row, "debit_order", rules) and row["is_debit"] and row["abs_amount"] > 0 and row["in_last_30d"]
+    ]
+    if not last_30:
+        return []
+
+    monthly_cost = float(_sum([row["abs_amount"] for row in last_30]))
+    count = len(last_30)
+
+    leaks = []
+    # Check for high-value single debit orders
+    for row in last_30:
+        if row["abs_amount"] < limits["high_value_amount"]:
+            continue
+        leaks.append(
+            Leak(
+                id=f"debit-order-high-{row['id']}",
+                detector="DebitOrders",
+                title=f"High-value debit order: R{row['abs_amount']:.0f}",
+                plain_language_reason=(
+                    f"A debit order of R{row['abs_amount']:.0f} was processed. "
+                    f"Make sure this is expected and authorized."
+                ),
+                severity="high",
+                transaction_id=str(row["id"]),
+                estimated_monthly_cost=float(row["abs_amount"]),
+                evidence={
+                    "amount": float(row["abs_amount"]),
+                    "merchant": row["merchant"],
+                    "description": row["description"],
+                    "date": _timestamp(row["ts"]).isoformat(),
+                },
+            )
+        )
+
+    # Check for frequent small debit orders (potential scam)
+    if count >= limits["frequent_count"] and monthly_cost >= limits["frequent_monthly_cost"]:
+        severity = "high" if monthly_cost >= limits["high_monthly_cost"] else "medium"
+        top_merchants = _top_merchants(last_30)
+        top_merchant_name = next(iter(top_merchants))
+        leaks.append(
+            Leak(
+                id="debit-order-frequent",
+                detector="DebitOrders",
+                title="Multiple debit orders detected",
+                plain_language_reason=(
+                    f"You have {count} debit orders in the last 30 days totaling R{monthly_cost:.0f}. "
+                    f"Top merchant: {top_merchant_name}. Review these to ensure they're all legitimate."
+                ),
+                severity=severity,
+                transaction_id=_last_id(last_30),
+                estimated_monthly_cost=monthly_cost,
+                evidence={
+                    "count_last_30_days": count,
+                    "sum_last_30_days": monthly_cost,
+                    "top_merchants": dict(list(top_merchants.items())[: limits["top_merchants_size"]]),
+                },
+            )
+        )
+
+    return leaks
+
+
+def detect_weekend_spending(rows: Sequence[Row], as_of: pd.Timestamp, rules: Rules) -> List[Leak]:
+    limits = rules.thresholds["weekend_spending"]
+    last_30 = [row for row in rows if row["is_debit"] and row["in_last_30d"]]
+    if len(last_30) < limits["min_count"]:  # Need enough data
+        return []
+
+    weekend = [row["abs_amount"] for row in last_30 if row["day_of_week"] in (5, 6)]
+    weekday = [row["abs_amount"] for row in last_30 if row["day_of_week"] not in (5, 6)]
+    if not weekend or not weekday:
+        return []
+
+    weekend_spending = float(_sum(weekend))
+    weekday_spending = float(_sum(weekday))
+    # NumPy counts, as in the pandas detector: the averages and ratio are then
+    # np.float64, whose round() differs from the builtin's.
+    weekend_avg = weekend_spending / np.int64(len(weekend))
+    weekday_avg = weekday_spending / np.int64(len(weekday))
+
+    # Flag if weekend spending is 50%+ higher than weekday
+    if weekend_avg <= 0 or weekday_avg <= 0:
+        return []
+    ratio = weekend_avg / weekday_avg
+    if ratio < limits["min_ratio"] or weekend_spending < limits["min_weekend_spending"]:
+        return []
+
+    severity = "medium" if ratio < limits["high_ratio"] else "high"
+    return [
+        Leak(
+            id="weekend-spending-spike",
+            detector="WeekendSpending",
+            title="Weekend spending is much higher than weekdays",
+            plain_language_reason=(
+                f"Your weekend spending (R{weekend_spending:.0f}) is {ratio:.1f}x higher than weekday spending. "
+                f"This might be impulse purchases or social spending. Consider planning weekend expenses."
+            ),
+            severity=severity,
+            estimated_monthly_cost=weekend_spending * limits["monthly_factor"],  # Approximate monthly
+            evidence={
+                "weekend_spending": round(weekend_spending, 2),
+                "weekday_spending": round(weekday_spending, 2),
+                "weekend_avg_per_day": round(weekend_avg, 2),
+                "weekday_avg_per_day": round(weekday_avg, 2),
+                "ratio": round(ratio, 2),
+                "weekend_transactions": len(weekend),
+                "weekday_transactions": len(weekday),
+            },
+        )
+    ]
+
+
+def detect_mailbox_effect(rows: Sequence[Row], as_of: pd.Timestamp, rules: Rules) -> List[Leak]:
+    limits = rules.thresholds["mailbox_effect"]
+    large_credits = [row for row in rows if row["direction"] == "credit" and row["abs_amount"] >= limits["min_credit"]]
+    if not large_credits:
+        return []
+
+    # Same prefix-sum windows as the pandas detector, over time-sorted debits.
+    debits = sorted((row for row in rows if row["is_debit"] and row["ts"] is not None), key=lambda row: row["ts"])
+    debit_times = [row["ts"] for row in debits]
+    debit_amounts = [float(row["abs_amount"]) for row in debits]
+    running = [0.0]
+    for amount in debit_amounts:
+        running.append(running[-1] + amount)
+
+    for credit in large_credits:
+        if credit["ts"] is None:
+            continue
+        credit_amount = float(credit["abs_amount"])
+        start = bisect_right(debit_times, credit["ts"])
+        end = bisect_right(debit_times, credit["ts"] + int(limits["window_hours"] * 3600) * 10**9)
+        if running[end] - running[start] < credit_amount * limits["withdrawal_ratio"]:
+            continue
+
+        # Only the first pass-through credit is reported.
+        total_withdrawn = float(_sum(debit_amounts[start:end]))
+        return [
+            Leak(
+                id=f"mailbox-effect-{credit['id']}",
+                detector="MailboxEffect",
+                title="Passing through: Mailbox Effect detected",
+                plain_language_reason=(
+                    f"You received R{credit_amount:.0f} and withdrew/spent about {total_withdrawn/credit_amount*100:.0f}% of it "
+                    f"within {limits['window_hours']:g} hours. This 'pass-through' behavior often leads to high fees and low financial resilience."
+                ),
+                severity="high",
+                transaction_id=str(credit["id"]),
+                estimated_monthly_cost=total_withdrawn * limits["fee_rate"],  # Estimated 5% loss in fees/informal costs
+                evidence={
+                    "credit_amount": credit_amount,
+                    "withdrawn_amount": total_withdrawn,
+                    "withdrawal_ratio": total_withdrawn / credit_amount,
+                    "window_hours": limits["window_hours"],
+                },
+            )
+        ]
+    return []
+
+
+# Registry name -> pure-Python port.
+DETECTORS: Dict[str, Callable[[Sequence[Row], pd.Timestamp, Rules], List[Leak]]] = {
+    "airtime_drains": detect_airtime_drains,
+    "fee_leakage": detect_fee_leakage,
+    "informal_loan_ratios": detect_informal_loan_ratios,
+    "subscription_traps": detect_subscription_traps,
+    "vas_charges": detect_vas_charges,
+    "debit_orders": detect_debit_orders,
+    "weekend_spending": detect_weekend_spending,
+    "mailbox_effect": detect_mailbox_effect,
+}
@@ -0,0 +1,93 @@
+"""
+Timestamp normalization for engine ingest.
+
+to_utc_timestamps() turns a timestamp column into datetime64[ns, UTC]:
+
+- datetime64 columns, and columns of datetime objects (SQL result rows), are
+  converted without a round trip through strings
+- UTC strings in one fixed layout, "YYYY-MM-DDTHH:MM:SS" with optional .fff or
+  .ffffff and a "Z" / "+00:00" suffix (Open Banking BookingDateTime, the MoMo
+  mock data, our own isoformat() output), are parsed by vectorized digit
+  arithmetic
+- any other ISO 8601 strings go through pandas' ISO parser, and anything else
+  is parsed value by value
+
+Naive values are taken as UTC and unparseable ones become NaT, as with
+pd.to_datetime(..., utc=True, errors="coerce").
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+_FIXED_LAYOUT = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d{3}|\.\d{6})?(Z|\+00:00)?")
+# Separator positions of the "YYYY-MM-DDTHH:MM:SS" prefix.
+_SEPARATORS = {4: "-", 7: "-", 10: "T", 13: ":", 16: ":"}
+_DIGITS = [i for i in range(19) if i not in _SEPARATORS]
+
+
+def to_utc_timestamps(series: pd.Series) -> pd.Series:
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        return series.dt.tz_convert("UTC")
+    if pd.api.types.is_datetime64_dtype(series.dtype):
+        return series.dt.tz_localize("UTC")
+
+    parsed = _parse_fixed_layout(series)
+    if parsed is not None:
+        return parsed
+    try:
+        return pd.to_datetime(series, utc=True, format="ISO8601")
+    except (ValueError, TypeError, OverflowError):
+        return pd.to_datetime(series, utc=True, format="mixed", errors="coerce")
+
+
+def _parse_fixed_layout(series: pd.Series) -> Optional[pd.Series]:
+    """The vectorized fast path; None when the column does not fit the layout."""
+    if series.empty or series.dtype != object:
+        return None
+    first = series.iat[0]
+    layout = _FIXED_LAYOUT.fullmatch(first) if isinstance(first, str) else None
+    if layout is None:
+        return None
+    width = len(first)
+    fraction_end = 19 + len(layout.group(1) or "")
+
+    # One spare column: a value longer than `width` leaves a character there.
+    try:
+        chars = series.to_numpy().astype(f"U{width + 1}").view(np.uint32).reshape(len(series), width + 1)
+    except (TypeError, ValueError):
+        return None
+    # Same "." and suffix as the first value in every row.
+    fixed = [19] if fraction_end > 19 else []
+    fixed += list(range(fraction_end, width + 1))
+    if not (chars[:, fixed] == chars[0, fixed]).all():
+        return None
+    for position, separator in _SEPARATORS.items():
+        if not (chars[:, position] == ord(separator)).all():
+            return None
+    digits = chars[:, _DIGITS + list(range(20, fraction_end))].astype(np.int64) - ord("0")
+    if not ((digits >= 0) & (digits <= 9)).all():
+        return None
+
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month, day, hour, minute, second = (digits[:, i] * 10 + digits[:, i + 1] for i in range(4, 14, 2))
+    if not (
+        ((year > 1677) & (year < 2262) & (month >= 1) & (month <= 12) & (day >= 1)).all()
+        and ((hour < 24) & (minute < 60) & (second < 60)).all()
+    ):
+        return None
+    months = ((year - 1970) * 12 + month - 1).astype("M8[M]")
+    month_start = months.astype("M8[D]")
+    if not (day <= ((months + 1).astype("M8[D]") - month_start).astype(np.int64)).all():
+        return None
+
+    nanos = ((hour * 60 + minute) * 60 + second) * 1_000_000_000
+    if fraction_end > 19:
+        # .fff / .ffffff: the first fraction digit is worth 10**8 ns.
+        nanos = nanos + digits[:, len(_DIGITS) :] @ 10 ** np.arange(8, 8 - (fraction_end - 20), -1)
+    stamps = (month_start + (day - 1)).astype("M8[ns]") + nanos.astype("m8[ns]")
+    return pd.Series(stamps, index=series.index, name=series.name).dt.tz_localize("UTC")
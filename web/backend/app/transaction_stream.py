@@ -0,0 +1,109 @@
+"""
+Incremental NDJSON parsing for the streaming analyze endpoint.
+
+Each line of the body is one TransactionIn object. Lines are validated in
+batches and appended to per-field column lists, so at any time only the
+columns plus one batch of raw lines are held in memory; the columns then go
+straight to ForensicEngine.ingest_columns. Validation runs on the threadpool,
+so a large upload does not hold up the event loop.
+
+The columns grow with the row count, and the engine's frame more so: budget
+about 1 KB per row at peak (see ANALYZE_STREAM_MAX_ROWS).
+"""
+
+from __future__ import annotations
+
+from typing import AsyncIterable, Dict, List
+
+from pydantic import TypeAdapter, ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from .forensic_engine import TRANSACTION_COLUMNS
+from .models import TransactionIn
+
+BATCH_SIZE = 2000
+MAX_LINE_BYTES = 64 * 1024
+
+_TRANSACTION = TypeAdapter(TransactionIn)
+_TRANSACTIONS = TypeAdapter(List[TransactionIn])
+
+
+class TransactionStreamError(ValueError):
+    def __init__(self, message: str, status_code: int = 422) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class TransactionColumns:
+    """Column buffers filled one validated batch of NDJSON lines at a time."""
+
+    def __init__(self, max_rows: int, batch_size: int = BATCH_SIZE) -> None:
+        self.max_rows = max_rows
+        self.batch_size = batch_size
+        self.columns: Dict[str, list] = {field: [] for field in TRANSACTION_COLUMNS}
+        self.rows = 0
+        self._pending: List[bytes] = []
+        self._pending_lines: List[int] = []
+
+    def add_line(self, line: bytes, line_number: int) -> None:
+        line = line.strip()
+        if not line:
+            return
+        if len(line) > MAX_LINE_BYTES:
+            raise TransactionStreamError(f"Line {line_number} is longer than {MAX_LINE_BYTES} bytes", status_code=413)
+        if self.rows + len(self._pending) >= self.max_rows:
+            raise TransactionStreamError(f"Too many transactions: the limit is {self.max_rows}", status_code=413)
+        self._pending.append(line)
+        self._pending_lines.append(line_number)
+
+    @property
+    def batch_ready(self) -> bool:
+        return len(self._pending) >= self.batch_size
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        try:
+            batch = _TRANSACTIONS.validate_json(b"[" + b",".join(self._pending) + b"]")
+        except ValidationError:
+            self._raise_first_error()
+            raise
+        for tx in batch:
+            for field, values in self.columns.items():
+                values.append(getattr(tx, field))
+        self.rows += len(batch)
+        self._pending = []
+        self._pending_lines = []
+
+    def _raise_first_error(self) -> None:
+        # Slow path: re-validate line by line so the error names the offending line.
+        for line, line_number in zip(self._pending, self._pending_lines):
+            try:
+                _TRANSACTION.validate_json(line)
+            except ValidationError as exc:
+                error = exc.errors()[0]
+                where = ".".join(str(part) for part in error["loc"])
+                detail = f"{where}: {error['msg']}" if where else error["msg"]
+                raise TransactionStreamError(f"Line {line_number}: {detail}") from exc
+
+
+async def read_transaction_stream(chunks: AsyncIterable[bytes], max_rows: int) -> Dict[str, list]:
+    """Parse an NDJSON byte stream into ForensicEngine.ingest_columns() input."""
+    buffer = TransactionColumns(max_rows=max_rows)
+    partial = b""
+    line_number = 0
+    async for chunk in chunks:
+        lines = (partial + chunk).split(b"\n")
+        partial = lines.pop()
+        for line in lines:
+            line_number += 1
+            buffer.add_line(line, line_number)
+        if len(partial) > MAX_LINE_BYTES:
+            raise TransactionStreamError(f"Line {line_number + 1} is longer than {MAX_LINE_BYTES} bytes", status_code=413)
+        if buffer.batch_ready:
+            await run_in_threadpool(buffer.flush)
+    buffer.add_line(partial, line_number + 1)
+    await run_in_threadpool(buffer.flush)
+    if not buffer.rows:
+        raise TransactionStreamError("The stream contained no transactions")
+    return buffer.columns
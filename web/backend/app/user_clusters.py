@@ -0,0 +1,126 @@
+"""
+Platform-wide user clustering.
+
+cluster_users() computes one spending feature vector per user with a single
+grouped SQL query, fits MLEngine.fit_user_clusters over all of them, and
+stores each user's cluster in user_clusters. /ml/user-cluster then answers
+with a primary-key lookup. The features are those MLEngine.cluster_users
+derives for a single user: average transaction amount, transactions per day
+and the share of weekend transactions (UTC).
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import case, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from .ml_engine import MLEngine
+from .models_db import Transaction, UserCluster
+
+# Users need this many transactions to be clustered (as in MLEngine.cluster_users).
+MIN_TRANSACTIONS = 5
+
+_INSERT_BATCH = 1000
+
+
+def user_features(db: Session) -> Tuple[List[Any], np.ndarray]:
+    """User ids and their (avg amount, transactions per day, weekend ratio) rows."""
+    utc = func.timezone("UTC", Transaction.timestamp)
+    rows = (
+        db.query(
+            Transaction.user_id,
+            func.count(Transaction.id),
+            func.avg(func.abs(Transaction.amount)),
+            func.min(Transaction.timestamp),
+            func.max(Transaction.timestamp),
+            func.sum(case((func.extract("isodow", utc).in_([6, 7]), 1), else_=0)),
+        )
+        .group_by(Transaction.user_id)
+        .having(func.count(Transaction.id) >= MIN_TRANSACTIONS)
+        .all()
+    )
+    if not rows:
+        return [], np.empty((0, 3))
+    user_ids, counts, avg_amounts, first, last, weekend = zip(*rows)
+    counts = np.array(counts, dtype=float)
+    # Whole days between the first and last transaction, at least one.
+    days = np.array([(b - a).days for a, b in zip(first, last)], dtype=float)
+    features = np.column_stack(
+        [
+            np.array(avg_amounts, dtype=float),
+            counts / np.maximum(days, 1),
+            np.array(weekend, dtype=float) / counts,
+        ]
+    )
+    return list(user_ids), features
+
+
+def cluster_users(db: Session, engine: Optional[MLEngine] = None) -> Dict[str, Any]:
+    """Re-cluster every user with enough transactions; the caller commits."""
+    engine = engine or MLEngine()
+    user_ids, features = user_features(db)
+    fitted = engine.fit_user_clusters(features)
+    if fitted is None:
+        return {"clustered_users": 0, "model_version": None}
+
+    updated_at = datetime.now(timezone.utc)
+    version = updated_at.strftime("%Y%m%dT%H%M%S%fZ")
+    labels, distances, profiles = fitted["labels"], fitted["distances"], fitted["profiles"]
+    # Insert rows are built one batch at a time rather than as dicts for every user.
+    for start in range(0, len(user_ids), _INSERT_BATCH):
+        stop = start + _INSERT_BATCH
+        values = [
+            {
+                "user_id": user_id,
+                "cluster_id": int(label),
+                "cluster_profile": profiles[label],
+                "distances": [round(float(d), 6) for d in row_distances],
+                "features": {
+                    "avg_transaction_amount": float(avg_amount),
+                    "transactions_per_day": float(freq),
+                    "weekend_ratio": float(weekend_ratio),
+                },
+                "model_version": version,
+                "updated_at": updated_at,
+            }
+            for user_id, label, row_distances, (avg_amount, freq, weekend_ratio) in zip(
+                user_ids[start:stop], labels[start:stop], distances[start:stop], features[start:stop]
+            )
+        ]
+        statement = insert(UserCluster).values(values)
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[UserCluster.user_id],
+                set_={
+                    column: statement.excluded[column]
+                    for column in ("cluster_id", "cluster_profile", "distances", "features", "model_version", "updated_at")
+                },
+            )
+        )
+    # Users who no longer qualify drop out rather than keep an old assignment.
+    db.query(UserCluster).filter(UserCluster.model_version != version).delete(synchronize_session=False)
+    return {
+        "clustered_users": len(user_ids),
+        "model_version": version,
+        "cluster_sizes": np.bincount(labels, minlength=len(profiles)).tolist(),
+        "cluster_profiles": profiles,
+    }
+
+
+def stored_cluster(db: Session, user_id: Any) -> Optional[Dict[str, Any]]:
+    """A user's cluster from the last cluster_users() run, or None."""
+    row = db.get(UserCluster, user_id)
+    if row is None:
+        return None
+    return {
+        "cluster_id": row.cluster_id,
+        "cluster_profile": row.cluster_profile,
+        "features": row.features,
+        "centroid_distances": row.distances,
+        "model_version": row.model_version,
+    }
@@ -0,0 +1,2 @@
+# Ad-hoc performance benchmarks; run from web/backend, e.g.
+#   python -m benchmarks.detector_execution
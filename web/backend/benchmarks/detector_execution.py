@@ -0,0 +1,52 @@
+"""
+Detector execution modes versus frame size.
+
+    python -m benchmarks.detector_execution [--sizes 1000,10000,100000] [--repeat 3]
+
+Ingest runs once per size; only ForensicEngine.run_detectors is timed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.forensic_engine import EXECUTION_MODES, ForensicEngine
+
+from .synthetic import synthetic_transactions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1000,10000,50000,100000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    engines = {mode: ForensicEngine(execution=mode, max_workers=args.workers) for mode in EXECUTION_MODES}
+    print(f"{'rows':>8}  " + "  ".join(f"{mode:>10}" for mode in EXECUTION_MODES) + "  speedup(thread)  speedup(process)")
+    try:
+        for size in (int(s) for s in args.sizes.split(",")):
+            frame = engines["serial"].ingest(synthetic_transactions(size))
+            best = {}
+            for mode, engine in engines.items():
+                specs = engine.registry.select("full")
+                engine.run_detectors(frame, specs)  # warm pools and caches
+                runs = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    engine.run_detectors(frame, specs)
+                    runs.append(time.perf_counter() - started)
+                best[mode] = min(runs)
+            print(
+                f"{size:>8}  "
+                + "  ".join(f"{best[mode] * 1000:>8.1f}ms" for mode in EXECUTION_MODES)
+                + f"  {best['serial'] / best['thread']:>14.2f}x  {best['serial'] / best['process']:>15.2f}x"
+            )
+    finally:
+        for engine in engines.values():
+            engine.close()
+
+
+if __name__ == "__main__":
+    main()
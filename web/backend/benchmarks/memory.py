@@ -0,0 +1,45 @@
+"""
+Frame memory per row: ForensicEngine() versus ForensicEngine(lean=True).
+
+    python -m benchmarks.memory [--sizes 5000,100000]
+
+Bytes are DataFrame.memory_usage(deep=True) of the built AnalysisFrame, so
+Python string objects are counted; the per-column table is for the largest size.
+"""
+
+from __future__ import annotations
+
+import argparse
+
+import pandas as pd
+
+from app.forensic_engine import ForensicEngine
+
+from .synthetic import synthetic_transactions
+
+
+def _usage(engine: ForensicEngine, transactions: list) -> pd.Series:
+    return engine.ingest(transactions).df.memory_usage(deep=True, index=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="5000,20000,100000")
+    args = parser.parse_args()
+
+    default, lean = ForensicEngine(), ForensicEngine(lean=True)
+    print(f"{'rows':>8}  {'default B/row':>14}  {'lean B/row':>11}  {'saving':>7}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        transactions = synthetic_transactions(size)
+        before, after = _usage(default, transactions), _usage(lean, transactions)
+        print(
+            f"{size:>8}  {before.sum() / size:>14.1f}  {after.sum() / size:>11.1f}"
+            f"  {1 - after.sum() / before.sum():>7.0%}"
+        )
+
+    print()
+    print(pd.DataFrame({"default B/row": before / size, "lean B/row": after / size}).round(1).to_string())
+
+
+if __name__ == "__main__":
+    main()
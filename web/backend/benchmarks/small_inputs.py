@@ -0,0 +1,44 @@
+"""
+analyze() latency for small statements: pandas versus the pure-Python path.
+
+    python -m benchmarks.small_inputs [--sizes 5,20,49] [--repeat 50]
+
+ForensicEngine(small_input_rows=0) forces pandas; the default engine takes the
+small_engine path below SMALL_INPUT_ROWS transactions.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.forensic_engine import ForensicEngine
+
+from .synthetic import synthetic_transactions
+
+
+def _ms_per_call(engine: ForensicEngine, transactions: list, repeat: int) -> float:
+    engine.analyze(transactions)  # warm-up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        engine.analyze(transactions)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="5,20,49")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    pandas_engine, engine = ForensicEngine(small_input_rows=0), ForensicEngine()
+    print(f"{'rows':>6}  {'pandas ms':>10}  {'small ms':>9}  {'speedup':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        transactions = synthetic_transactions(size)
+        before = _ms_per_call(pandas_engine, transactions, args.repeat)
+        after = _ms_per_call(engine, transactions, args.repeat)
+        print(f"{size:>6}  {before:>10.2f}  {after:>9.2f}  {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
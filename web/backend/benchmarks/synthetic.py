@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+DESCRIPTIONS = [
+    "Airtime purchase MTN prepaid",
+    "Data bundle Vodacom",
+    "Service fee",
+    "Cash out fee",
+    "Send money P2P",
+    "Loan repayment",
+    "Netflix subscription",
+    "Debit order insurance",
+    "Spar groceries",
+    "Shoprite",
+    "Salary",
+    "SASSA grant",
+    "Premium SMS game",
+    "Stop order funeral",
+    "Transfer fee",
+    "Taxi fare",
+    "KFC",
+    "Pick n Pay",
+]
+MERCHANTS = ["MTN", "Vodacom", "Netflix", "Spar", "Shoprite", "", "Gym Co", "Old Mutual", "KFC", "Cell C"]
+CATEGORIES = ["Airtime", "Groceries", "Fees", "Entertainment", "", "Transfer", "Insurance"]
+CHANNELS = ["momo", "bank", "cash", ""]
+
+
+def synthetic_transactions(count: int, seed: int = 0, days: int = 365) -> List[Dict[str, Any]]:
+    """Deterministic, statement-like transactions spread over the last `days` days."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    transactions: List[Dict[str, Any]] = []
+    for i in range(count):
+        is_credit = rng.random() < 0.15
+        amount = rng.uniform(500, 5000) if is_credit else rng.choice([rng.uniform(5, 60), rng.uniform(50, 900)])
+        timestamp = now - timedelta(days=rng.uniform(0, days))
+        transactions.append(
+            {
+                "id": f"tx-{i}",
+                "timestamp": timestamp.isoformat().replace("+00:00", "Z"),
+                "amount": round(amount if is_credit else -amount, 2),
+                "description": rng.choice(DESCRIPTIONS),
+                "merchant": rng.choice(MERCHANTS),
+                "category": rng.choice(CATEGORIES),
+                "counterparty": rng.choice(["", "Thandi", "Stokvel"]),
+                "direction": "credit" if is_credit else "debit",
+                "channel": rng.choice(CHANNELS),
+            }
+        )
+    return transactions
@@ -4,8 +4,9 @@ import os
 import sys
 import uuid
 from pathlib import Path
-from typing import Iterator
+from typing import Iterator, cast
 
+import pandas as pd
 import pytest
 from dotenv import load_dotenv
 
@@ -28,6 +29,9 @@ if database_url.startswith("sqlite"):
     )
 
 os.environ.setdefault("SECRET_KEY", "test-secret-key")
+# Route tests run the engine in-process; tests/test_analysis_pool.py covers the pool.
+os.environ.setdefault("ANALYSIS_WORKERS", "0")
+os.environ.setdefault("BACKGROUND_JOB_WORKERS", "0")
 
 if str(BACKEND_ROOT) not in sys.path:
     sys.path.insert(0, str(BACKEND_ROOT))
@@ -193,3 +197,8 @@ def override_db_with(session_obj):
             session_obj.close()
 
     app.dependency_overrides[get_db] = override_get_db
+
+
+def utc_timestamp(value: str) -> pd.Timestamp:
+    # pandas-stubs type the constructor as Timestamp | NaTType; test values are always valid.
+    return cast(pd.Timestamp, pd.Timestamp(value))
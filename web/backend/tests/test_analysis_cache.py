@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+import pandas as pd
+import pytest
+from sqlalchemy import inspect
+
+from app.analysis_cache import AnalysisCache, analysis_day, cache_key
+from app.database import SessionLocal
+from app.forensic_engine import ENGINE_VERSION, ForensicEngine, columns_from_rows
+from app.models_db import AnalysisCacheEntry
+from conftest import utc_timestamp
+
+
+def _transactions(as_of: pd.Timestamp) -> list[dict]:
+    return [
+        {
+            "id": f"air-{i}",
+            "timestamp": (as_of - timedelta(days=i)).isoformat(),
+            "amount": -10.0,
+            "description": "Airtime top-up",
+        }
+        for i in range(6)
+    ]
+
+
+def test_cache_key_covers_content_order_and_clock():
+    as_of = utc_timestamp("2026-06-01T00:00:00Z")
+    transactions = _transactions(as_of)
+    key = cache_key(transactions, as_of)
+
+    assert key == cache_key([dict(tx, ignored="x") for tx in transactions], as_of)
+    assert key != cache_key(list(reversed(transactions)), as_of)
+    assert key != cache_key(transactions, as_of + timedelta(days=1))
+    assert key != cache_key(transactions, as_of, profile="fast")
+    assert key != cache_key(transactions, as_of, rules_version="2026-06-01")
+    assert (
+        analysis_day(utc_timestamp("2026-06-01T17:45:00+02:00"))
+        == as_of.replace(hour=15).normalize()
+    )
+
+
+def test_analysis_cache_reuses_results_and_evicts_least_recent():
+    engine = ForensicEngine()
+    cache = AnalysisCache(max_entries=2)
+    as_of = utc_timestamp("2026-06-01T00:00:00Z")
+    transactions = _transactions(as_of)
+
+    first = cache.analyze(engine, transactions, as_of=as_of)
+    first["money_leaks"].append({"id": "caller-owned"})
+    second = cache.analyze(engine, transactions, as_of=as_of)
+
+    assert second == engine.analyze(transactions, as_of=as_of)
+    assert [leak["id"] for leak in second["money_leaks"]] == ["airtime-drain"]
+
+    cache.analyze(engine, transactions[:3], as_of=as_of)
+    cache.analyze(engine, transactions[:2], as_of=as_of)
+    assert len(cache) == 2
+    assert (
+        cache.get(cache_key(transactions, as_of, rules_version=engine.rules_version))
+        is None
+    )
+
+
+def test_analysis_cache_analyze_many_runs_misses_in_one_batch():
+    engine = ForensicEngine()
+    cache = AnalysisCache()
+    as_of = utc_timestamp("2026-06-01T00:00:00Z")
+    names = ("id", "timestamp", "amount", "description")
+    batches = {
+        account: columns_from_rows(
+            [tuple(tx[name] for name in names) for tx in _transactions(as_of)[:size]],
+            names,
+        )
+        for account, size in ((1, 6), (2, 2))
+    }
+    cache.analyze(engine, batches[2], as_of=as_of)
+
+    results = cache.analyze_many(engine, batches, as_of=as_of)
+
+    assert list(results) == [1, 2]
+    for account, columns in batches.items():
+        assert results[account] == engine.analyze_columns(columns, as_of=as_of)
+    assert (
+        cache.get(cache_key(batches[1], as_of, rules_version=engine.rules_version))
+        == results[1]
+    )
+
+
+def test_shared_tier_drops_entries_from_earlier_days(db_session, test_run_id):
+    if not inspect(db_session.get_bind()).has_table("analysis_cache_entries"):
+        pytest.skip(
+            "analysis_cache_entries table missing; run Alembic migrations first."
+        )
+    today = analysis_day()
+    stale_key = f"{test_run_id}-stale"
+    db_session.add(
+        AnalysisCacheEntry(
+            key=stale_key,
+            engine_version=ENGINE_VERSION,
+            as_of=(today - timedelta(days=1)).to_pydatetime(),
+            result={},
+        )
+    )
+    db_session.commit()
+    engine = ForensicEngine()
+    transactions = _transactions(today)
+    key = cache_key(transactions, today, rules_version=engine.rules_version)
+
+    try:
+        AnalysisCache(session_factory=SessionLocal).analyze(engine, transactions)
+
+        db_session.expunge_all()
+        assert db_session.get(AnalysisCacheEntry, stale_key) is None
+        assert db_session.get(AnalysisCacheEntry, key) is not None
+    finally:
+        db_session.query(AnalysisCacheEntry).filter(
+            AnalysisCacheEntry.key.in_([stale_key, key])
+        ).delete(synchronize_session=False)
+        db_session.commit()
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+import pandas as pd
+import pytest
+
+from app.analysis_pool import AnalysisPool, AnalysisPoolFull
+from app.forensic_engine import ForensicEngine
+from conftest import utc_timestamp
+
+
+def _transactions(as_of: pd.Timestamp) -> list[dict]:
+    return [
+        {
+            "id": f"air-{i}",
+            "timestamp": (as_of - timedelta(days=i)).isoformat(),
+            "amount": -10.0,
+            "description": "Airtime top-up",
+        }
+        for i in range(6)
+    ]
+
+
+def test_analysis_pool_matches_engine_and_rejects_when_full():
+    as_of = utc_timestamp("2026-06-01T00:00:00Z")
+    transactions = _transactions(as_of)
+    pool = AnalysisPool(workers=1, queue_size=0)
+    pool.start()
+    try:
+        assert pool.analyze(transactions, as_of=as_of) == ForensicEngine().analyze(
+            transactions, as_of=as_of
+        )
+
+        pool._admitted = pool.capacity
+        with pytest.raises(AnalysisPoolFull):
+            pool.analyze(transactions, as_of=as_of)
+    finally:
+        pool._admitted = 0
+        pool.stop()
+
+
+def test_analysis_pool_without_workers_runs_inline():
+    as_of = utc_timestamp("2026-06-01T00:00:00Z")
+    transactions = _transactions(as_of)
+    pool = AnalysisPool(workers=0, queue_size=0)
+    pool.start()
+
+    assert pool.analyze(transactions, as_of=as_of) == ForensicEngine().analyze(
+        transactions, as_of=as_of
+    )
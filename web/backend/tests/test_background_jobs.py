@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app import background_jobs
+from app.ml_engine import MLEngine
+from app.ml_models import ModelRegistry
+from app.models_db import BackgroundJob
+
+
+def test_sync_handlers_run_off_the_event_loop(monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="background-job")
+    monkeypatch.setattr(background_jobs, "_db_executor", executor)
+
+    def slow_handler(db, seconds):
+        time.sleep(seconds)
+        return threading.current_thread().name
+
+    async def scenario():
+        job = asyncio.ensure_future(background_jobs._run_sync(slow_handler, 0.3))
+        ticks = 0
+        while not job.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+        return job.result(), ticks
+
+    try:
+        thread_name, ticks = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    assert thread_name.startswith("background-job")
+    # The loop kept serving other coroutines while the handler slept.
+    assert ticks >= 10
+
+
+def _worker_pid(db, job):
+    return job.job_id, os.getpid()
+
+
+def test_job_handlers_run_in_a_worker_process(monkeypatch):
+    pool = ProcessPoolExecutor(
+        max_workers=1, mp_context=multiprocessing.get_context("spawn")
+    )
+    monkeypatch.setattr(background_jobs, "_job_pool", pool)
+    job = BackgroundJob(job_id="job-1", job_type="pytest", payload={})
+
+    try:
+        job_id, pid = asyncio.run(background_jobs._run_in_worker(_worker_pid, job))
+    finally:
+        pool.shutdown()
+
+    assert job_id == "job-1"
+    assert pid != os.getpid()
+
+
+def test_stale_model_is_used_while_training_is_queued(monkeypatch, tmp_path):
+    registry = ModelRegistry(tmp_path, max_age=timedelta(0))
+    amounts = -np.random.default_rng(1).lognormal(4, 1, size=200)
+    columns = {"id": [str(i) for i in range(200)], "amount": amounts.tolist()}
+    stale = MLEngine().train_anomaly_model(registry, "user-u1", columns)
+    queued = []
+    monkeypatch.setattr(background_jobs, "model_registry", registry)
+    monkeypatch.setattr(background_jobs, "queue_model_training", queued.append)
+
+    db = Session()  # unbound: the stored user model needs no query
+    model = background_jobs._anomaly_model(db, "u1")
+
+    assert stale is not None and model is not None
+    assert model.version == stale.version
+    assert queued == [db]
+
+
+def test_shutdown_requeues_jobs_still_running(monkeypatch):
+    claims = [BackgroundJob(id=7, job_id="job-7", job_type="slow", payload={})]
+    requeued = []
+
+    async def endless_job(job):
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(background_jobs.settings, "background_job_workers", 0)
+    monkeypatch.setattr(background_jobs.settings, "ml_train_interval_hours", 0)
+    monkeypatch.setattr(background_jobs, "_reclaim_expired_jobs", lambda db: None)
+    monkeypatch.setattr(
+        background_jobs, "_claim_next_job", lambda db: claims.pop() if claims else None
+    )
+    monkeypatch.setattr(background_jobs, "_perform_job", endless_job)
+    monkeypatch.setattr(
+        background_jobs, "_requeue_jobs", lambda db, job_pks: requeued.extend(job_pks)
+    )
+
+    async def scenario():
+        background_jobs.start_background_worker()
+        while claims:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        await background_jobs.stop_background_worker()
+
+    asyncio.run(scenario())
+
+    assert requeued == [7]
@@ -1,6 +1,13 @@
 from __future__ import annotations
 
-from app.models_db import AuditLog
+import json
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import inspect
+
+from app.feature_store import get_user_features, monthly_spend, record_transactions
+from app.models_db import AuditLog, LinkedAccount, Transaction, User, UserFeatures
 from conftest import auth_headers
 
 
@@ -38,6 +45,29 @@ def test_analyze_accepts_strict_request_schema(client):
     assert isinstance(body["money_leaks"], list)
 
 
+def test_analyze_returns_detector_diagnostics_on_request(client):
+    response = client.post(
+        "/v1/analyze?profile=fast&diagnostics=true",
+        json={
+            "transactions": [
+                {
+                    "id": "txn-1",
+                    "timestamp": "2026-06-15T12:00:00Z",
+                    "amount": -15.0,
+                    "description": "Airtime",
+                }
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+    diagnostics = response.json()["diagnostics"]
+    assert diagnostics["profile"] == "fast"
+    names = [timing["name"] for timing in diagnostics["detectors"]]
+    assert "airtime_drains" in names
+    assert "subscription_traps" not in names
+
+
 def test_analyze_rejects_legacy_raw_list_shape(client):
     response = client.post(
         "/v1/analyze",
@@ -54,6 +84,88 @@ def test_analyze_rejects_legacy_raw_list_shape(client):
     assert response.json()["error"]["code"] == "validation_error"
 
 
+def test_analyze_columnar_matches_row_request(client):
+    transactions = [
+        {
+            "id": f"txn-{i}",
+            "timestamp": f"2026-06-{i + 1:02d}T12:00:00Z",
+            "amount": -12.0,
+            "description": "Airtime top-up",
+            "merchant": "MTN",
+        }
+        for i in range(6)
+    ]
+    rows = client.post("/v1/analyze", json={"transactions": transactions})
+    columnar = client.post(
+        "/v1/analyze/columnar",
+        json={
+            "ids": [t["id"] for t in transactions],
+            "timestamps": [t["timestamp"] for t in transactions],
+            "amounts": [t["amount"] for t in transactions],
+            "descriptions": [t["description"] for t in transactions],
+            "merchants": [t["merchant"] for t in transactions],
+        },
+    )
+
+    assert columnar.status_code == 200
+    assert columnar.json() == rows.json()
+
+
+def test_analyze_columnar_rejects_ragged_columns(client):
+    response = client.post(
+        "/v1/analyze/columnar",
+        json={
+            "ids": ["txn-1", "txn-2"],
+            "timestamps": ["2026-06-15T12:00:00Z"],
+            "amounts": [-10.0, -20.0],
+        },
+    )
+
+    assert response.status_code == 422
+    assert response.json()["error"]["code"] == "validation_error"
+    assert "timestamps has 1 items" in str(response.json()["error"]["details"])
+
+
+def test_analyze_stream_matches_row_request(client):
+    transactions = [
+        {
+            "id": f"txn-{i}",
+            "timestamp": f"2026-06-{i + 1:02d}T12:00:00Z",
+            "amount": -12.0,
+            "description": "Airtime top-up",
+        }
+        for i in range(6)
+    ]
+    rows = client.post("/v1/analyze", json={"transactions": transactions})
+    streamed = client.post(
+        "/v1/analyze/stream",
+        content="\n".join(json.dumps(t) for t in transactions) + "\n",
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert streamed.status_code == 200
+    assert streamed.json() == rows.json()
+
+
+def test_analyze_stream_reports_invalid_line(client):
+    body = "\n".join(
+        [
+            json.dumps(
+                {"id": "txn-1", "timestamp": "2026-06-15T12:00:00Z", "amount": -10.0}
+            ),
+            json.dumps({"id": "txn-2", "timestamp": "2026-06-15T12:00:00Z"}),
+        ]
+    )
+    response = client.post(
+        "/v1/analyze/stream",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 422
+    assert "Line 2: amount" in response.json()["error"]["message"]
+
+
 def test_freeze_persists_for_authenticated_user(client, db_session, test_email):
     token = _registered_token(client, test_email)
 
@@ -118,3 +230,54 @@ def test_link_account_writes_consent_change_audit(client, db_session, test_email
         .count()
         == 1
     )
+
+
+def test_unlink_account_drops_its_transactions_from_user_features(
+    client, db_session, test_email
+):
+    if not inspect(db_session.get_bind()).has_table("user_features"):
+        pytest.skip("user_features table missing; run Alembic migrations first.")
+    token = _registered_token(client, test_email)
+    user_id = db_session.query(User.id).filter(User.email == test_email).scalar()
+    accounts = [
+        LinkedAccount(user_id=user_id, bank_name="Pytest Bank", account_id=name)
+        for name in (f"{test_email}-kept", f"{test_email}-unlinked")
+    ]
+    db_session.add_all(accounts)
+    db_session.flush()
+    rows = []
+    for account, month in ((accounts[0], 5), (accounts[1], 6)):
+        for i in range(3):
+            timestamp = datetime(2026, month, 1, i, tzinfo=timezone.utc)
+            rows.append((timestamp, -100.0, None))
+            db_session.add(
+                Transaction(
+                    user_id=user_id,
+                    account_id=account.id,
+                    transaction_id=f"{test_email}-{month}-{i}",
+                    timestamp=timestamp,
+                    amount=-100.0,
+                )
+            )
+    record_transactions(db_session, user_id, rows)
+    db_session.commit()
+
+    def stored() -> tuple:
+        features = get_user_features(db_session, user_id)
+        assert features is not None
+        count = (
+            db_session.query(UserFeatures.transaction_count)
+            .filter(UserFeatures.user_id == user_id)
+            .scalar()
+        )
+        return count, monthly_spend(features).to_dict()
+
+    assert stored() == (6, {"2026-05": 300.0, "2026-06": 300.0})
+
+    response = client.delete(
+        f"/v1/accounts/{accounts[1].id}", headers=auth_headers(token)
+    )
+
+    assert response.status_code == 200
+    db_session.expunge_all()
+    assert stored() == (3, {"2026-05": 300.0})
@@ -0,0 +1,461 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.detectors.debit_orders import detect_debit_orders
+from app.detectors.evidence import latest_positions
+from app.detectors.models import LeakBatch
+from app.detectors.subscription_traps import detect_subscription_traps
+from app.forensic_engine import TRANSACTION_COLUMNS, ForensicEngine, columns_from_rows
+from benchmarks.synthetic import synthetic_transactions
+from conftest import utc_timestamp
+
+
+def _tx(tx_id: str, description: str, amount: float, **extra) -> dict:
+    return {
+        "id": tx_id,
+        "timestamp": pd.Timestamp.now(tz="UTC").isoformat(),
+        "amount": amount,
+        "description": description,
+        **extra,
+    }
+
+
+def test_keyword_index_matches_substring_semantics():
+    frame = ForensicEngine().ingest(
+        [
+            _tx("t1", "Cell cash out", -20.0),
+            _tx("t2", "Monthly debit order", -150.0),
+            _tx("t3", "Groceries", -80.0, merchant="Spar"),
+            _tx("t4", "Transfer", -300.0, counterparty="Mashonisa Joe", channel="momo"),
+        ]
+    )
+    df = frame.df
+    keyword_index = frame.rules.keyword_index
+
+    for family in frame.rules.families:
+        text = df[list(family.columns)].astype(str).agg(" ".join, axis=1).str.lower()
+        expected = text.apply(lambda s: any(k in s for k in family.keywords))
+        assert keyword_index.matches(df, family.name).tolist() == expected.tolist()
+
+    assert keyword_index.matches(df, "airtime").tolist() == [True, False, False, False]
+    assert keyword_index.matches(df, "fees").tolist() == [True, False, False, False]
+    assert keyword_index.matches(df, "p2p").tolist() == [False, False, False, True]
+    assert keyword_index.matches(df, "loan").tolist() == [False, False, False, True]
+
+
+def test_ingest_builds_shared_feature_frame():
+    now = pd.Timestamp.now(tz="UTC")
+    frame = ForensicEngine().ingest(
+        [
+            {
+                "id": "t1",
+                "timestamp": now.isoformat(),
+                "amount": -10.0,
+                "merchant": "MTN",
+            },
+            {
+                "id": "t2",
+                "timestamp": (now - timedelta(days=45)).isoformat(),
+                "amount": 250.0,
+                "channel": "Bank",
+            },
+            {"id": "t3", "timestamp": "not a date", "amount": -5.0},
+        ]
+    )
+    df = frame.df
+
+    assert frame.as_of >= now
+    assert df["text"].tolist() == [" mtn ", "  ", "  "]
+    assert df["is_debit"].tolist() == [True, False, True]
+    assert df["in_last_30d"].tolist() == [True, False, False]
+    assert df["in_last_60d"].tolist() == [True, True, False]
+    assert df["day_of_week"].iloc[2] == -1
+    assert isinstance(df["direction"].dtype, pd.CategoricalDtype)
+    assert df["channel"].tolist() == ["", "bank", ""]
+
+
+def test_windowed_aggregates_match_frame_filters():
+    as_of = utc_timestamp("2026-07-01T12:00:00Z")
+    frame = ForensicEngine().ingest(
+        synthetic_transactions(3000, seed=5, days=200), as_of=as_of
+    )
+    df = frame.df
+    spend = df["is_debit"] & (df["abs_amount"] > 0)
+
+    for window, recent in (
+        (7, df["timestamp"] >= as_of - timedelta(days=7)),
+        (30, df["in_last_30d"]),
+        (90, df["in_last_90d"]),
+        (None, True),
+    ):
+        for family in ("airtime", "fees", "p2p", "vas"):
+            rows = df[frame.matches(family) & spend & recent]
+            totals = frame.windows.family(family, window)
+            assert totals.count == len(rows)
+            assert totals.total == float(rows["abs_amount"].sum())
+        rows = df[(df["direction"] == "credit") & recent]
+        assert frame.windows.direction("credit", window).count == len(rows)
+
+    merchants = frame.windows.merchants
+    expected = df[spend & df["in_last_30d"]].groupby("merchant")["abs_amount"].sum()
+    assert merchants.loc[expected.index, "sum_30d"].tolist() == expected.tolist()
+    months = frame.windows.months
+    assert months["count"].sum() == df["timestamp"].notna().sum()
+    assert months["spend_sum"].sum() == pytest.approx(
+        df.loc[spend & df["timestamp"].notna(), "abs_amount"].sum()
+    )
+
+
+def test_evidence_levels_and_latest_samples():
+    as_of = utc_timestamp("2026-06-30T00:00:00Z")
+    transactions = [
+        _tx(
+            f"air-{i}",
+            "Airtime top-up",
+            -10.0,
+            timestamp=(as_of - timedelta(days=i)).isoformat(),
+        )
+        for i in range(8)
+    ]
+
+    for small_input_rows in (0, 50):
+        engine = ForensicEngine(small_input_rows=small_input_rows)
+        full, summary, none = (
+            engine.analyze(transactions, as_of=as_of, evidence=level)["money_leaks"][0]
+            for level in ("full", "summary", "none")
+        )
+        assert [row["id"] for row in full["evidence"]["sample"]] == [
+            "air-4",
+            "air-3",
+            "air-2",
+            "air-1",
+            "air-0",
+        ]
+        assert full["evidence"]["sample"][-1]["timestamp"] == as_of.isoformat()
+        assert summary["evidence"] == {
+            k: v for k, v in full["evidence"].items() if k != "sample"
+        }
+        assert none["evidence"] == {}
+    with pytest.raises(ValueError, match="evidence"):
+        ForensicEngine().analyze(transactions, evidence="some")
+
+
+def test_latest_positions_match_a_sorted_tail():
+    rng = np.random.default_rng(3)
+    timestamps = pd.Series(
+        pd.to_datetime(rng.integers(0, 50, size=400), unit="D", utc=True)
+    )
+    timestamps[rng.random(400) < 0.05] = pd.NaT
+
+    for n in (0, 1, 7, 25, 400, 500):
+        expected = timestamps.sort_values(kind="stable").tail(n).index.to_numpy()
+        assert latest_positions(timestamps, n).tolist() == expected.tolist()
+
+
+def test_ingest_columns_matches_row_ingest():
+    engine = ForensicEngine()
+    as_of = utc_timestamp("2026-06-02T00:00:00Z")
+    transactions = [
+        _tx(
+            "t1",
+            "Airtime top-up",
+            -10.0,
+            merchant="MTN",
+            timestamp="2026-06-01T08:00:00Z",
+        ),
+        _tx("t2", "Salary", 2500.0, channel="Bank", timestamp="2026-05-01T08:00:00Z"),
+        _tx(
+            "t3", "Service fee", -5.0, direction=None, timestamp="2026-04-01T08:00:00Z"
+        ),
+    ]
+    rows = [tuple(tx.get(name) for name in TRANSACTION_COLUMNS) for tx in transactions]
+
+    by_rows = engine.ingest(transactions, as_of=as_of).df
+    by_columns = engine.ingest_columns(
+        columns_from_rows(rows, TRANSACTION_COLUMNS), as_of=as_of
+    ).df
+
+    pd.testing.assert_frame_equal(by_columns, by_rows[by_columns.columns])
+    assert engine.ingest_columns(columns_from_rows([], TRANSACTION_COLUMNS)).empty
+
+
+def test_mailbox_effect_sums_debits_in_the_48_hour_window():
+    start = utc_timestamp("2026-06-01T08:00:00Z")
+
+    def at(hours: float) -> str:
+        return (start + timedelta(hours=hours)).isoformat()
+
+    frame = ForensicEngine().ingest(
+        [
+            {"id": "salary", "timestamp": at(0), "amount": 1000.0},
+            {"id": "same-time", "timestamp": at(0), "amount": -700.0},
+            {"id": "d1", "timestamp": at(1), "amount": -500.0},
+            {"id": "d2", "timestamp": at(48), "amount": -400.0},
+            {"id": "late", "timestamp": at(49), "amount": -300.0},
+            {"id": "grant", "timestamp": at(100), "amount": 2000.0},
+        ]
+    )
+
+    leaks = ForensicEngine().detect_mailbox_effect(frame)
+
+    assert [leak.id for leak in leaks] == ["mailbox-effect-salary"]
+    evidence = leaks[0].evidence
+    assert evidence is not None
+    assert evidence["withdrawn_amount"] == 900.0
+    assert evidence["withdrawal_ratio"] == 0.9
+
+
+def test_high_value_debit_orders_are_built_as_one_batch():
+    as_of = utc_timestamp("2026-06-30T00:00:00Z")
+    transactions = [
+        _tx(
+            f"do-{i}",
+            "Debit order insurance",
+            -2500.0 - i,
+            merchant="Insure Co",
+            timestamp=(as_of - timedelta(days=i, microseconds=i)).isoformat(),
+        )
+        for i in range(3)
+    ]
+    engine = ForensicEngine(small_input_rows=0)
+
+    [batch, *_] = detect_debit_orders(engine.ingest(transactions, as_of=as_of))
+    assert isinstance(batch, LeakBatch) and len(batch) == 3
+
+    result = engine.analyze(
+        transactions, as_of=as_of, detectors=["debit_orders"], diagnostics=True
+    )
+    high = [leak for leak in result["money_leaks"] if leak["severity"] == "high"]
+    assert high[1] == {
+        "id": "debit-order-high-do-1",
+        "detector": "DebitOrders",
+        "title": "High-value debit order: R2501",
+        "plain_language_reason": "A debit order of R2501 was processed. Make sure this is expected and authorized.",
+        "severity": "high",
+        "transaction_id": "do-1",
+        "estimated_monthly_cost": 2501.0,
+        "evidence": {
+            "amount": 2501.0,
+            "merchant": "Insure Co",
+            "description": "Debit order insurance",
+            "date": (as_of - timedelta(days=1, microseconds=1)).isoformat(),
+        },
+    }
+    assert result["diagnostics"]["detectors"][0]["leaks"] == len(result["money_leaks"])
+
+
+def test_subscription_traps_groups_recurring_charges():
+    now = pd.Timestamp.now(tz="UTC")
+    transactions = [
+        {
+            "id": f"netflix-{month}",
+            "timestamp": (now - timedelta(days=30 * month + 1)).isoformat(),
+            "amount": -99.0,
+            "description": "Netflix",
+            "merchant": "Netflix",
+        }
+        for month in range(5)
+    ]
+    transactions.append(
+        {
+            "id": "netflix-price-change",
+            "timestamp": (now - timedelta(days=2)).isoformat(),
+            "amount": -119.0,
+            "description": "Netflix",
+            "merchant": "Netflix",
+        }
+    )
+
+    leaks = detect_subscription_traps(ForensicEngine().ingest(transactions))
+
+    assert [leak.id for leak in leaks] == ["subscription-trap-netflix_netflix_99.0"]
+    assert leaks[0].transaction_id == "netflix-0"
+    evidence = leaks[0].evidence
+    assert evidence is not None
+    assert evidence["total_occurrences"] == 5
+    assert evidence["months_active"] == 4.0
+
+
+def test_analyze_runs_selected_detectors_with_diagnostics():
+    engine = ForensicEngine(small_input_rows=0)
+    transactions = [_tx(f"t{i}", "Airtime top-up", -10.0) for i in range(6)]
+
+    result = engine.analyze(
+        transactions, detectors=["airtime_drains"], diagnostics=True
+    )
+
+    assert [leak["detector"] for leak in result["money_leaks"]] == ["AirtimeDrains"]
+    [timing] = result["diagnostics"]["detectors"]
+    assert timing["name"] == "airtime_drains"
+    assert timing["candidate_rows"] == 6
+    assert timing["leaks"] == 1
+    assert "diagnostics" not in engine.analyze(transactions)
+    assert "subscription_traps" not in [
+        spec.name for spec in engine.registry.select("fast")
+    ]
+
+
+def test_thread_execution_matches_serial_leak_order():
+    now = pd.Timestamp.now(tz="UTC")
+    transactions = [_tx(f"air-{i}", "Airtime top-up", -10.0) for i in range(6)] + [
+        {
+            "id": f"fee-{i}",
+            "timestamp": (now - timedelta(days=i)).isoformat(),
+            "amount": -60.0,
+            "description": "Service fee",
+        }
+        for i in range(3)
+    ]
+    threaded = ForensicEngine(execution="thread", max_workers=4, small_input_rows=0)
+    try:
+        result = threaded.analyze(transactions)
+    finally:
+        threaded.close()
+
+    assert (
+        result["money_leaks"]
+        == ForensicEngine(small_input_rows=0).analyze(transactions)["money_leaks"]
+    )
+
+
+def test_lean_frame_uses_compact_dtypes_and_same_results():
+    as_of = utc_timestamp("2026-06-30T00:00:00Z")
+
+    def days_ago(days: int) -> str:
+        return (as_of - timedelta(days=days)).isoformat()
+
+    transactions = (
+        [
+            _tx(
+                f"air-{i}",
+                "Airtime top-up",
+                -10.0,
+                merchant="MTN",
+                timestamp=days_ago(i),
+            )
+            for i in range(6)
+        ]
+        + [
+            _tx(f"fee-{i}", "Service fee", -60.0, timestamp=days_ago(i))
+            for i in range(3)
+        ]
+        + [
+            _tx(
+                f"gym-{i}",
+                "Gym membership",
+                -299.0,
+                merchant="Gym Co",
+                timestamp=days_ago(30 * i + 1),
+            )
+            for i in range(4)
+        ]
+        + [
+            _tx(
+                "p2p-1",
+                "Send money",
+                -400.0,
+                counterparty="Thandi",
+                timestamp=days_ago(2),
+            )
+        ]
+    )
+    lean = ForensicEngine(lean=True, small_input_rows=0)
+
+    df = lean.ingest(transactions, as_of=as_of).df
+    assert {df[col].dtype.name for col in ("merchant", "category", "text")} == {
+        "category"
+    }
+    assert lean.analyze(transactions, as_of=as_of) == ForensicEngine(
+        small_input_rows=0
+    ).analyze(transactions, as_of=as_of)
+
+
+def test_lean_text_categories_merge_case_and_join_variants():
+    transactions = [
+        _tx("a", "Airtime", -10.0),
+        _tx("b", "airtime", -10.0),
+        _tx("c", "a b", -5.0, merchant="c"),
+        _tx("d", "a", -5.0, merchant="b c"),
+    ]
+    lean = ForensicEngine(lean=True, small_input_rows=0)
+
+    text = lean.ingest(transactions).df["text"]
+    assert text[0] == text[1] and text[2] == text[3]
+    assert len(text.cat.categories) == 2
+    assert lean.analyze(transactions) == ForensicEngine(small_input_rows=0).analyze(
+        transactions
+    )
+
+
+def test_analyze_many_matches_per_user_analyze():
+    as_of = utc_timestamp("2026-06-30T00:00:00Z")
+    engine = ForensicEngine(small_input_rows=0)
+
+    def days_ago(days: float) -> str:
+        return (as_of - timedelta(days=days)).isoformat()
+
+    statements = {
+        "airtime": [
+            _tx(
+                f"air-{i}",
+                "Airtime top-up",
+                -10.0,
+                merchant="MTN",
+                timestamp=days_ago(i),
+            )
+            for i in range(6)
+        ],
+        "gym": [
+            _tx(
+                f"gym-{i}",
+                "Gym membership",
+                -299.0,
+                merchant="Gym Co",
+                timestamp=days_ago(30 * i + 1),
+            )
+            for i in range(4)
+        ],
+        "mailbox": [_tx("salary", "Salary", 1000.0, timestamp=days_ago(3))]
+        + [
+            _tx(
+                f"cash-{i}",
+                "ATM withdrawal",
+                -300.0,
+                timestamp=days_ago(3 - (i + 1) / 4),
+            )
+            for i in range(3)
+        ],
+        "quiet": [
+            _tx("bread", "Groceries", -20.0, merchant="Spar", timestamp=days_ago(1))
+        ],
+    }
+    batch = [dict(tx, user_id=user) for user, txs in statements.items() for tx in txs]
+    batch.append(
+        _tx("orphan", "Service fee", -60.0, timestamp=days_ago(1))
+    )  # no user_id
+
+    results = engine.analyze_many(batch, as_of=as_of, diagnostics=True)
+
+    assert list(results) == list(statements)
+    for user, txs in statements.items():
+        expected = engine.analyze(txs, as_of=as_of, diagnostics=True)
+        result = results[user]
+        for timings in (
+            expected["diagnostics"]["detectors"],
+            result["diagnostics"]["detectors"],
+        ):
+            for timing in timings:
+                timing.pop("wall_ms")
+        for diagnostics in (expected["diagnostics"], result["diagnostics"]):
+            del diagnostics["ingest_ms"], diagnostics["total_ms"]
+        assert result == expected
+    # Screened-out detectors are not run at all.
+    assert [t["leaks"] for t in results["quiet"]["diagnostics"]["detectors"]] == [0] * 8
+    assert [leak["detector"] for leak in results["mailbox"]["money_leaks"]] == [
+        "MailboxEffect"
+    ]
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+import pandas as pd
+
+from app.forensic_engine import ForensicEngine
+from app.forensic_state import (
+    analyze_incremental,
+    build_state,
+    state_from_json,
+    state_to_json,
+)
+
+
+def _history() -> list[dict]:
+    now = pd.Timestamp.now(tz="UTC")
+
+    def tx(
+        tx_id: str, days_ago: float, amount: float, description: str, **extra
+    ) -> dict:
+        return {
+            "id": tx_id,
+            "timestamp": (now - timedelta(days=days_ago)).isoformat(),
+            "amount": amount,
+            "description": description,
+            **extra,
+        }
+
+    transactions = [tx(f"air-{i}", 100 + i, -10.0, "Airtime top-up") for i in range(16)]
+    transactions += [tx(f"fee-{i}", 95 + i, -20.0, "Service fee") for i in range(3)]
+    transactions += [
+        tx(f"mtn-{i}", 120 + i, -30.0, "Data bundle", merchant="MTN") for i in range(3)
+    ]
+    transactions += [
+        tx(f"netflix-{month}", 30 * month + 5, -99.0, "Netflix", merchant="Netflix")
+        for month in range(6)
+    ]
+    transactions += [tx(f"spend-{i}", 20 + i, -15.0, "Groceries") for i in range(10)]
+    transactions += [
+        tx("salary", 10, 1000.0, "Salary"),
+        tx("cash-out", 9.5, -900.0, "ATM withdrawal"),
+    ]
+    return transactions
+
+
+def test_incremental_fold_matches_full_analysis():
+    engine = ForensicEngine()
+    transactions = _history()
+    new_ids = {"netflix-0", "salary", "cash-out"}
+    older = [tx for tx in transactions if tx["id"] not in new_ids]
+    new = [tx for tx in transactions if tx["id"] in new_ids]
+
+    _, state = build_state(engine, older)
+    assert state.history.row_count == 27  # rows older than 30 days
+    assert len(state.window) == 10
+    state = state_from_json(state_to_json(state))
+
+    folded, state = analyze_incremental(engine, state, transactions, new)
+    full = engine.analyze(transactions)
+
+    assert state.folds == 1
+    assert [leak["detector"] for leak in folded["money_leaks"]] == [
+        "AirtimeDrains",
+        "FeeLeakage",
+        "SubscriptionTraps",
+        "MailboxEffect",
+    ]
+    assert folded["money_leaks"] == full["money_leaks"]
+    assert folded["financial_health_score"] == full["financial_health_score"]
+    assert folded["inclusion_metrics"] == full["inclusion_metrics"]
+    assert state.history.mailbox_hit is not None
+    assert state.history.mailbox_hit["id"] == "mailbox-effect-salary"
+
+
+def test_incremental_fold_skips_transactions_sent_again():
+    engine = ForensicEngine()
+    transactions = _history()
+    older = [tx for tx in transactions if tx["id"] not in {"salary", "cash-out"}]
+    new = [tx for tx in transactions if tx["id"] in {"salary", "cash-out"}]
+
+    _, state = build_state(engine, older)
+    state = state_from_json(state_to_json(state))
+    # A provider re-sending its last month: only two rows are new.
+    recent = [tx for tx in transactions if tx["id"].startswith(("spend-", "netflix-0"))]
+    folded, state = analyze_incremental(engine, state, transactions, recent + new)
+    # ... and the two new rows again.
+    folded_again, state = analyze_incremental(engine, state, transactions, new)
+    full = engine.analyze(transactions)
+
+    assert state.folds == 2
+    assert state.history.row_count == 27
+    assert len(state.window) == 13
+    assert folded["money_leaks"] == full["money_leaks"]
+    assert folded_again["money_leaks"] == full["money_leaks"]
+    assert folded_again["inclusion_metrics"] == full["inclusion_metrics"]
+
+
+def test_back_dated_transaction_rebuilds_the_state():
+    engine = ForensicEngine()
+    transactions = _history()
+    older = [tx for tx in transactions if tx["id"] != "air-0"]
+    back_dated = [tx for tx in transactions if tx["id"] == "air-0"]
+
+    _, state = build_state(engine, older)
+    _, state = analyze_incremental(engine, state, older, [])
+    assert state.folds == 1
+    # Dated 100 days ago, long before the watermark: aggregates cannot take it in.
+    folded, state = analyze_incremental(engine, state, transactions, back_dated)
+    full = engine.analyze(transactions)
+
+    assert state.folds == 0
+    assert state.history.row_count == 27
+    assert folded["money_leaks"] == full["money_leaks"]
+    assert folded["inclusion_metrics"] == full["inclusion_metrics"]
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+from collections import Counter
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import inspect
+
+from app.anomaly_scores import detect_anomalies_incremental
+from app.detectors.windows import monthly_totals
+from app.feature_store import (
+    empty_features,
+    fold_features,
+    monthly_spend,
+    spending_features,
+)
+from app.ml_engine import MLEngine, anomaly_features
+from app.ml_models import ModelRegistry
+from app.models_db import Transaction
+from app.timestamps import to_utc_timestamps
+from conftest import create_db_user, utc_timestamp
+
+
+def _columns(n: int, seed: int) -> dict:
+    rng = np.random.default_rng(seed)
+    start = utc_timestamp("2026-05-01T00:00:00Z")
+    return {
+        "id": [f"tx-{seed}-{i}" for i in range(n)],
+        "timestamp": [
+            (start + timedelta(minutes=int(m))).isoformat()
+            for m in rng.integers(0, 60 * 24 * 30, size=n)
+        ],
+        "amount": (-rng.lognormal(4, 1, size=n)).tolist(),
+    }
+
+
+def test_stored_model_scores_new_transactions_without_refitting(tmp_path):
+    registry = ModelRegistry(tmp_path)
+    engine = MLEngine()
+    assert registry.current("user-1") is None
+
+    model = engine.train_anomaly_model(registry, "user-1", _columns(500, seed=1))
+    assert model is not None
+    assert model.features == ("amount", "hour", "day_of_week")
+    assert (tmp_path / "user-1" / "CURRENT").read_text() == model.version
+
+    # A fresh registry (another worker) loads the saved artifact memory-mapped.
+    loaded = ModelRegistry(tmp_path).current("user-1")
+    assert loaded is not None
+    assert loaded.version == model.version
+
+    new = _columns(40, seed=2)
+    X, _ = anomaly_features(pd.DataFrame(new))
+    assert X is not None
+    result = engine.detect_anomalies(new, model=loaded)
+    expected, flagged = model.score(X)
+    assert result["model_version"] == model.version
+    assert list(result["anomaly_scores"].values()) == expected.tolist()
+    assert result["anomalies"] == [new["id"][i] for i in np.flatnonzero(flagged)]
+    predicted = model.forest.predict(model.scaler.transform(X))
+    assert flagged.tolist() == (predicted == -1).tolist()
+
+
+def test_models_go_stale_and_mismatched_features_refit(tmp_path):
+    registry = ModelRegistry(tmp_path, max_age=timedelta(hours=1))
+    engine = MLEngine()
+    first = engine.train_anomaly_model(registry, "cohort", _columns(200, seed=3))
+    assert first is not None
+
+    assert not registry.is_stale(first)
+    assert registry.is_stale(first, now=first.trained_at + timedelta(hours=1))
+    assert registry.is_stale(None)
+
+    second = engine.train_anomaly_model(registry, "cohort", _columns(200, seed=4))
+    current = ModelRegistry(tmp_path).current("cohort")
+    assert second is not None and current is not None
+    assert current.version == second.version
+
+    # Amounts only: the stored three-feature model does not apply.
+    amounts = {"id": [str(i) for i in range(20)], "amount": list(range(20))}
+    assert engine.detect_anomalies(amounts, model=second)["model_version"] is None
+
+
+def test_registry_releases_replaced_and_least_recent_models(tmp_path):
+    registry = ModelRegistry(tmp_path, max_loaded=2)
+    engine = MLEngine()
+    for key in ("user-1", "user-2"):
+        engine.train_anomaly_model(registry, key, _columns(200, seed=7))
+    # Another worker retrains user-1: the loaded version is no longer CURRENT.
+    newer = engine.train_anomaly_model(
+        ModelRegistry(tmp_path), "user-1", _columns(200, seed=8)
+    )
+    current = registry.current("user-1")
+    assert newer is not None and current is not None
+    assert current.version == newer.version
+
+    engine.train_anomaly_model(registry, "user-3", _columns(200, seed=9))
+    assert list(registry._loaded) == ["user-1", "user-3"]
+
+
+def test_incremental_scores_only_new_transactions(db_session, test_email, tmp_path):
+    if not inspect(db_session.get_bind()).has_table("anomaly_scores"):
+        pytest.skip("anomaly_scores table missing; run Alembic migrations first.")
+    user = create_db_user(db_session, test_email)
+    columns = _columns(40, seed=5)
+
+    def add(rows: range) -> None:
+        for i in rows:
+            db_session.add(
+                Transaction(
+                    user_id=user.id,
+                    transaction_id=f"{test_email}-{i}",
+                    timestamp=datetime.fromisoformat(columns["timestamp"][i]),
+                    amount=columns["amount"][i],
+                )
+            )
+        db_session.commit()
+
+    add(range(30))
+    model = MLEngine().train_anomaly_model(
+        ModelRegistry(tmp_path), "cohort", _columns(300, seed=6)
+    )
+    assert model is not None
+
+    first = detect_anomalies_incremental(db_session, model, user.id, limit=100)
+    db_session.commit()
+    again = detect_anomalies_incremental(db_session, model, user.id, limit=100)
+    assert (first["scored_transactions"], again["scored_transactions"]) == (30, 0)
+    assert again["anomaly_scores"] == first["anomaly_scores"]
+    assert again["anomalies"] == first["anomalies"]
+
+    add(range(30, 40))
+    latest = detect_anomalies_incremental(db_session, model, user.id, limit=100)
+    assert latest["scored_transactions"] == 10
+    assert latest["total_transactions"] == 40
+
+
+def test_user_clusters_fit_in_batches_and_name_centroids():
+    rng = np.random.default_rng(7)
+    small = np.column_stack(
+        [rng.normal(30, 5, 1500), rng.normal(8, 1, 1500), rng.random(1500)]
+    )
+    large = np.column_stack(
+        [rng.normal(900, 50, 1500), rng.normal(2, 0.2, 1500), rng.random(1500)]
+    )
+    engine = MLEngine()
+
+    fitted = engine.fit_user_clusters(np.vstack([small, large]))
+    assert fitted is not None
+
+    labels = fitted["labels"]
+    assert fitted["distances"].shape == (3000, engine.kmeans.n_clusters)
+    assert (labels == fitted["distances"].argmin(axis=1)).all()
+    assert {fitted["profiles"][label] for label in labels[:1500]} == {
+        "frequent_small_spender"
+    }
+    assert {fitted["profiles"][label] for label in labels[1500:]} == {
+        "high_value_spender"
+    }
+    assert engine.fit_user_clusters(small[:3]) is None
+
+
+def test_feature_store_folds_match_a_rebuild_from_transactions():
+    columns = _columns(300, seed=8)
+    merchants = [f"shop-{i % 7}" for i in range(300)]
+    rows = list(zip(columns["timestamp"], columns["amount"], merchants))
+
+    folded = fold_features(fold_features(empty_features(), rows[:120]), rows[120:])
+    rebuilt = fold_features(empty_features(), rows)
+    assert folded["hour_weekday"] == rebuilt["hour_weekday"]
+    assert folded["monthly_totals"].keys() == rebuilt["monthly_totals"].keys()
+    assert folded["merchant_counts"] == dict(Counter(merchants))
+    assert sum(map(sum, folded["hour_weekday"])) == folded["transaction_count"] == 300
+
+    engine = MLEngine()
+    transactions = [{"timestamp": t, "amount": a} for t, a, _ in rows]
+    features = spending_features(folded)
+    expected = engine.cluster_users(transactions)["features"]
+    assert features["avg_transaction_amount"] == pytest.approx(
+        expected["avg_transaction_amount"]
+    )
+    assert features["transactions_per_day"] == pytest.approx(
+        expected["transactions_per_day"]
+    )
+    expected_monthly = monthly_totals(
+        to_utc_timestamps(pd.Series(columns["timestamp"])),
+        pd.Series(columns["amount"]).abs(),
+    )["sum"]
+    assert monthly_spend(folded).to_numpy() == pytest.approx(
+        expected_monthly.to_numpy()
+    )
+    assert engine.predict_leaks_from_monthly(
+        monthly_spend(folded)
+    ) == engine.predict_future_leaks(transactions, [])
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import json
+import os
+from datetime import timedelta
+
+import pandas as pd
+import pytest
+
+from app.analysis_cache import AnalysisCache
+from app.detectors.rules import DEFAULT_RULES_PATH, RulesCatalog, load_rules
+from app.forensic_engine import ForensicEngine
+from conftest import utc_timestamp
+
+
+def _catalog_data() -> dict:
+    with open(DEFAULT_RULES_PATH, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def _write(path, data: dict) -> None:
+    # Bump the mtime explicitly: two writes can land in the same clock tick.
+    stamp = os.stat(path).st_mtime_ns + 10**9 if path.exists() else None
+    path.write_text(json.dumps(data), encoding="utf-8")
+    if stamp is not None:
+        os.utime(path, ns=(stamp, stamp))
+
+
+def _transactions(as_of: pd.Timestamp) -> list[dict]:
+    return [
+        {
+            "id": f"air-{i}",
+            "timestamp": (as_of - timedelta(days=i)).isoformat(),
+            "amount": -10.0,
+            "description": "Airtime top-up",
+        }
+        for i in range(6)
+    ]
+
+
+def test_load_rules_rejects_incomplete_catalogs(tmp_path):
+    path = tmp_path / "rules.json"
+
+    data = _catalog_data()
+    del data["thresholds"]["fee_leakage"]["min_count"]
+    _write(path, data)
+    with pytest.raises(ValueError, match="fee_leakage"):
+        load_rules(path)
+
+    data = _catalog_data()
+    data["thresholds"]["airtime_drains"]["sample_size"] = 2.5
+    _write(path, data)
+    with pytest.raises(ValueError, match="whole number"):
+        load_rules(path)
+
+    data = _catalog_data()
+    data["keyword_families"] = [
+        f for f in data["keyword_families"] if f["name"] != "vas"
+    ]
+    _write(path, data)
+    with pytest.raises(ValueError, match="vas"):
+        load_rules(path)
+
+
+def test_catalog_reload_changes_results_and_cache_keys(tmp_path):
+    path = tmp_path / "rules.json"
+    _write(path, _catalog_data())
+    catalog = RulesCatalog(path, reload_seconds=0)
+    engine = ForensicEngine(rules=catalog, small_input_rows=0)
+    cache = AnalysisCache()
+    as_of = utc_timestamp("2026-06-01T00:00:00Z")
+    transactions = _transactions(as_of)
+
+    first = cache.analyze(engine, transactions, as_of=as_of)
+    assert [leak["id"] for leak in first["money_leaks"]] == ["airtime-drain"]
+
+    data = _catalog_data()
+    data["version"] = "stricter"
+    data["thresholds"]["airtime_drains"]["min_count"] = 10
+    _write(path, data)
+
+    second = cache.analyze(engine, transactions, as_of=as_of)
+    assert engine.rules_version == "stricter"
+    assert second["money_leaks"] == []
+    assert len(cache) == 2
+
+    # A broken file is ignored; the last good rules stay active.
+    path.write_text("{not json", encoding="utf-8")
+    stamp = os.stat(path).st_mtime_ns + 10**9
+    os.utime(path, ns=(stamp, stamp))
+    assert catalog.reload_if_changed() is False
+    assert catalog.version == "stricter"
+
+
+def test_small_path_uses_engine_rules(tmp_path):
+    path = tmp_path / "rules.json"
+    data = _catalog_data()
+    data["version"] = "cheap-airtime"
+    data["thresholds"]["airtime_drains"]["max_amount"] = 5
+    _write(path, data)
+    as_of = utc_timestamp("2026-06-01T00:00:00Z")
+    transactions = _transactions(as_of)
+
+    for small_input_rows in (0, 50):
+        engine = ForensicEngine(
+            rules=load_rules(path), small_input_rows=small_input_rows
+        )
+        result = engine.analyze(transactions, as_of=as_of)
+        assert result["money_leaks"] == []
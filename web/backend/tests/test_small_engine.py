@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import random
+from datetime import timedelta
+
+
+from app import small_engine
+from app.detectors.rules import default_rules
+from app.forensic_engine import TRANSACTION_COLUMNS, ForensicEngine, columns_from_rows
+from benchmarks.synthetic import synthetic_transactions
+from conftest import utc_timestamp
+
+AS_OF = utc_timestamp("2026-07-01T12:00:00Z")
+RULES = default_rules()
+
+
+def _comparable(result: dict) -> dict:
+    diagnostics = result.pop("diagnostics")
+    result["detectors"] = [
+        {k: v for k, v in t.items() if k != "wall_ms"} for t in diagnostics["detectors"]
+    ]
+    return result
+
+
+def _statement(seed: int) -> list:
+    rng = random.Random(seed)
+    transactions = synthetic_transactions(
+        rng.randint(1, 35), seed=seed, days=rng.choice([20, 120, 400])
+    )
+    for i, tx in enumerate(transactions):
+        # Pin the synthetic "now" to AS_OF so windows and recency are reproducible.
+        tx["timestamp"] = (
+            (AS_OF - timedelta(days=rng.uniform(0, 90))).floor("us").isoformat()
+        )
+        if i % 7 == 3:
+            tx["amount"], tx["direction"] = (
+                -1000.0 if rng.random() < 0.5 else tx["amount"],
+                None,
+            )
+    for k in range(rng.randint(0, 5)):
+        transactions.append(
+            {
+                "id": f"gym-{k}",
+                "timestamp": (AS_OF - timedelta(days=30 * k + 1)).isoformat(),
+                "amount": -49.99,
+                "description": "Gym",
+                "merchant": "Gym Co",
+                "direction": "debit",
+            }
+        )
+    credit = AS_OF - timedelta(days=5)
+    transactions.append(
+        {
+            "id": "salary",
+            "timestamp": credit.isoformat(),
+            "amount": 1500.0,
+            "description": "Salary",
+        }
+    )
+    for k in range(rng.randint(0, 8)):
+        transactions.append(
+            {
+                "id": f"cash-{k}",
+                "timestamp": (credit + timedelta(hours=5 * k)).isoformat(),
+                "amount": -round(rng.uniform(50, 400), 2),
+                "description": "Cash out fee",
+            }
+        )
+    return transactions
+
+
+def test_small_inputs_match_the_pandas_engine(monkeypatch):
+    pandas_engine, engine = ForensicEngine(small_input_rows=0), ForensicEngine()
+    prepared = []
+    original = small_engine.prepare_rows
+    monkeypatch.setattr(
+        small_engine,
+        "prepare_rows",
+        lambda *args: prepared.append(original(*args)) or prepared[-1],
+    )
+
+    for seed in range(60):
+        transactions = _statement(seed)
+        expected = _comparable(
+            pandas_engine.analyze(transactions, diagnostics=True, as_of=AS_OF)
+        )
+        assert (
+            _comparable(engine.analyze(transactions, diagnostics=True, as_of=AS_OF))
+            == expected
+        )
+
+        rows = [
+            tuple(tx.get(col) for col in TRANSACTION_COLUMNS) for tx in transactions
+        ]
+        columns = columns_from_rows(rows, TRANSACTION_COLUMNS)
+        assert (
+            _comparable(engine.analyze_columns(columns, diagnostics=True, as_of=AS_OF))
+            == expected
+        )
+
+    # Every run took the pure-Python path.
+    assert len(prepared) == 120 and all(rows is not None for rows in prepared)
+
+
+def test_small_inputs_fall_back_to_pandas_when_needed():
+    tx = {
+        "id": "t1",
+        "timestamp": "2026-06-30T08:00:00Z",
+        "amount": -600.0,
+        "description": "Debit order",
+    }
+
+    assert small_engine.prepare_rows([tx], AS_OF, RULES) is not None
+    assert small_engine.prepare_rows([{**tx, "amount": "-600"}], AS_OF, RULES) is None
+    assert (
+        small_engine.prepare_rows([{**tx, "timestamp": "30/06/2026"}], AS_OF, RULES)
+        is None
+    )
+    assert small_engine.prepare_rows([{**tx, "id": 1}], AS_OF, RULES) is None
+    # Naive next to offset-aware values: pandas' resolution is left to pandas.
+    assert (
+        small_engine.prepare_rows(
+            [tx, {**tx, "timestamp": "2026-06-30T08:00:00"}], AS_OF, RULES
+        )
+        is None
+    )
+
+    pandas_engine, engine = ForensicEngine(small_input_rows=0), ForensicEngine()
+    for odd in ({**tx, "amount": "-600"}, {**tx, "timestamp": "not a date"}):
+        assert engine.analyze([odd], as_of=AS_OF) == pandas_engine.analyze(
+            [odd], as_of=AS_OF
+        )
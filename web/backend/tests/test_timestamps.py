@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from app.timestamps import to_utc_timestamps
+
+
+def test_fixed_layout_fast_path_matches_pandas():
+    values = pd.Series(
+        [
+            "2026-01-07T08:15:00Z",
+            "2024-02-29T23:59:59Z",
+            "1999-12-31T00:00:01Z",
+        ]
+    )
+
+    expected = pd.to_datetime(values, utc=True)
+    pd.testing.assert_series_equal(to_utc_timestamps(values), expected)
+    with_fraction = pd.Series(
+        ["2026-01-07T08:15:00.250+00:00", "2026-01-07T08:15:00.000+00:00"]
+    )
+    pd.testing.assert_series_equal(
+        to_utc_timestamps(with_fraction), pd.to_datetime(with_fraction, utc=True)
+    )
+
+
+def test_other_inputs_are_normalized_to_utc():
+    sast = timezone(timedelta(hours=2))
+    rows = pd.Series([datetime(2026, 6, 1, 10, 0, tzinfo=sast), None], dtype=object)
+    mixed = pd.Series(
+        [
+            "2026-06-01T08:00:00Z",
+            "2026-06-01T10:00:00+02:00",
+            "2026-02-30T00:00:00Z",
+            "garbage",
+        ]
+    )
+
+    assert to_utc_timestamps(rows).tolist()[0] == pd.Timestamp("2026-06-01T08:00:00Z")
+    assert to_utc_timestamps(rows).isna().tolist() == [False, True]
+    assert (
+        to_utc_timestamps(pd.Series(pd.to_datetime(["2026-06-01 08:00"]))).dt.tz
+        is not None
+    )
+    parsed = to_utc_timestamps(mixed)
+    assert parsed.iloc[0] == parsed.iloc[1] == pd.Timestamp("2026-06-01T08:00:00Z")
+    assert parsed.iloc[2:].isna().all()
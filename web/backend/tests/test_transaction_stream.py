@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+
+from app import transaction_stream
+from app.transaction_stream import TransactionColumns, read_transaction_stream
+
+
+def test_stream_batches_are_validated_off_the_event_loop(monkeypatch):
+    flush_threads = []
+    flush = TransactionColumns.flush
+
+    def recording_flush(self):
+        flush_threads.append(threading.get_ident())
+        flush(self)
+
+    monkeypatch.setattr(TransactionColumns, "flush", recording_flush)
+    lines = [
+        json.dumps(
+            {"id": f"txn-{i}", "timestamp": "2026-06-15T12:00:00Z", "amount": -10.0}
+        ).encode()
+        for i in range(2 * transaction_stream.BATCH_SIZE + 10)
+    ]
+
+    async def scenario():
+        async def chunks():
+            for line in lines:
+                yield line + b"\n"
+
+        columns = await read_transaction_stream(chunks(), max_rows=len(lines))
+        return columns, threading.get_ident()
+
+    columns, loop_thread = asyncio.run(scenario())
+
+    assert columns["id"] == [f"txn-{i}" for i in range(len(lines))]
+    assert len(flush_threads) == 3
+    assert loop_thread not in flush_threads